@@ -0,0 +1,218 @@
+import io
+import os
+import csv
+import hashlib
+from dataclasses import dataclass, field
+
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO, RUTA_CSV_ORIGINAL, RUTA_DATASET_LIMPIO, metricas, nombre_derivado
+from .agregacion_streaming import AgregadosStreaming
+from .cubo_agregado import CuboAgregado
+
+# ==============================================================================
+# Actualización incremental de agregados cuando llegan filas nuevas al CSV
+# ==============================================================================
+
+# Bytes previos al último offset que se guardan como huella para detectar reescrituras
+TAM_HUELLA = 4096
+
+# Funciones cuya figura depende solo de un año: (nombre del parámetro, posición en
+# 'args' de la especificación, contando desde el argumento que sigue a data)
+PARAMETRO_AÑO_FIGURA = {
+    'crear_grafico_dispersion_por_año': ('año', 2),
+}
+
+
+@dataclass
+class ResultadoActualizacion:
+    """
+    Resumen de una llamada a AgregadosIncrementales.actualizar.
+
+    Atributos:
+        - filas_nuevas: Filas incorporadas en esta actualización.
+        - claves: Conjunto de pares (Country, Year) que recibieron filas nuevas.
+        - reconstruido: True si el archivo cambió de forma no incremental y se recalculó todo.
+    """
+    filas_nuevas: int = 0
+    claves: set = field(default_factory=set)
+    reconstruido: bool = False
+
+    @property
+    def años(self):
+        return {año for _, año in self.claves}
+
+    @property
+    def paises(self):
+        return {pais for pais, _ in self.claves}
+
+
+def _huella(ruta, offset):
+    inicio = max(offset - TAM_HUELLA, 0)
+    with open(ruta, 'rb') as f:
+        f.seek(inicio)
+        return hashlib.sha256(f.read(offset - inicio)).hexdigest()
+
+
+def _fin_ultima_linea(f, desde, tamano, tam_ventana=1 << 16):
+    """Posición siguiente al último salto de línea entre 'desde' y 'tamano' (o 'desde' si no hay)."""
+    fin = tamano
+    while fin > desde:
+        inicio = max(fin - tam_ventana, desde)
+        f.seek(inicio)
+        corte = f.read(fin - inicio).rfind(b'\n')
+        if corte >= 0:
+            return inicio + corte + 1
+        fin = inicio
+    return desde
+
+
+def _bloques_lineas(f, final, tam_bloque):
+    """Lee de f hasta la posición 'final' en bloques que terminan en salto de línea."""
+    resto = b''
+    while f.tell() < final:
+        datos = f.read(min(tam_bloque, final - f.tell()))
+        corte = datos.rfind(b'\n')
+        if corte < 0:
+            resto += datos
+            continue
+        yield resto + datos[:corte + 1]
+        resto = datos[corte + 1:]
+    if resto:
+        yield resto
+
+
+class AgregadosIncrementales:
+    """
+    Agregados por (Country, Year) persistidos junto con la posición (offset en bytes)
+    hasta la que se leyó el CSV. Cada actualización lee solo los bytes agregados
+    desde entonces, así que su costo depende de los datos nuevos y no del histórico.
+    Las medias y sumas se actualizan de forma exacta; las medianas con el sketch de
+    agregacion_streaming (exactas hasta su capacidad, aproximadas después).
+    """
+
+    def __init__(self, ruta_csv=RUTA_CSV_ORIGINAL, metricas=metricas, capacidad_sketch=256):
+        self.ruta_csv = ruta_csv
+        self.metricas = list(metricas)
+        self.capacidad_sketch = capacidad_sketch
+        self.agregados = AgregadosStreaming(self.metricas, capacidad_sketch=capacidad_sketch)
+        self.encabezado = None
+        self.offset = 0
+        self.huella = None
+
+    @staticmethod
+    def ruta_estado_por_defecto(ruta_csv, dir_estado=RUTA_DATASET_LIMPIO):
+        return os.path.join(dir_estado, nombre_derivado(ruta_csv) + '.incremental.pkl')
+
+    def guardar(self, ruta_estado=None):
+        """Persiste los agregados y el offset (pickle) para la próxima actualización."""
+        ruta_estado = ruta_estado or self.ruta_estado_por_defecto(self.ruta_csv)
+        os.makedirs(os.path.dirname(ruta_estado) or '.', exist_ok=True)
+        tmp = ruta_estado + '.tmp'
+        pd.to_pickle(self, tmp)
+        os.replace(tmp, ruta_estado)
+
+    @classmethod
+    def cargar(cls, ruta_csv=RUTA_CSV_ORIGINAL, ruta_estado=None, **kwargs):
+        """
+        Entradas:
+            - ruta_csv: CSV que se va a seguir.
+            - ruta_estado: Archivo de estado (por defecto en data/dataset_limpio/).
+            - kwargs: Argumentos para crear el estado si todavía no existe.
+        Salida:
+            - El estado guardado o uno nuevo (vacío) si no existe.
+        """
+        ruta_estado = ruta_estado or cls.ruta_estado_por_defecto(ruta_csv)
+        if os.path.exists(ruta_estado):
+            estado = pd.read_pickle(ruta_estado)
+            estado.ruta_csv = ruta_csv
+            return estado
+        return cls(ruta_csv, **kwargs)
+
+    def _reiniciar(self):
+        self.agregados = AgregadosStreaming(self.metricas, capacidad_sketch=self.capacidad_sketch)
+        self.encabezado = None
+        self.offset = 0
+        self.huella = None
+
+    def actualizar(self, tam_bloque_bytes=64 * 2**20):
+        """
+        Entradas:
+            - tam_bloque_bytes: Bytes leídos y parseados por bloque (acota la memoria).
+        Salida:
+            - Un ResultadoActualizacion con las filas nuevas y los (Country, Year) afectados.
+            - Solo se consumen líneas completas: una línea que el proveedor está escribiendo
+              se deja para la siguiente actualización. Si el archivo se truncó o se
+              reescribió (la huella no coincide) se recalculan todos los agregados.
+        """
+        resultado = ResultadoActualizacion()
+        tamano = os.path.getsize(self.ruta_csv)
+        if self.offset and (tamano < self.offset or _huella(self.ruta_csv, self.offset) != self.huella):
+            self._reiniciar()
+            resultado.reconstruido = True
+
+        with open(self.ruta_csv, 'rb') as f:
+            if self.encabezado is None:
+                linea = f.readline()
+                if not linea.endswith(b'\n'):
+                    return resultado
+                self.encabezado = next(csv.reader([linea.decode('utf-8-sig')]))
+                self.offset = f.tell()
+
+            final = _fin_ultima_linea(f, self.offset, tamano)
+            f.seek(self.offset)
+            tipos = {COLUMNA_PAIS: 'category', COLUMNA_AÑO: 'int16'}
+            for bloque_bytes in _bloques_lineas(f, final, tam_bloque_bytes):
+                bloque = pd.read_csv(io.BytesIO(bloque_bytes), header=None, names=self.encabezado, dtype=tipos)
+                self.agregados.actualizar(bloque)
+                resultado.filas_nuevas += len(bloque)
+                claves = bloque[[COLUMNA_PAIS, COLUMNA_AÑO]].drop_duplicates()
+                resultado.claves.update(zip(claves[COLUMNA_PAIS].astype(str), claves[COLUMNA_AÑO].astype(int)))
+
+        if final > self.offset:
+            self.offset = final
+            self.huella = _huella(self.ruta_csv, self.offset)
+        return resultado
+
+    def cubo(self):
+        """
+        Salida:
+            - Un CuboAgregado con el conteo, la suma, la media (exactos) y la mediana
+              (sketch) por (Country, Year), listo para pasarlo a las funciones crear_*.
+        """
+        ag = self.agregados
+        medias = ag.medias()
+        medianas = ag.cuantiles(0.5, por=ag.claves)
+        partes = {'count': ag.conteo.sort_index(), 'sum': ag.suma.sort_index(), 'mean': medias, 'median': medianas}
+        tabla = pd.concat(partes, axis=1).swaplevel(0, 1, axis=1)
+        tabla = tabla[[(m, e) for m in self.metricas for e in partes]]
+        tabla.index.names = ag.claves
+        return CuboAgregado(tabla, *ag.claves)
+
+
+def figuras_obsoletas(especificaciones, resultado):
+    """
+    Entradas:
+        - especificaciones: Lista de especificaciones de figuras (formato de render_lote).
+        - resultado: ResultadoActualizacion devuelto por AgregadosIncrementales.actualizar.
+    Salida:
+        - Lista de índices de las especificaciones cuya figura cambió con los datos nuevos.
+          Las figuras de un solo año (ej: crear_grafico_dispersion_por_año) solo quedan
+          obsoletas si llegaron filas de ese año; el resto, si llegó cualquier fila.
+    """
+    if resultado.reconstruido:
+        return list(range(len(especificaciones)))
+    if not resultado.claves:
+        return []
+
+    años = resultado.años
+    obsoletas = []
+    for i, especificacion in enumerate(especificaciones):
+        año = None
+        if especificacion['funcion'] in PARAMETRO_AÑO_FIGURA:
+            nombre, posicion = PARAMETRO_AÑO_FIGURA[especificacion['funcion']]
+            args = especificacion.get('args', ())
+            año = args[posicion] if len(args) > posicion else especificacion.get('kwargs', {}).get(nombre)
+        if año is None or int(año) in años:
+            obsoletas.append(i)
+    return obsoletas
@@ -0,0 +1,549 @@
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO, metricas
+from .estadisticas_grupo import EstadisticasGrupo
+
+# ==============================================================================
+# Centroides de cuantiles por grupo (compresión y orden segmentados)
+# ==============================================================================
+
+def comprimir_centroides_por_grupo(codigos, valores, pesos, capacidad, comprimir):
+    """
+    Entradas:
+        - codigos, valores, pesos: Centroides de varios grupos, ordenados por (código, valor).
+        - capacidad: Número máximo de centroides por grupo comprimido.
+        - comprimir: Arreglo booleano por código; True = el grupo se comprime.
+    Salida:
+        - (codigos, valores, pesos) ordenados por (código, valor). Cada grupo marcado queda
+          en a lo sumo 'capacidad' centroides de igual peso (cada uno con la media ponderada
+          de los valores que agrupa) y el resto no cambia. Todos los grupos se comprimen a la vez con sumas segmentadas.
+    """
+    seleccion = comprimir[codigos]
+    c, v, w = codigos[seleccion], valores[seleccion], pesos[seleccion]
+
+    # Peso acumulado antes de cada centroide dentro de su grupo y peso total del grupo
+    inicios = np.flatnonzero(np.r_[True, c[1:] != c[:-1]])
+    largos = np.diff(np.r_[inicios, len(c)])
+    acumulado = np.cumsum(w)
+    previo = acumulado - w - np.repeat((acumulado - w)[inicios], largos)
+    total = np.repeat(np.add.reduceat(w, inicios), largos)
+    cubeta = np.minimum((previo / total * capacidad).astype(np.int64), capacidad - 1)
+
+    # La clave (grupo, cubeta) no decrece: cada cubeta es un segmento contiguo
+    clave = c.astype(np.int64) * capacidad + cubeta
+    cortes = np.flatnonzero(np.r_[True, clave[1:] != clave[:-1]])
+    peso_cubeta = np.add.reduceat(w, cortes)
+    valor_cubeta = np.add.reduceat(v * w, cortes) / peso_cubeta
+
+    codigos = np.concatenate((codigos[~seleccion], c[cortes]))
+    valores = np.concatenate((valores[~seleccion], valor_cubeta))
+    pesos = np.concatenate((pesos[~seleccion], peso_cubeta))
+    # Los grupos de ambas partes son distintos: un orden estable por código conserva el orden por valor
+    orden = np.argsort(codigos, kind='stable')
+    return codigos[orden], valores[orden], pesos[orden]
+
+
+def _orden_por_grupo_y_valor(codigos, valores, n_grupos):
+    """
+    Permutación que ordena por (código, valor): primero por valor y luego, de forma
+    estable, por código. Con códigos de 8 o 16 bits el segundo paso es un ordenamiento
+    radix, bastante más rápido que np.lexsort.
+    """
+    orden = np.argsort(valores)
+    por_grupo = np.argsort(codigos[orden].astype(np.min_scalar_type(max(n_grupos - 1, 0))), kind='stable')
+    return orden[por_grupo]
+
+
+# ==============================================================================
+# Agregados parciales fusionables por (Country, Year)
+# ==============================================================================
+
+# Bytes por centroide guardado (valor y peso en float64), por valor pendiente de
+# fusionar (código int32 y valor float64) y adicionales por entrada mientras se fusiona
+# y comprime una métrica (orden, copias ordenadas y temporales de la compresión; medido
+# con tracemalloc en ~120 bytes)
+BYTES_CENTROIDE = 16
+BYTES_PENDIENTE = 12
+BYTES_FUSION = 128
+
+# Por grupo: conteo, suma, mínimo y máximo (8 bytes x métrica, con holgura por el
+# crecimiento por duplicación) más la tupla de la clave en el diccionario de posiciones
+BYTES_TABLAS_METRICA = 4 * 8 * 2
+BYTES_CLAVE = 300
+
+# Valores pendientes a partir de los cuales siempre se fusiona
+PENDIENTES_MINIMOS = 1 << 16
+
+
+class AgregadosStreaming:
+    """
+    Agregados parciales por (Country, Year): conteo de no nulos, suma, mínimo, máximo y
+    un sketch de cuantiles por métrica. Dos instancias se pueden fusionar, de modo que los
+    bloques de un CSV (o varios CSV) se procesan por separado y se combinan al final.
+
+    Cada (Country, Year) recibe un código entero en orden de aparición. El conteo, la
+    suma, el mínimo y el máximo son arreglos (grupos x métricas) preasignados que crecen
+    por duplicación; un bloque se ordena una sola vez por código y se acumula con
+    reducciones segmentadas (sin recorrer los grupos en Python).
+
+    Los sketches de todos los grupos de una métrica comparten dos arreglos (valores,
+    pesos) ordenados por (grupo, valor) con el inicio de cada grupo. Los valores nuevos
+    quedan pendientes y se fusionan cuando llegan a la mitad del tamaño máximo del estado
+    (costo amortizado O(log n) por valor): se ordena una vez y los grupos con más de
+    capacidad_sketch centroides se comprimen a 'capacidad_sketch' con
+    comprimir_centroides_por_grupo. Con hasta capacidad_sketch valores por grupo los
+    cuantiles son exactos.
+    """
+
+    def __init__(self, metricas=metricas, claves=(COLUMNA_PAIS, COLUMNA_AÑO), capacidad_sketch=256):
+        self.metricas = list(metricas)
+        self.claves = list(claves)
+        self.capacidad_sketch = capacidad_sketch
+        self.filas = 0
+        self._posicion = {}
+        self._lista_claves = []
+
+        n_metricas = len(self.metricas)
+        self._conteo = np.zeros((0, n_metricas), dtype=np.int64)
+        self._suma = np.zeros((0, n_metricas))
+        self._minimo = np.full((0, n_metricas), np.nan)
+        self._maximo = np.full((0, n_metricas), np.nan)
+
+        self._valores = [np.empty(0) for _ in self.metricas]
+        self._pesos = [np.empty(0) for _ in self.metricas]
+        self._inicios = [np.zeros(1, dtype=np.int64) for _ in self.metricas]
+        self._pendientes = [[] for _ in self.metricas]  # (códigos, valores, pesos o None = unos)
+        self._n_pendientes = 0
+
+    @property
+    def n_grupos(self):
+        return len(self._lista_claves)
+
+    # ---- Códigos de grupo -----------------------------------------------------------
+
+    def _registrar(self, clave):
+        posicion = self._posicion.get(clave)
+        if posicion is None:
+            posicion = self._posicion[clave] = len(self._lista_claves)
+            self._lista_claves.append(clave)
+        return posicion
+
+    def _reservar(self):
+        """Amplía las tablas (por duplicación) hasta tener espacio para todos los grupos."""
+        capacidad = len(self._conteo)
+        if self.n_grupos <= capacidad:
+            return
+        nueva = max(self.n_grupos, 2 * capacidad, 16)
+        for nombre, relleno in (('_conteo', 0), ('_suma', 0.0), ('_minimo', np.nan), ('_maximo', np.nan)):
+            viejo = getattr(self, nombre)
+            tabla = np.full((nueva, viejo.shape[1]), relleno, dtype=viejo.dtype)
+            tabla[:capacidad] = viejo
+            setattr(self, nombre, tabla)
+
+    def _codigos(self, bloque):
+        """Código de grupo de cada fila del bloque (-1 si alguna clave es nula)."""
+        combinado = np.zeros(len(bloque), dtype=np.int64)
+        nulos = np.zeros(len(bloque), dtype=bool)
+        unicos = []
+        for c in self.claves:
+            codigos, valores = pd.factorize(bloque[c])
+            combinado = combinado * max(len(valores), 1) + codigos
+            nulos |= codigos < 0
+            unicos.append(np.asarray(valores))
+
+        presentes, inversa = np.unique(combinado[~nulos], return_inverse=True)
+        # Se separa cada combinación presente en sus códigos por clave (base mixta)
+        partes, resto = [], presentes
+        for valores in reversed(unicos):
+            resto, parte = np.divmod(resto, max(len(valores), 1))
+            partes.append(valores[parte].tolist())
+        mapa = np.array([self._registrar(clave) for clave in zip(*reversed(partes))], dtype=np.int64)
+        self._reservar()
+
+        codigos = np.full(len(bloque), -1, dtype=np.int64)
+        codigos[~nulos] = mapa[inversa] if len(mapa) else inversa
+        return codigos
+
+    # ---- Actualización ------------------------------------------------------------
+
+    def actualizar(self, bloque):
+        """
+        Entradas:
+            - bloque: Dataframe con las columnas de claves y métricas (ej: un chunk del CSV).
+        Salida:
+            - Incorpora el bloque a los agregados y devuelve la misma instancia.
+        """
+        if len(bloque) == 0:
+            return self
+        codigos = self._codigos(bloque)
+        valores = bloque[self.metricas].to_numpy(dtype=np.float64)
+        validos = codigos >= 0
+        if not validos.all():
+            codigos, valores = codigos[validos], valores[validos]
+
+        if len(codigos):
+            # Un solo ordenamiento por grupo; cada grupo del bloque queda contiguo
+            orden = np.argsort(codigos.astype(np.min_scalar_type(self.n_grupos)), kind='stable')
+            codigos, valores = codigos[orden], valores[orden]
+            inicios = np.flatnonzero(np.r_[True, codigos[1:] != codigos[:-1]])
+            grupos = codigos[inicios]
+            nulos = np.isnan(valores)
+
+            self._conteo[grupos] += np.add.reduceat((~nulos).astype(np.int64), inicios, axis=0)
+            self._suma[grupos] += np.add.reduceat(np.where(nulos, 0.0, valores), inicios, axis=0)
+            self._minimo[grupos] = np.fmin(self._minimo[grupos], np.fmin.reduceat(valores, inicios, axis=0))
+            self._maximo[grupos] = np.fmax(self._maximo[grupos], np.fmax.reduceat(valores, inicios, axis=0))
+
+            codigos32 = codigos.astype(np.int32)
+            for j in range(len(self.metricas)):
+                presentes = ~nulos[:, j]
+                self._pendientes[j].append((codigos32[presentes], valores[presentes, j], None))
+                self._n_pendientes += int(presentes.sum())
+
+        self.filas += len(bloque)
+        if self._n_pendientes >= self._umbral_fusion():
+            self._fusionar_pendientes()
+        return self
+
+    def _umbral_fusion(self):
+        # Fusionar cuando los pendientes llegan a la mitad del tamaño máximo del estado
+        return max(self.n_grupos * len(self.metricas) * self.capacidad_sketch // 2, PENDIENTES_MINIMOS)
+
+    def _fusionar_pendientes(self):
+        """Incorpora los valores pendientes a los sketches (una métrica a la vez)."""
+        n_grupos = self.n_grupos
+        for j in range(len(self.metricas)):
+            if not self._pendientes[j] and len(self._inicios[j]) == n_grupos + 1:
+                continue
+            tamanos = np.diff(self._inicios[j])
+            codigos = np.concatenate([np.repeat(np.arange(len(tamanos), dtype=np.int32), tamanos)]
+                                     + [p[0] for p in self._pendientes[j]])
+            valores = np.concatenate([self._valores[j]] + [p[1] for p in self._pendientes[j]])
+            pesos = np.concatenate([self._pesos[j]]
+                                   + [np.ones(len(p[1])) if p[2] is None else p[2] for p in self._pendientes[j]])
+            # El estado y los pendientes ya están copiados: se liberan antes de ordenar
+            self._pendientes[j] = []
+            self._valores[j] = self._pesos[j] = None
+
+            orden = _orden_por_grupo_y_valor(codigos, valores, n_grupos)
+            codigos = codigos[orden]
+            valores = valores[orden]
+            pesos = pesos[orden]
+            del orden
+            tamanos = np.bincount(codigos, minlength=n_grupos)
+            grandes = tamanos > self.capacidad_sketch
+            if grandes.any():
+                codigos, valores, pesos = comprimir_centroides_por_grupo(codigos, valores, pesos,
+                                                                         self.capacidad_sketch, grandes)
+                tamanos = np.bincount(codigos, minlength=n_grupos)
+            self._valores[j], self._pesos[j] = valores, pesos
+            self._inicios[j] = np.concatenate(([0], np.cumsum(tamanos)))
+        self._n_pendientes = 0
+
+    def fusionar(self, otro):
+        """Combina en esta instancia los agregados de otra con las mismas claves y métricas."""
+        otro._fusionar_pendientes()
+        if otro.n_grupos:
+            mapa = np.array([self._registrar(clave) for clave in otro._lista_claves], dtype=np.int64)
+            self._reservar()
+            n = otro.n_grupos
+            self._conteo[mapa] += otro._conteo[:n]
+            self._suma[mapa] += otro._suma[:n]
+            self._minimo[mapa] = np.fmin(self._minimo[mapa], otro._minimo[:n])
+            self._maximo[mapa] = np.fmax(self._maximo[mapa], otro._maximo[:n])
+            for j in range(len(self.metricas)):
+                codigos = mapa[np.repeat(np.arange(n), np.diff(otro._inicios[j]))].astype(np.int32)
+                self._pendientes[j].append((codigos, otro._valores[j], otro._pesos[j]))
+                self._n_pendientes += len(codigos)
+            self._fusionar_pendientes()
+        self.filas += otro.filas
+        return self
+
+    # ---- Consultas --------------------------------------------------------------------
+
+    def _indice(self):
+        if len(self.claves) == 1:
+            return pd.Index([clave[0] for clave in self._lista_claves], name=self.claves[0])
+        return pd.MultiIndex.from_tuples(self._lista_claves, names=self.claves)
+
+    def _tabla(self, arreglo):
+        return pd.DataFrame(arreglo[:self.n_grupos], index=self._indice(), columns=self.metricas)
+
+    @property
+    def conteo(self):
+        """Conteo de valores no nulos por (Country, Year) (dataframe grupos x métricas)."""
+        return self._tabla(self._conteo)
+
+    @property
+    def suma(self):
+        return self._tabla(self._suma)
+
+    @property
+    def minimo(self):
+        return self._tabla(self._minimo)
+
+    @property
+    def maximo(self):
+        return self._tabla(self._maximo)
+
+    def _niveles(self, por):
+        por = [por] if isinstance(por, str) else list(por)
+        return por, [self.claves.index(c) for c in por]
+
+    def medias(self, por=(COLUMNA_PAIS, COLUMNA_AÑO)):
+        """
+        Entradas:
+            - por: Columnas de agrupación (subconjunto de las claves).
+        Salida:
+            - Dataframe equivalente a data.groupby(por)[metricas].mean() (exacto).
+        """
+        por, niveles = self._niveles(por)
+        suma = self.suma.groupby(level=niveles).sum()
+        conteo = self.conteo.groupby(level=niveles).sum()
+        medias = suma / conteo.where(conteo > 0)
+        medias.index.names = por
+        return medias.sort_index()
+
+    def cuantiles(self, q=0.5, por=(COLUMNA_PAIS,)):
+        """
+        Entradas:
+            - q: Cuantil entre 0 y 1 (0.5 para la mediana).
+            - por: Columnas de agrupación (subconjunto de las claves).
+        Salida:
+            - Dataframe (grupos x métricas) con el cuantil. Los centroides de todos los
+              (Country, Year) de cada grupo se combinan sin volver a comprimir, así que el
+              resultado es exacto si ningún (Country, Year) superó capacidad_sketch valores.
+        """
+        self._fusionar_pendientes()
+        por, niveles = self._niveles(por)
+        destinos = {}
+        destino_grupo = np.array([destinos.setdefault(tuple(clave[i] for i in niveles), len(destinos))
+                                  for clave in self._lista_claves], dtype=np.int64)
+
+        resultado = np.full((len(destinos), len(self.metricas)), np.nan)
+        for j in range(len(self.metricas)):
+            d = destino_grupo[np.repeat(np.arange(self.n_grupos), np.diff(self._inicios[j]))]
+            if len(d) == 0:
+                continue
+            orden = _orden_por_grupo_y_valor(d, self._valores[j], len(destinos))
+            d, valores, pesos = d[orden], self._valores[j][orden], self._pesos[j][orden]
+            cortes = np.flatnonzero(np.r_[True, d[1:] != d[:-1]])
+            ultimos = np.r_[cortes[1:], len(d)] - 1
+
+            # Cada centroide se ubica en la posición media de las observaciones que
+            # representa (con pesos unitarios, la de pandas). Las posiciones son globales,
+            # así que un solo searchsorted ubica el cuantil de todos los grupos
+            acumulado = np.cumsum(pesos)
+            centros = acumulado - pesos + (pesos - 1) / 2
+            objetivo = (acumulado - pesos)[cortes] + q * (np.add.reduceat(pesos, cortes) - 1)
+            k = np.clip(np.searchsorted(centros, objetivo, side='right') - 1, cortes, ultimos)
+            siguiente = np.minimum(k + 1, ultimos)
+
+            # Interpolación lineal entre centroides vecinos (como np.interp, acotada a los extremos)
+            tramo = centros[siguiente] - centros[k]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                fraccion = np.clip(np.where(tramo > 0, (objetivo - centros[k]) / tramo, 0.0), 0.0, 1.0)
+            resultado[d[cortes], j] = valores[k] + fraccion * (valores[siguiente] - valores[k])
+
+        if len(por) == 1:
+            indice = pd.Index([d[0] for d in destinos], name=por[0])
+        else:
+            indice = pd.MultiIndex.from_tuples(list(destinos), names=por)
+        return pd.DataFrame(resultado, index=indice, columns=self.metricas).sort_index()
+
+    def estadisticas_mediana(self, categorias=None, col_grupo=COLUMNA_PAIS):
+        """
+        Entradas:
+            - categorias: Métricas a incluir (por defecto todas).
+            - col_grupo: Columna de agrupación.
+        Salida:
+            - Un EstadisticasGrupo con la mediana por grupo, listo para pasarse como
+              'estadisticas' a mediana_categoria o top_mediana_categoria.
+        """
+        categorias = self.metricas if categorias is None else list(categorias)
+        medianas = self.cuantiles(0.5, por=(col_grupo,))[categorias]
+        return EstadisticasGrupo(grupos=pd.Index(medianas.index, name=col_grupo),
+                                 categorias=categorias,
+                                 valores={'median': medianas.to_numpy()})
+
+    # ---- Memoria ----------------------------------------------------------------------
+
+    def memoria_bytes(self):
+        """Memoria ocupada ahora por las tablas, los sketches y los valores pendientes."""
+        tablas = sum(t.nbytes for t in (self._conteo, self._suma, self._minimo, self._maximo))
+        sketches = sum(v.nbytes + w.nbytes + i.nbytes for v, w, i in zip(self._valores, self._pesos, self._inicios))
+        pendientes = sum(c.nbytes + v.nbytes + (0 if w is None else w.nbytes)
+                         for lista in self._pendientes for c, v, w in lista)
+        return tablas + sketches + pendientes + self.n_grupos * BYTES_CLAVE
+
+    def memoria_maxima_bytes(self, n_grupos=None):
+        """
+        Cota (aproximada) de la memoria que pueden llegar a ocupar los agregados con
+        n_grupos (Country, Year) (por defecto los vistos hasta ahora): tablas, sketches
+        llenos (capacidad_sketch centroides por grupo y métrica), valores pendientes hasta
+        el umbral de fusión y temporales de la fusión y compresión de una métrica.
+        """
+        n_grupos = self.n_grupos if n_grupos is None else n_grupos
+        n_metricas = len(self.metricas)
+        por_metrica = n_grupos * self.capacidad_sketch
+        pendientes = max(n_grupos * n_metricas * self.capacidad_sketch // 2, PENDIENTES_MINIMOS)
+        return (n_grupos * (n_metricas * BYTES_TABLAS_METRICA + BYTES_CLAVE)
+                + n_metricas * por_metrica * BYTES_CENTROIDE
+                + pendientes * BYTES_PENDIENTE
+                + (por_metrica + pendientes // n_metricas) * BYTES_FUSION)
+
+# ==============================================================================
+# Lectura del CSV por bloques de tamaño acotado
+# ==============================================================================
+
+# Factor entre la memoria de un bloque ya parseado y el pico que alcanza el parser
+# (texto leído, columnas intermedias y copias de la agregación)
+FACTOR_PICO_PARSER = 4
+
+# Por debajo de estas filas por bloque el costo por bloque domina y el presupuesto se rechaza
+FILAS_MINIMAS_BLOQUE = 1000
+
+
+def _bytes_por_fila(ruta_csv, filas_muestra=1000):
+    """Memoria pico estimada por fila en vuelo (muestra parseada x FACTOR_PICO_PARSER)."""
+    muestra = pd.read_csv(ruta_csv, nrows=filas_muestra)
+    if len(muestra) == 0:
+        return None, muestra
+    return muestra.memory_usage(deep=True).sum() / len(muestra) * FACTOR_PICO_PARSER, muestra
+
+
+def filas_por_bloque(ruta_csv, memoria_max_mb, filas_muestra=1000):
+    """
+    Entradas:
+        - ruta_csv: CSV a procesar.
+        - memoria_max_mb: Presupuesto de memoria (MiB) para cada bloque en vuelo.
+        - filas_muestra: Filas que se parsean para estimar el costo por fila.
+    Salida:
+        - Número de filas por bloque para que el parseo de un bloque no supere el presupuesto.
+    """
+    bytes_fila, _ = _bytes_por_fila(ruta_csv, filas_muestra)
+    if bytes_fila is None:
+        return filas_muestra
+    return max(int(memoria_max_mb * 2**20 / bytes_fila), 1)
+
+
+def _error_presupuesto(memoria_max_mb, agregados, n_grupos, bytes_fila):
+    estado = agregados.memoria_maxima_bytes(n_grupos) / 2**20
+    minimo = estado + FILAS_MINIMAS_BLOQUE * bytes_fila / 2**20
+    return ValueError(
+        f"Presupuesto de {memoria_max_mb} MiB insuficiente: los agregados de {n_grupos:,} grupos "
+        f"(Country, Year) pueden ocupar hasta {estado:.1f} MiB con capacidad_sketch="
+        f"{agregados.capacidad_sketch}; se necesitan al menos {minimo:.1f} MiB "
+        f"(o una capacidad_sketch menor)")
+
+
+def agregar_csv_streaming(ruta_csv, memoria_max_mb=256, metricas=metricas, capacidad_sketch=256, agregados=None):
+    """
+    Entradas:
+        - ruta_csv: CSV con el formato de global_energy_consumption.csv (puede ser mayor que la RAM).
+        - memoria_max_mb: Presupuesto de memoria (MiB) para los agregados más el bloque en vuelo.
+        - metricas: Columnas numéricas a agregar.
+        - capacidad_sketch: Centroides por sketch; más capacidad = medianas más precisas y más memoria.
+        - agregados: AgregadosStreaming existente al que se suman los datos (opcional).
+    Salida:
+        - Un AgregadosStreaming con los agregados por (Country, Year) de todo el archivo.
+
+    Antes de cada bloque se descuenta del presupuesto la cota de memoria de los agregados
+    (AgregadosStreaming.memoria_maxima_bytes con los grupos vistos hasta ese momento) y el
+    bloque se dimensiona con lo que queda. Si no quedan ni FILAS_MINIMAS_BLOQUE filas se
+    lanza ValueError: al inicio, con los grupos de la muestra, o en cuanto los grupos
+    nuevos de un bloque agotan el presupuesto (la memoria de ese último bloque puede
+    excederlo). La cota es una estimación; el pico real también depende del parser de pandas.
+    """
+    if agregados is None:
+        agregados = AgregadosStreaming(metricas, capacidad_sketch=capacidad_sketch)
+    presupuesto = memoria_max_mb * 2**20
+    bytes_fila, muestra = _bytes_por_fila(ruta_csv)
+    if bytes_fila is None:
+        return agregados
+    # Los valores pendientes del bloque también ocupan memoria hasta la siguiente fusión
+    bytes_fila += len(agregados.metricas) * BYTES_PENDIENTE
+
+    grupos_muestra = max(agregados.n_grupos, len(muestra[agregados.claves].drop_duplicates()))
+    if presupuesto - agregados.memoria_maxima_bytes(grupos_muestra) < FILAS_MINIMAS_BLOQUE * bytes_fila:
+        raise _error_presupuesto(memoria_max_mb, agregados, grupos_muestra, bytes_fila)
+
+    tipos = {COLUMNA_PAIS: 'category', COLUMNA_AÑO: 'int16'}
+    with pd.read_csv(ruta_csv, dtype=tipos, iterator=True) as lector:
+        while True:
+            filas = int((presupuesto - agregados.memoria_maxima_bytes()) // bytes_fila)
+            if filas < FILAS_MINIMAS_BLOQUE:
+                raise _error_presupuesto(memoria_max_mb, agregados, agregados.n_grupos, bytes_fila)
+            try:
+                bloque = lector.get_chunk(filas)
+            except StopIteration:
+                break
+            agregados.actualizar(bloque)
+            del bloque
+    return agregados
+
+# ==============================================================================
+# Benchmark de memoria y precisión frente al procesamiento en memoria
+# ==============================================================================
+
+def benchmark_streaming(ruta_csv, memoria_max_mb=64, capacidad_sketch=256):
+    """
+    Entradas:
+        - ruta_csv: CSV a procesar.
+        - memoria_max_mb: Presupuesto de memoria del modo streaming.
+        - capacidad_sketch: Capacidad de los sketches de cuantiles.
+    Salida:
+        - Un diccionario con tiempo y pico de memoria (tracemalloc) de ambos modos y el
+          error máximo de las medias por (Country, Year), las medias por Country y las
+          medianas por Country del modo streaming respecto al procesamiento en memoria.
+        - El reporte también se imprime en pantalla.
+    """
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    data = pd.read_csv(ruta_csv)
+    ref_medias = data.groupby([COLUMNA_PAIS, COLUMNA_AÑO], observed=True)[metricas].mean()
+    ref_medias_pais = data.groupby(COLUMNA_PAIS, observed=True)[metricas].mean()
+    ref_medianas = data.groupby(COLUMNA_PAIS, observed=True)[metricas].median()
+    t_memoria = time.perf_counter() - inicio
+    _, pico_memoria = tracemalloc.get_traced_memory()
+    del data
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    agregados = agregar_csv_streaming(ruta_csv, memoria_max_mb, capacidad_sketch=capacidad_sketch)
+    medias = agregados.medias()
+    medias_pais = agregados.medias((COLUMNA_PAIS,))
+    medianas = agregados.cuantiles(0.5)
+    t_streaming = time.perf_counter() - inicio
+    _, pico_streaming = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    def _error(obtenido, referencia):
+        obtenido = obtenido.to_numpy(dtype=np.float64)
+        referencia = referencia.to_numpy(dtype=np.float64)
+        return float(np.nanmax(np.abs(obtenido - referencia) / np.maximum(np.abs(referencia), 1e-12)))
+
+    resultados = {
+        'memoria': {'tiempo_s': t_memoria, 'pico_memoria_bytes': pico_memoria},
+        'streaming': {'tiempo_s': t_streaming, 'pico_memoria_bytes': pico_streaming,
+                      'memoria_agregados_bytes': agregados.memoria_bytes()},
+        'error_relativo_max': {
+            'medias_pais_año': _error(medias, ref_medias),
+            'medias_pais': _error(medias_pais, ref_medias_pais),
+            'medianas_pais': _error(medianas, ref_medianas),
+        },
+    }
+
+    print(f"Benchmark streaming: {ruta_csv} (presupuesto {memoria_max_mb} MiB)")
+    for modo in ('memoria', 'streaming'):
+        r = resultados[modo]
+        print(f"  {modo:<10} tiempo = {r['tiempo_s']:8.2f} s   pico memoria = {r['pico_memoria_bytes'] / 2**20:8.1f} MiB")
+    for nombre, error in resultados['error_relativo_max'].items():
+        print(f"  Error relativo máximo {nombre}: {error:.2e}")
+    print("-" * 55)
+    return resultados
@@ -0,0 +1,145 @@
+import os
+import json
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO, RUTA_DATASET_LIMPIO
+from .cubo_agregado import CuboAgregado, ESTADISTICAS_CUBO
+
+# ==============================================================================
+# Almacén en disco País x Año x Métrica (arreglos mapeados en memoria)
+# ==============================================================================
+
+RUTA_ALMACEN = os.path.join(RUTA_DATASET_LIMPIO, 'panel')
+
+ARCHIVO_INDICES = 'indices.json'
+
+
+def _archivo_estadistica(estadistica):
+    return f'valores_{estadistica}.npy'
+
+
+def guardar_almacen(data, ruta=RUTA_ALMACEN, metricas=None, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO, cubo=None):
+    """
+    Entradas:
+        - data: Dataframe con los datos originales (se ignora si se pasa cubo).
+        - ruta: Carpeta del almacén (por defecto data/dataset_limpio/panel).
+        - metricas: Columnas a guardar (por defecto todas las numéricas restantes).
+        - col_grupo, col_tiempo: Columnas de país y de año.
+        - cubo: CuboAgregado ya construido (opcional).
+    Salida:
+        - La ruta del almacén. Se escribe un arreglo .npy float64 de forma
+          (países, años, métricas) por cada estadística del cubo (count, sum, mean,
+          median) y 'indices.json' con los nombres de países, años y métricas. Los
+          años cubren el rango completo; las combinaciones sin datos quedan en NaN
+          (conteo 0). La carpeta se reemplaza de forma atómica.
+    """
+    if cubo is None:
+        cubo = CuboAgregado.construir(data, col_grupo, col_tiempo, metricas)
+    metricas = list(metricas) if metricas is not None else cubo.metricas
+
+    indice = cubo.tabla.index
+    codigos_pais, paises = pd.factorize(indice.get_level_values(0), sort=True)
+    tiempos = np.asarray(indice.get_level_values(1), dtype=np.int64)
+    años = np.arange(tiempos.min(), tiempos.max() + 1) if len(tiempos) else np.array([], dtype=np.int64)
+    posicion_año = tiempos - (años[0] if len(años) else 0)
+
+    tmp = ruta.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for estadistica in ESTADISTICAS_CUBO:
+        arreglo = np.lib.format.open_memmap(os.path.join(tmp, _archivo_estadistica(estadistica)), mode='w+',
+                                            dtype=np.float64, shape=(len(paises), len(años), len(metricas)))
+        arreglo[:] = 0.0 if estadistica == 'count' else np.nan
+        arreglo[codigos_pais, posicion_año] = cubo.tabla.loc[:, (metricas, estadistica)].to_numpy(dtype=np.float64)
+        arreglo.flush()
+        del arreglo
+
+    indices = {'paises': [str(p) for p in paises], 'años': años.tolist(), 'metricas': metricas,
+               'estadisticas': list(ESTADISTICAS_CUBO), 'col_grupo': col_grupo, 'col_tiempo': col_tiempo}
+    with open(os.path.join(tmp, ARCHIVO_INDICES), 'w', encoding='utf-8') as f:
+        json.dump(indices, f, ensure_ascii=False)
+
+    viejo = ruta.rstrip(os.sep) + '.viejo'
+    shutil.rmtree(viejo, ignore_errors=True)
+    if os.path.exists(ruta):
+        os.replace(ruta, viejo)
+    os.replace(tmp, ruta)
+    shutil.rmtree(viejo, ignore_errors=True)
+    return ruta
+
+
+class AlmacenPanel:
+    """
+    Acceso de solo lectura a un almacén escrito con guardar_almacen.
+
+    Los arreglos se abren con np.load(mmap_mode='r'): no se leen al abrir, las páginas
+    se cargan bajo demanda y varios procesos que abren la misma carpeta comparten la
+    caché de páginas del sistema operativo (una sola copia en RAM). Los métodos de
+    acceso devuelven vistas del arreglo mapeado, sin copias.
+
+    Atributos:
+        - paises, años, metricas: Índices de pandas de cada dimensión.
+        - col_grupo, col_tiempo: Nombres de las columnas de país y de año.
+    """
+
+    def __init__(self, ruta=RUTA_ALMACEN):
+        self.ruta = ruta
+        with open(os.path.join(ruta, ARCHIVO_INDICES), 'r', encoding='utf-8') as f:
+            indices = json.load(f)
+        self.col_grupo = indices['col_grupo']
+        self.col_tiempo = indices['col_tiempo']
+        self.paises = pd.Index(indices['paises'], name=self.col_grupo)
+        self.años = pd.Index(np.asarray(indices['años'], dtype=np.int64), name=self.col_tiempo)
+        self.metricas = pd.Index(indices['metricas'])
+        self._arreglos = {}
+        self.estadisticas = indices['estadisticas']
+
+    def arreglo(self, estadistica='mean'):
+        """Arreglo mapeado (países, años, métricas) de una estadística."""
+        if estadistica not in self._arreglos:
+            if estadistica not in self.estadisticas:
+                raise KeyError(f"Estadística no guardada: {estadistica!r}")
+            self._arreglos[estadistica] = np.load(os.path.join(self.ruta, _archivo_estadistica(estadistica)), mmap_mode='r')
+        return self._arreglos[estadistica]
+
+    def metrica(self, metrica, estadistica='mean'):
+        """Vista (países, años) de una métrica en todos los países."""
+        return self.arreglo(estadistica)[:, :, self.metricas.get_loc(metrica)]
+
+    def pais(self, pais, estadistica='mean'):
+        """Vista (años, métricas) de un país en todos los años."""
+        return self.arreglo(estadistica)[self.paises.get_loc(pais)]
+
+    def año(self, año, estadistica='mean'):
+        """Vista (países, métricas) de un año."""
+        return self.arreglo(estadistica)[:, self.años.get_loc(int(año))]
+
+    def serie(self, pais, metrica, estadistica='mean'):
+        """Vista (años,) de una métrica de un país."""
+        return self.arreglo(estadistica)[self.paises.get_loc(pais), :, self.metricas.get_loc(metrica)]
+
+    def tabla(self, metrica, estadistica='mean'):
+        """Dataframe países x años de una métrica (envuelve la vista; pandas puede copiarla)."""
+        return pd.DataFrame(self.metrica(metrica, estadistica), index=self.paises, columns=self.años)
+
+    def panel(self):
+        """PanelTransicion sobre las medias (sin copiar el arreglo) para las métricas de transición."""
+        from .transicion import PanelTransicion
+        return PanelTransicion(self.paises, self.años.to_numpy(), list(self.metricas), self.arreglo('mean'))
+
+    def cubo(self):
+        """
+        CuboAgregado equivalente al que se guardó (solo las combinaciones con datos), para
+        pasarlo como cubo= a las funciones crear_* sin cargar el dataframe original.
+        """
+        conteo = self.arreglo('count')
+        pais_idx, año_idx = np.nonzero(conteo.max(axis=2) > 0)
+        indice = pd.MultiIndex.from_arrays([self.paises[pais_idx], self.años[año_idx]],
+                                           names=[self.col_grupo, self.col_tiempo])
+        bloques = np.stack([self.arreglo(e)[pais_idx, año_idx] for e in self.estadisticas], axis=2)
+        columnas = pd.MultiIndex.from_product([list(self.metricas), self.estadisticas])
+        tabla = pd.DataFrame(bloques.reshape(len(indice), -1), index=indice, columns=columnas)
+        return CuboAgregado(tabla, self.col_grupo, self.col_tiempo)
@@ -0,0 +1,287 @@
+import io
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import tracemalloc
+import contextlib
+
+from .estadisticas_grupo import calcular_estadisticas_grupo
+
+# ==============================================================================
+# Benchmarks de procesamiento y visualización sobre datos sintéticos
+# ==============================================================================
+
+VERSION_FORMATO = 1
+
+X = 'Total Energy Consumption (TWh)'
+Y = 'Carbon Emissions (Million Tons)'
+RENOVABLE = 'Renewable Energy Share (%)'
+FOSIL = 'Fossil Fuel Dependency (%)'
+INDUSTRIAL = 'Industrial Energy Use (%)'
+DOMESTICO = 'Household Energy Use (%)'
+
+
+def _casos(vis, pro, data, año):
+    """
+    Casos medidos: nombre -> (llamada completa, llamada solo a la fase de agregación o None).
+    Las funciones sin agregación previa (histograma, KDE, boxplot) solo tienen fase de render.
+    """
+    metricas = list(pro.categorias)
+
+    def _silencioso(funcion):
+        # Las funciones de procesamiento_datos imprimen su reporte; se descarta la salida
+        def envoltura():
+            with contextlib.redirect_stdout(io.StringIO()):
+                funcion()
+        return envoltura
+
+    # En procesamiento_datos la fase de agregación es el cálculo de medianas por país
+    # y el resto (ordenar, formatear e imprimir) cuenta como fase de "render"
+    medianas = lambda: calcular_estadisticas_grupo(data, metricas, 'Country', estadisticas=('median',))
+
+    return {
+        'mediana_categoria': (_silencioso(lambda: pro.mediana_categoria(data, metricas)), medianas),
+        'top_mediana_categoria': (_silencioso(lambda: pro.top_mediana_categoria(data, metricas)), medianas),
+        'crear_histograma': (lambda: vis.crear_histograma(data, RENOVABLE, 'Porcentaje', 'Frecuencia'), None),
+        'crear_grafico_kde': (lambda: vis.crear_grafico_kde(data, RENOVABLE, 'Porcentaje', 'Densidad'), None),
+        'crear_boxplot': (lambda: vis.crear_boxplot(data, 'Country', RENOVABLE, 'Boxplot', 'País', 'Porcentaje'), None),
+        'crear_graf_lineas': (
+            lambda: vis.crear_graf_lineas(data, 'Country', 'Year', RENOVABLE, 'Año', 'Porcentaje', 'Líneas'),
+            lambda: vis._datos_graf_lineas(data, 'Country', 'Year', RENOVABLE)),
+        'crear_grafico_correlacion': (
+            lambda: vis.crear_grafico_correlacion(data, metricas, 'Country', 'Correlación'),
+            lambda: vis._datos_grafico_correlacion(data, metricas, 'Country')),
+        'crear_grafico_barras_agrupadas': (
+            lambda: vis.crear_grafico_barras_agrupadas(data, 'Country', RENOVABLE, FOSIL, 'Tipo', 'Porcentaje', 'País', 'Porcentaje (%)', 'Barras'),
+            lambda: vis._datos_grafico_barras_agrupadas(data, 'Country', RENOVABLE, FOSIL)),
+        'crear_grafico_dispersion_por_año': (
+            lambda: vis.crear_grafico_dispersion_por_año(data, 'Country', 'Year', str(año), X, Y, 'Energía', 'Emisiones', 'Dispersión'),
+            lambda: vis._datos_grafico_dispersion_por_año(data, 'Country', 'Year', str(año), X, Y)),
+        'crear_grafico_dispersion_todos_los_años': (
+            lambda: vis.crear_grafico_dispersion_todos_los_años(data, 'Country', 'Year', X, Y, 'Energía', 'Emisiones', 'Dispersión'),
+            lambda: vis._cuadros_dispersion_por_año(data, 'Country', 'Year', X, Y)),
+        'crear_grafico_dispersion': (
+            lambda: vis.crear_grafico_dispersion(data, 'Country', X, Y, 'Energía', 'Emisiones', 'Dispersión'),
+            lambda: vis._datos_grafico_dispersion(data, 'Country', X, Y)),
+        'crear_grafico_pastel': (
+            lambda: vis.crear_grafico_pastel(data, 'Country', INDUSTRIAL, DOMESTICO, 'Uso', 5, 2),
+            lambda: vis._datos_grafico_pastel(data, 'Country', INDUSTRIAL, DOMESTICO)),
+    }
+
+
+def _mejor_tiempo(funcion, repeticiones):
+    import matplotlib.pyplot as plt
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+        plt.close('all')
+    return min(tiempos)
+
+
+def _pico_memoria(funcion):
+    import matplotlib.pyplot as plt
+
+    tracemalloc.start()
+    try:
+        funcion()
+    finally:
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        plt.close('all')
+    return pico
+
+
+def ejecutar_benchmarks(n_paises=10, n_años=25, filas_por_grupo=40, repeticiones=3, funciones=None, semilla=0, medir_memoria=True):
+    """
+    Entradas:
+        - n_paises, n_años, filas_por_grupo: Escala del dataset sintético
+          (filas = n_paises * n_años * filas_por_grupo).
+        - repeticiones: Repeticiones por medición de tiempo (se reporta la mejor).
+        - funciones: Lista de nombres a medir (por defecto todas).
+        - semilla: Semilla del generador de datos.
+        - medir_memoria: Si es True se hace una ejecución extra con tracemalloc para el
+          pico de memoria (aparte, para no contaminar los tiempos).
+    Salida:
+        - Un diccionario serializable a JSON con los metadatos del entorno y, por cada
+          función, el tiempo total, la fase de agregación, la fase de render (total menos
+          agregación) y el pico de memoria en bytes.
+    """
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    import numpy as np
+    import pandas as pd
+
+    from . import visualizaciones as vis
+    from . import procesamiento_datos as pro
+    from . import cache_figuras
+    from .datos_sinteticos import generar_datos_sinteticos
+
+    data = generar_datos_sinteticos(n_paises, n_años, filas_por_grupo, semilla=semilla)
+    casos = _casos(vis, pro, data, año=2000 + n_años // 2)
+    if funciones is not None:
+        casos = {nombre: casos[nombre] for nombre in funciones}
+
+    ruta_original, mostrar_original, cache_original = vis.RUTA_FIGURAS, vis.MOSTRAR_FIGURAS, cache_figuras.CACHE_ACTIVA
+    resultados = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        vis.RUTA_FIGURAS, vis.MOSTRAR_FIGURAS, cache_figuras.CACHE_ACTIVA = carpeta, False, None
+        try:
+            for nombre, (completa, agregacion) in casos.items():
+                total = _mejor_tiempo(completa, repeticiones)
+                t_agregacion = _mejor_tiempo(agregacion, repeticiones) if agregacion else 0.0
+                registro = {
+                    'funcion': nombre,
+                    'total_s': total,
+                    'agregacion_s': t_agregacion,
+                    'render_s': max(total - t_agregacion, 0.0),
+                }
+                if medir_memoria:
+                    registro['pico_memoria_bytes'] = _pico_memoria(completa)
+                resultados.append(registro)
+        finally:
+            vis.RUTA_FIGURAS, vis.MOSTRAR_FIGURAS, cache_figuras.CACHE_ACTIVA = ruta_original, mostrar_original, cache_original
+
+    return {
+        'version_formato': VERSION_FORMATO,
+        'metadatos': {
+            'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'plataforma': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__,
+            'escala': {'n_paises': n_paises, 'n_años': n_años, 'filas_por_grupo': filas_por_grupo,
+                       'filas': len(data), 'semilla': semilla},
+            'repeticiones': repeticiones,
+        },
+        'resultados': resultados,
+    }
+
+
+def comparar_benchmarks(base, actual, tolerancia=0.2, metricas=('total_s', 'pico_memoria_bytes')):
+    """
+    Entradas:
+        - base: Resultados de referencia (diccionario de ejecutar_benchmarks o ruta a su JSON).
+        - actual: Resultados nuevos (diccionario o ruta).
+        - tolerancia: Aumento relativo permitido antes de considerar una regresión (0.2 = 20 %).
+        - metricas: Campos que se comparan.
+    Salida:
+        - Lista de regresiones: diccionarios con 'funcion', 'metrica', 'base', 'actual' y 'cambio'.
+    """
+    def _leer(resultado):
+        if isinstance(resultado, str):
+            with open(resultado, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return resultado
+
+    base, actual = _leer(base), _leer(actual)
+    referencia = {r['funcion']: r for r in base['resultados']}
+    regresiones = []
+    for registro in actual['resultados']:
+        previo = referencia.get(registro['funcion'])
+        if previo is None:
+            continue
+        for metrica in metricas:
+            if metrica not in previo or metrica not in registro or previo[metrica] <= 0:
+                continue
+            cambio = registro[metrica] / previo[metrica] - 1
+            if cambio > tolerancia:
+                regresiones.append({'funcion': registro['funcion'], 'metrica': metrica,
+                                    'base': previo[metrica], 'actual': registro[metrica], 'cambio': cambio})
+    return regresiones
+
+
+def escalamiento_estadisticas(n_paises=200, n_años=25, filas_por_grupo=400, max_procesos=None, repeticiones=3, semilla=0,
+                              cuantiles=(0.25, 0.75)):
+    """
+    Entradas:
+        - n_paises, n_años, filas_por_grupo: Escala del dataset sintético.
+        - max_procesos: Se mide con 1, 2, ..., max_procesos procesos (por defecto os.cpu_count()).
+        - repeticiones: Repeticiones por medición (se reporta la mejor).
+        - cuantiles: Cuantiles que se calculan junto con la mediana.
+    Salida:
+        - Lista de diccionarios con 'procesos', 'segundos', 'aceleracion' (respecto a 1
+          proceso) e 'identico' (True si todas las estadísticas coinciden bit a bit con
+          la ruta de un solo proceso).
+    """
+    import numpy as np
+    from .datos_sinteticos import generar_datos_sinteticos
+
+    data = generar_datos_sinteticos(n_paises, n_años, filas_por_grupo, semilla=semilla, categorico=True)
+    categorias = [c for c in data.select_dtypes('number').columns if c not in ('Country', 'Year')]
+    max_procesos = max_procesos or os.cpu_count() or 1
+
+    resultados, base, t_base = [], None, None
+    for n in range(1, max_procesos + 1):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            estadisticas = calcular_estadisticas_grupo(data, categorias, 'Country', ('median',), cuantiles, n_procesos=n)
+            tiempos.append(time.perf_counter() - inicio)
+        if base is None:
+            base, t_base = estadisticas, min(tiempos)
+        identico = all(np.array_equal(base.valores[k], estadisticas.valores[k], equal_nan=True) for k in base.valores)
+        resultados.append({'procesos': n, 'segundos': min(tiempos), 'aceleracion': t_base / min(tiempos),
+                           'identico': identico})
+    return resultados
+
+
+def imprimir_resultados(resultados):
+    escala = resultados['metadatos']['escala']
+    print(f"Benchmarks: {escala['filas']:,} filas ({escala['n_paises']} países x {escala['n_años']} años x {escala['filas_por_grupo']} filas)")
+    for r in resultados['resultados']:
+        memoria = f"{r['pico_memoria_bytes'] / 2**20:8.1f} MiB" if 'pico_memoria_bytes' in r else ''
+        print(f"  {r['funcion']:<40} total = {r['total_s'] * 1000:9.1f} ms   agregación = {r['agregacion_s'] * 1000:9.1f} ms   "
+              f"render = {r['render_s'] * 1000:9.1f} ms   {memoria}")
+    print("-" * 55)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks de procesamiento y visualización con datos sintéticos.')
+    parser.add_argument('--paises', type=int, default=10, help='Número de países (por defecto 10).')
+    parser.add_argument('--años', type=int, default=25, help='Número de años (por defecto 25).')
+    parser.add_argument('--filas', type=int, default=40, help='Filas por (país, año) (por defecto 40).')
+    parser.add_argument('--repeticiones', type=int, default=3, help='Repeticiones por medición (por defecto 3).')
+    parser.add_argument('--funciones', nargs='*', help='Subconjunto de funciones a medir.')
+    parser.add_argument('--sin-memoria', action='store_true', help='No medir el pico de memoria.')
+    parser.add_argument('--salida', help='Ruta del JSON de resultados.')
+    parser.add_argument('--base', help='JSON de una ejecución anterior para detectar regresiones.')
+    parser.add_argument('--tolerancia', type=float, default=0.2, help='Aumento relativo permitido (por defecto 0.2).')
+    parser.add_argument('--escalamiento', type=int, metavar='N',
+                        help='Solo mide medianas y cuantiles por país con 1..N procesos.')
+    args = parser.parse_args(argv)
+
+    if args.escalamiento:
+        filas = args.paises * args.años * args.filas
+        print(f"Escalamiento de medianas y cuantiles por país: {filas:,} filas")
+        for r in escalamiento_estadisticas(args.paises, args.años, args.filas, args.escalamiento, args.repeticiones):
+            print(f"  {r['procesos']:>3} procesos  {r['segundos'] * 1000:9.1f} ms  aceleración {r['aceleracion']:4.2f}x  "
+                  f"{'idéntico' if r['identico'] else 'DIFERENTE'}")
+        return 0
+
+    resultados = ejecutar_benchmarks(args.paises, args.años, args.filas, args.repeticiones,
+                                     args.funciones, medir_memoria=not args.sin_memoria)
+    imprimir_resultados(resultados)
+
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+
+    if args.base:
+        regresiones = comparar_benchmarks(args.base, resultados, args.tolerancia)
+        for r in regresiones:
+            print(f"  REGRESIÓN {r['funcion']} {r['metrica']}: {r['base']:.4g} -> {r['actual']:.4g} (+{r['cambio']:.0%})")
+        return 1 if regresiones else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,343 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import inspect
+import functools
+
+import numpy as np
+import pandas as pd
+
+from . import salida_figuras
+
+# ==============================================================================
+# Caché de figuras direccionada por contenido
+# ==============================================================================
+
+RUTA_CACHE_FIGURAS = os.path.join('..', 'reporte', '.cache_figuras')
+
+# Caché activa (None = desactivada, las funciones crear_* se ejecutan siempre)
+CACHE_ACTIVA = None
+
+# Rutas guardadas durante la llamada en curso (una lista por nivel de anidamiento)
+_guardados = []
+
+
+class CacheFiguras:
+    """
+    Caché de archivos PNG indexada por el hash de las columnas usadas y de los argumentos.
+
+    Cada entrada se guarda como '<clave>.json' (manifiesto) más '<clave>_<i>.png', así
+    que varios procesos pueden compartir la misma carpeta sin un índice común.
+    Atributos contadores: aciertos, fallos y desalojos.
+    """
+
+    def __init__(self, ruta=RUTA_CACHE_FIGURAS, max_bytes=None, max_edad_s=None):
+        self.ruta = ruta
+        self.max_bytes = max_bytes
+        self.max_edad_s = max_edad_s
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+        os.makedirs(ruta, exist_ok=True)
+
+    def _manifiesto(self, clave):
+        return os.path.join(self.ruta, clave + '.json')
+
+    def obtener(self, clave):
+        """
+        Si la clave existe y no ha expirado, copia los archivos guardados a sus rutas de
+        destino y devuelve la lista de destinos; en caso contrario devuelve None.
+        """
+        try:
+            with open(self._manifiesto(clave), 'r', encoding='utf-8') as f:
+                entrada = json.load(f)
+        except (OSError, ValueError):
+            self.fallos += 1
+            return None
+
+        ahora = time.time()
+        expirada = self.max_edad_s is not None and ahora - entrada['creado'] > self.max_edad_s
+        archivos = [os.path.join(self.ruta, a['cache']) for a in entrada['archivos']]
+        if expirada or not all(os.path.exists(a) for a in archivos):
+            self._eliminar(clave, entrada)
+            self.fallos += 1
+            return None
+
+        destinos = []
+        for archivo, a in zip(archivos, entrada['archivos']):
+            os.makedirs(os.path.dirname(a['destino']) or '.', exist_ok=True)
+            shutil.copyfile(archivo, a['destino'])
+            destinos.append(a['destino'])
+
+        # El tiempo de acceso del manifiesto ordena el desalojo por uso (LRU)
+        os.utime(self._manifiesto(clave), (ahora, ahora))
+        self.aciertos += 1
+        return destinos
+
+    def guardar(self, clave, destinos):
+        """Copia a la caché los archivos generados para la clave y aplica el desalojo."""
+        archivos = []
+        for i, destino in enumerate(destinos):
+            nombre = f'{clave}_{i}{os.path.splitext(destino)[1]}'
+            shutil.copyfile(destino, os.path.join(self.ruta, nombre))
+            archivos.append({'destino': os.path.abspath(destino), 'cache': nombre})
+
+        entrada = {'creado': time.time(), 'archivos': archivos,
+                   'bytes': sum(os.path.getsize(os.path.join(self.ruta, a['cache'])) for a in archivos)}
+        tmp = self._manifiesto(clave) + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entrada, f, ensure_ascii=False)
+        os.replace(tmp, self._manifiesto(clave))
+        self.desalojar()
+
+    def _eliminar(self, clave, entrada=None):
+        if entrada is not None:
+            for a in entrada['archivos']:
+                try:
+                    os.remove(os.path.join(self.ruta, a['cache']))
+                except OSError:
+                    pass
+        try:
+            os.remove(self._manifiesto(clave))
+        except OSError:
+            pass
+
+    def _entradas(self):
+        entradas = []
+        for nombre in os.listdir(self.ruta):
+            if not nombre.endswith('.json'):
+                continue
+            ruta = os.path.join(self.ruta, nombre)
+            try:
+                with open(ruta, 'r', encoding='utf-8') as f:
+                    entrada = json.load(f)
+                entrada['ultimo_uso'] = os.path.getmtime(ruta)
+            except (OSError, ValueError):
+                continue
+            entradas.append((nombre[:-len('.json')], entrada))
+        return entradas
+
+    def desalojar(self):
+        """
+        Elimina las entradas más antiguas que max_edad_s y, si la caché supera
+        max_bytes, las menos usadas recientemente hasta volver al límite.
+        """
+        if self.max_bytes is None and self.max_edad_s is None:
+            return
+        ahora = time.time()
+        vigentes = []
+        for clave, entrada in self._entradas():
+            if self.max_edad_s is not None and ahora - entrada['creado'] > self.max_edad_s:
+                self._eliminar(clave, entrada)
+                self.desalojos += 1
+            else:
+                vigentes.append((clave, entrada))
+
+        if self.max_bytes is not None:
+            vigentes.sort(key=lambda e: e[1]['ultimo_uso'])
+            total = sum(e['bytes'] for _, e in vigentes)
+            for clave, entrada in vigentes:
+                if total <= self.max_bytes:
+                    break
+                self._eliminar(clave, entrada)
+                total -= entrada['bytes']
+                self.desalojos += 1
+
+    def estadisticas(self):
+        """Diccionario con los contadores, la tasa de aciertos y el tamaño de la caché."""
+        entradas = self._entradas()
+        consultas = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'desalojos': self.desalojos,
+            'tasa_aciertos': self.aciertos / consultas if consultas else 0.0,
+            'entradas': len(entradas),
+            'bytes': sum(e['bytes'] for _, e in entradas),
+        }
+
+
+def activar_cache(ruta=RUTA_CACHE_FIGURAS, max_bytes=None, max_edad_s=None):
+    """
+    Entradas:
+        - ruta: Carpeta de la caché (por defecto '../reporte/.cache_figuras').
+        - max_bytes: Tamaño máximo total de la caché (None = sin límite).
+        - max_edad_s: Edad máxima de una entrada en segundos (None = sin límite).
+    Salida:
+        - La CacheFiguras activa. Desde este momento las funciones crear_* reutilizan
+          el PNG guardado cuando los datos usados y los argumentos no cambian (en ese
+          caso no se agrega, no se dibuja y no se muestra nada).
+    """
+    global CACHE_ACTIVA
+    CACHE_ACTIVA = CacheFiguras(ruta, max_bytes, max_edad_s)
+    return CACHE_ACTIVA
+
+
+def desactivar_cache():
+    global CACHE_ACTIVA
+    CACHE_ACTIVA = None
+
+# ==============================================================================
+# Clave de caché y decorador para las funciones crear_*
+# ==============================================================================
+
+def _hash_datos(data, columnas):
+    h = hashlib.sha256()
+    if data is None:
+        return h.hexdigest()
+    columnas = [c for c in dict.fromkeys(columnas) if c in data.columns]
+    h.update(repr(columnas).encode())
+    h.update(str(len(data)).encode())
+    if columnas:
+        h.update(np.ascontiguousarray(pd.util.hash_pandas_object(data[columnas], index=False).to_numpy()).tobytes())
+    return h.hexdigest()
+
+
+def _actualizar_con_valor(h, valor):
+    """
+    Agrega un argumento al hash. Los dataframes, series, índices y arreglos entran por
+    contenido (su repr recorta las filas del medio); listas, tuplas y diccionarios se
+    recorren; el resto entra por su repr.
+    """
+    if isinstance(valor, (pd.DataFrame, pd.Series, pd.Index)):
+        h.update(f'{type(valor).__name__}{valor.shape}'.encode())
+        if isinstance(valor, pd.DataFrame):
+            h.update(repr((list(valor.columns), list(map(str, valor.dtypes)))).encode())
+        else:
+            h.update(repr((valor.name, str(valor.dtype))).encode())
+        h.update(np.ascontiguousarray(pd.util.hash_pandas_object(valor).to_numpy()).tobytes())
+    elif isinstance(valor, np.ndarray):
+        h.update(f'ndarray{valor.shape}{valor.dtype}'.encode())
+        h.update(np.ascontiguousarray(valor).tobytes())
+    elif isinstance(valor, (list, tuple)):
+        h.update(f'{type(valor).__name__}{len(valor)}'.encode())
+        for elemento in valor:
+            _actualizar_con_valor(h, elemento)
+    elif isinstance(valor, dict):
+        h.update(f'dict{len(valor)}'.encode())
+        for k in sorted(valor, key=repr):
+            h.update(repr(k).encode())
+            _actualizar_con_valor(h, valor[k])
+    else:
+        h.update(repr(valor).encode())
+    h.update(b'\x00')
+
+
+def _actualizar_con_codigo(h, codigo):
+    """Agrega el bytecode y las constantes (con las funciones anidadas) de un code object."""
+    h.update(codigo.co_code)
+    for constante in codigo.co_consts:
+        if inspect.iscode(constante):
+            _actualizar_con_codigo(h, constante)
+        else:
+            h.update(repr(constante).encode())
+        h.update(b'\x00')
+
+
+@functools.lru_cache(maxsize=8)
+def _hash_archivos(firmas):
+    h = hashlib.sha256()
+    for ruta, _, _ in firmas:
+        h.update(os.path.basename(ruta).encode())
+        with open(ruta, 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def version_codigo(funcion):
+    """
+    Hash del código fuente de todos los módulos del paquete de la función (o solo de su
+    módulo si no pertenece a un paquete). Así cambiar un auxiliar (ej: _datos_* o un
+    formateador) invalida las figuras aunque el código de la función crear_* sea el mismo.
+    Se recalcula solo si cambia la fecha o el tamaño de algún archivo.
+    """
+    modulo = sys.modules.get(funcion.__module__)
+    archivo = getattr(modulo, '__file__', None)
+    if not archivo:
+        return ''
+    if getattr(modulo, '__package__', None):
+        carpeta = os.path.dirname(os.path.abspath(archivo))
+        archivos = sorted(os.path.join(carpeta, n) for n in os.listdir(carpeta) if n.endswith('.py'))
+    else:
+        archivos = [os.path.abspath(archivo)]
+    firmas = []
+    for ruta in archivos:
+        estado = os.stat(ruta)
+        firmas.append((ruta, estado.st_mtime_ns, estado.st_size))
+    return _hash_archivos(tuple(firmas))
+
+
+def clave_figura(funcion, data, columnas, argumentos, contexto=''):
+    """
+    Entradas:
+        - funcion: Función que genera la figura (su bytecode, sus constantes, como
+          textos y números literales, y version_codigo de su paquete forman parte de la clave).
+        - data: Dataframe de entrada.
+        - columnas: Columnas de data que la figura realmente usa.
+        - argumentos: Diccionario con el resto de argumentos de la llamada (los
+          dataframes y arreglos entran por contenido).
+        - contexto: Texto adicional (ej: la carpeta de salida).
+    Salida:
+        - Clave SHA-256 en hexadecimal.
+    """
+    h = hashlib.sha256()
+    h.update(funcion.__qualname__.encode())
+    _actualizar_con_codigo(h, funcion.__code__)
+    h.update(version_codigo(funcion).encode())
+    _actualizar_con_valor(h, dict(argumentos))
+    h.update(contexto.encode())
+    h.update(_hash_datos(data, columnas).encode())
+    return h.hexdigest()
+
+
+def registrar_guardado(ruta):
+    """Anota una ruta escrita por la función crear_* en curso (la usa el decorador)."""
+    if _guardados:
+        _guardados[-1].append(ruta)
+
+
+def con_cache(*parametros_columna, contexto=lambda: ''):
+    """
+    Decorador para las funciones crear_*.
+
+    Entradas:
+        - parametros_columna: Nombres de los parámetros cuyos valores son columnas (o
+          listas de columnas) de data; solo esas columnas entran en el hash.
+        - contexto: Función sin argumentos con información extra para la clave.
+    """
+    def decorador(funcion):
+        firma = inspect.signature(funcion)
+
+        @functools.wraps(funcion)
+        def envoltura(data, *args, **kwargs):
+            cache = CACHE_ACTIVA
+            if cache is None:
+                return funcion(data, *args, **kwargs)
+
+            argumentos = firma.bind(data, *args, **kwargs).arguments
+            argumentos = {k: v for k, v in argumentos.items() if k != 'data'}
+            columnas = []
+            for p in parametros_columna:
+                valor = argumentos.get(p)
+                columnas.extend(valor if isinstance(valor, (list, tuple)) else [valor])
+            clave = clave_figura(funcion, data, columnas, argumentos, contexto())
+
+            if cache.obtener(clave) is not None:
+                return None
+
+            _guardados.append([])
+            try:
+                resultado = funcion(data, *args, **kwargs)
+                destinos = _guardados[-1]
+            finally:
+                _guardados.pop()
+            if destinos:
+                # Con el guardado en segundo plano los archivos deben estar escritos antes de copiarlos
+                salida_figuras.esperar_escrituras(destinos)
+                cache.guardar(clave, destinos)
+            return resultado
+        return envoltura
+    return decorador
@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import hashlib
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Rutas y esquema de tipos del dataset
+# ==============================================================================
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_CSV_ORIGINAL = os.path.join(RAIZ_PROYECTO, 'data', 'dataset_original', 'global_energy_consumption.csv')
+RUTA_DATASET_LIMPIO = os.path.join(RAIZ_PROYECTO, 'data', 'dataset_limpio')
+
+COLUMNA_PAIS = 'Country'
+COLUMNA_AÑO = 'Year'
+
+metricas = [
+    'Total Energy Consumption (TWh)',
+    'Per Capita Energy Use (kWh)',
+    'Renewable Energy Share (%)',
+    'Fossil Fuel Dependency (%)',
+    'Industrial Energy Use (%)',
+    'Household Energy Use (%)',
+    'Carbon Emissions (Million Tons)',
+    'Energy Price Index (USD/kWh)'
+]
+
+# País como categoría, año en 16 bits y métricas en float32 (la mitad de memoria
+# que los float64 que pandas asigna por defecto)
+ESQUEMA = {COLUMNA_PAIS: 'category', COLUMNA_AÑO: 'int16'}
+ESQUEMA.update({metrica: 'float32' for metrica in metricas})
+
+VERSION_SNAPSHOT = 1
+
+# ==============================================================================
+# Checksum del archivo fuente
+# ==============================================================================
+
+def checksum_archivo(ruta, tam_bloque=1 << 20):
+    """
+    Entradas:
+        - ruta: Ruta del archivo a resumir.
+        - tam_bloque: Tamaño (bytes) de cada lectura; el archivo no se carga completo en memoria.
+    Salida:
+        - El hash SHA-256 del contenido del archivo en hexadecimal.
+    """
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+# ==============================================================================
+# Lectura tipada del CSV y snapshot columnar
+# ==============================================================================
+
+def leer_csv_tipado(ruta_csv, esquema=None, **kwargs):
+    """
+    Entradas:
+        - ruta_csv: Ruta del CSV con el formato de global_energy_consumption.csv.
+        - esquema: Diccionario columna -> dtype (por defecto ESQUEMA).
+        - kwargs: Argumentos adicionales para pd.read_csv (ej: chunksize).
+    Salida:
+        - Un dataframe con los tipos del esquema aplicados durante el parseo
+          (o un iterador de dataframes si se pasa chunksize).
+    """
+    esquema = ESQUEMA if esquema is None else esquema
+    return pd.read_csv(ruta_csv, dtype=esquema, **kwargs)
+
+
+def nombre_derivado(ruta_csv):
+    """
+    Nombre base de los archivos derivados de un CSV (snapshot, estado incremental):
+    el nombre del archivo más un hash corto de su ruta absoluta, para que dos CSV
+    con el mismo nombre en carpetas distintas no compartan archivos en dir_snapshot.
+    """
+    nombre = os.path.splitext(os.path.basename(ruta_csv))[0]
+    huella = hashlib.sha256(os.path.realpath(ruta_csv).encode('utf-8')).hexdigest()[:10]
+    return f'{nombre}-{huella}'
+
+
+def _rutas_snapshot(ruta_csv, dir_snapshot):
+    base = os.path.join(dir_snapshot, nombre_derivado(ruta_csv))
+    return base + '.npz', base + '.json'
+
+
+def guardar_snapshot(data, ruta_npz, ruta_meta, metadatos):
+    """
+    Entradas:
+        - data: Dataframe tipado que se va a persistir.
+        - ruta_npz: Ruta del archivo .npz con una entrada por columna.
+        - ruta_meta: Ruta del JSON con el checksum de la fuente y el orden de columnas.
+        - metadatos: Diccionario con la información de la fuente (checksum, tamaño, mtime).
+    Salida:
+        - Escribe el snapshot columnar. Las columnas categóricas se guardan como
+          códigos enteros más su lista de categorías. La escritura es atómica
+          (archivo temporal + os.replace) para que un proceso concurrente nunca
+          lea un snapshot a medias.
+    """
+    os.makedirs(os.path.dirname(ruta_npz), exist_ok=True)
+
+    arreglos = {}
+    columnas = []
+    for i, col in enumerate(data.columns):
+        clave = f'c{i}'
+        serie = data[col]
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            arreglos[clave] = serie.cat.codes.to_numpy()
+            arreglos[clave + '_categorias'] = serie.cat.categories.to_numpy(dtype=str)
+            columnas.append({'nombre': col, 'clave': clave, 'categorica': True})
+        else:
+            arreglos[clave] = serie.to_numpy()
+            columnas.append({'nombre': col, 'clave': clave, 'categorica': False})
+
+    tmp_npz = ruta_npz + '.tmp'
+    with open(tmp_npz, 'wb') as f:
+        np.savez(f, **arreglos)
+
+    meta = dict(metadatos, version=VERSION_SNAPSHOT, filas=len(data), columnas=columnas)
+    tmp_meta = _escribir_tmp_meta(ruta_meta, meta)
+
+    os.replace(tmp_npz, ruta_npz)
+    os.replace(tmp_meta, ruta_meta)
+
+
+def _escribir_tmp_meta(ruta_meta, meta):
+    tmp_meta = ruta_meta + '.tmp'
+    with open(tmp_meta, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return tmp_meta
+
+
+def leer_snapshot(ruta_npz, meta):
+    """
+    Entradas:
+        - ruta_npz: Ruta del archivo .npz generado por guardar_snapshot.
+        - meta: Metadatos leídos del JSON asociado.
+    Salida:
+        - El dataframe reconstruido con los mismos tipos con los que se guardó.
+    """
+    columnas = {}
+    with np.load(ruta_npz, allow_pickle=False) as npz:
+        for col in meta['columnas']:
+            if col['categorica']:
+                columnas[col['nombre']] = pd.Categorical.from_codes(
+                    npz[col['clave']], categories=npz[col['clave'] + '_categorias'])
+            else:
+                columnas[col['nombre']] = npz[col['clave']]
+    return pd.DataFrame(columnas)
+
+
+def _leer_meta(ruta_meta):
+    try:
+        with open(ruta_meta, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def cargar_datos(ruta_csv=RUTA_CSV_ORIGINAL, dir_snapshot=RUTA_DATASET_LIMPIO, usar_snapshot=True, verificar_checksum=False):
+    """
+    Entradas:
+        - ruta_csv: Ruta del CSV fuente (por defecto data/dataset_original/global_energy_consumption.csv).
+        - dir_snapshot: Carpeta donde se guarda el snapshot columnar (por defecto data/dataset_limpio/).
+        - usar_snapshot: Si es False siempre se parsea el CSV y no se escribe snapshot.
+        - verificar_checksum: Si es True se recalcula el SHA-256 del CSV aunque su
+          tamaño y fecha de modificación coincidan con los del snapshot.
+    Salida:
+        - Un dataframe con el esquema ESQUEMA (Country categórica, Year int16 y
+          métricas float32).
+        - Si el CSV no ha cambiado desde la última carga se reutiliza el snapshot;
+          en caso contrario se parsea el CSV y se reescribe el snapshot.
+    """
+    if not usar_snapshot:
+        return leer_csv_tipado(ruta_csv)
+
+    ruta_npz, ruta_meta = _rutas_snapshot(ruta_csv, dir_snapshot)
+    estado = os.stat(ruta_csv)
+    meta = _leer_meta(ruta_meta)
+
+    checksum = None
+    if meta is not None and meta.get('version') == VERSION_SNAPSHOT and os.path.exists(ruta_npz):
+        mismo_archivo = meta.get('tamano') == estado.st_size and meta.get('mtime_ns') == estado.st_mtime_ns
+        cambio_estado = not mismo_archivo
+        if cambio_estado or verificar_checksum:
+            # El tamaño o la fecha cambiaron: solo el contenido decide si el snapshot sigue siendo válido
+            checksum = checksum_archivo(ruta_csv)
+            mismo_archivo = checksum == meta.get('sha256')
+        if mismo_archivo:
+            try:
+                data = leer_snapshot(ruta_npz, meta)
+            except (OSError, ValueError, KeyError):
+                data = None  # Snapshot corrupto: se regenera a continuación
+            if data is not None:
+                if cambio_estado:
+                    # Mismo contenido con otra fecha (ej: touch o copia): se actualizan el
+                    # tamaño y la fecha para que las próximas cargas no vuelvan a calcular el hash
+                    meta.update(tamano=estado.st_size, mtime_ns=estado.st_mtime_ns)
+                    os.replace(_escribir_tmp_meta(ruta_meta, meta), ruta_meta)
+                return data
+
+    data = leer_csv_tipado(ruta_csv)
+    if checksum is None:
+        checksum = checksum_archivo(ruta_csv)
+    guardar_snapshot(data, ruta_npz, ruta_meta, {
+        'fuente': os.path.abspath(ruta_csv),
+        'sha256': checksum,
+        'tamano': estado.st_size,
+        'mtime_ns': estado.st_mtime_ns,
+    })
+    return data
+
+# ==============================================================================
+# Benchmark de carga en frío y en caliente
+# ==============================================================================
+
+def _medir(funcion):
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    resultado = funcion()
+    duracion = time.perf_counter() - inicio
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracion, pico
+
+
+def benchmark_carga(ruta_csv=RUTA_CSV_ORIGINAL, dir_snapshot=RUTA_DATASET_LIMPIO, repeticiones=3):
+    """
+    Entradas:
+        - ruta_csv: CSV que se va a cargar.
+        - dir_snapshot: Carpeta del snapshot (se borra el snapshot para la medición en frío).
+        - repeticiones: Número de repeticiones; se reporta el mejor tiempo de cada modo.
+    Salida:
+        - Un diccionario con tiempo (s), pico de memoria (bytes, medido con tracemalloc)
+          y memoria del dataframe resultante para tres modos:
+          'pandas_defecto' (read_csv sin esquema), 'frio' (parseo tipado + escritura
+          del snapshot) y 'caliente' (lectura del snapshot).
+        - El reporte también se imprime en pantalla.
+    """
+    ruta_npz, ruta_meta = _rutas_snapshot(ruta_csv, dir_snapshot)
+
+    def _frio():
+        for ruta in (ruta_npz, ruta_meta):
+            if os.path.exists(ruta):
+                os.remove(ruta)
+        return cargar_datos(ruta_csv, dir_snapshot)
+
+    modos = {
+        'pandas_defecto': lambda: pd.read_csv(ruta_csv),
+        'frio': _frio,
+        'caliente': lambda: cargar_datos(ruta_csv, dir_snapshot),
+    }
+
+    resultados = {}
+    for modo, funcion in modos.items():
+        mejor = None
+        for _ in range(repeticiones):
+            data, duracion, pico = _medir(funcion)
+            if mejor is None or duracion < mejor['tiempo_s']:
+                mejor = {
+                    'tiempo_s': duracion,
+                    'pico_memoria_bytes': pico,
+                    'memoria_dataframe_bytes': int(data.memory_usage(deep=True).sum()),
+                }
+        resultados[modo] = mejor
+
+    print(f"Benchmark de carga: {ruta_csv}")
+    for modo, r in resultados.items():
+        print(f"  {modo:<15} tiempo = {r['tiempo_s'] * 1000:9.1f} ms   "
+              f"pico memoria = {r['pico_memoria_bytes'] / 2**20:8.1f} MiB   "
+              f"dataframe = {r['memoria_dataframe_bytes'] / 2**20:8.1f} MiB")
+    print("-" * 55)
+    return resultados
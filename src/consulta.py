@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Consultas por país y rango de años sobre un índice ordenado con offsets
+# ==============================================================================
+
+class IndiceConsulta:
+    """
+    Dataframe ordenado por (col_grupo, col_tiempo) con el desplazamiento de inicio de
+    cada grupo, para que las filas de un país (o de un país en un rango de años) sean
+    un bloque contiguo que se obtiene con un corte, sin recorrer todas las filas con
+    una máscara booleana.
+
+    Si data ya está ordenada (ej: el resultado de un groupby por ambas columnas) no se
+    vuelve a ordenar: la comprobación y el cálculo de los desplazamientos son O(filas).
+    En caso contrario se hace un único ordenamiento estable.
+
+    Atributos:
+        - data: El dataframe ordenado (índice 0..n-1).
+        - grupos: Índice de pandas con los grupos en orden ascendente.
+        - inicios: Arreglo de len(grupos) + 1 posiciones; el grupo i ocupa las filas
+          inicios[i]:inicios[i + 1] (con data vacía, inicios = [0] y grupos vacío).
+    """
+
+    def __init__(self, data, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO):
+        self.col_grupo = col_grupo
+        self.col_tiempo = col_tiempo
+
+        codigos, _ = pd.factorize(data[col_grupo], sort=True, use_na_sentinel=False)
+        tiempos = data[col_tiempo].to_numpy()
+        mismo_grupo = codigos[1:] == codigos[:-1]
+        ordenado = bool(np.all(codigos[1:] >= codigos[:-1]) and np.all(tiempos[1:][mismo_grupo] >= tiempos[:-1][mismo_grupo]))
+        if not ordenado:
+            data = data.sort_values([col_grupo, col_tiempo], kind='stable')
+            codigos, _ = pd.factorize(data[col_grupo], sort=True, use_na_sentinel=False)
+            tiempos = data[col_tiempo].to_numpy()
+
+        self.data = data.reset_index(drop=True)
+        cambios = np.flatnonzero(codigos[1:] != codigos[:-1]) + 1
+        self.inicios = np.concatenate([[0], cambios, [len(codigos)]]) if len(codigos) else np.zeros(1, dtype=np.int64)
+        self.grupos = pd.Index(self.data[col_grupo].to_numpy()[self.inicios[:-1]], name=col_grupo)
+        self._posicion = {g: i for i, g in enumerate(self.grupos)}
+
+        # Clave global (grupo, rango del tiempo) no decreciente: los límites de todos los
+        # grupos para un rango de tiempos salen de un solo searchsorted
+        self._valores_tiempo, rangos = np.unique(tiempos, return_inverse=True)
+        n_valores = max(len(self._valores_tiempo), 1)
+        self._clave = np.repeat(np.arange(len(self.grupos), dtype=np.int64) * n_valores, np.diff(self.inicios)) + rangos
+
+    def _limites_grupos(self, posiciones, desde=None, hasta=None):
+        """Arreglos (inicios, fines) de los grupos en 'posiciones' con col_tiempo entre desde y hasta."""
+        posiciones = np.asarray(posiciones, dtype=np.int64)
+        n_valores = max(len(self._valores_tiempo), 1)
+        base = posiciones * n_valores
+        inicio = (self.inicios[posiciones] if desde is None else
+                  np.searchsorted(self._clave, base + np.searchsorted(self._valores_tiempo, desde, side='left')))
+        fin = (self.inicios[posiciones + 1] if hasta is None else
+               np.searchsorted(self._clave, base + np.searchsorted(self._valores_tiempo, hasta, side='right')))
+        return inicio, np.maximum(inicio, fin)
+
+    def __len__(self):
+        return len(self.data)
+
+    def limites(self, grupo, desde=None, hasta=None):
+        """
+        (inicio, fin) de las filas del grupo con col_tiempo entre desde y hasta (ambos
+        incluidos; None = sin límite). Búsqueda binaria dentro del bloque del grupo.
+        """
+        i = self._posicion.get(grupo)
+        if i is None:
+            return 0, 0
+        inicio, fin = self._limites_grupos([i], desde, hasta)
+        return int(inicio[0]), int(fin[0])
+
+    def grupo(self, grupo, desde=None, hasta=None):
+        """Filas de un grupo (opcionalmente en un rango de col_tiempo), como corte del dataframe."""
+        inicio, fin = self.limites(grupo, desde, hasta)
+        return self.data.iloc[inicio:fin]
+
+    def tiempo(self, desde, hasta=None):
+        """
+        Filas de todos los grupos con col_tiempo entre desde y hasta (hasta=None = solo
+        desde), en el orden del índice. Los límites de todos los grupos salen de un solo
+        searchsorted vectorizado: O(grupos * log filas) sin bucle en Python.
+        """
+        hasta = desde if hasta is None else hasta
+        inicio, fin = self._limites_grupos(np.arange(len(self.grupos)), desde, hasta)
+        largos = fin - inicio
+        # Posiciones de todos los cortes concatenadas: arange global desplazado por corte
+        desplazamiento = np.repeat(inicio - (np.cumsum(largos) - largos), largos)
+        return self.data.take(desplazamiento + np.arange(largos.sum()))
+
+    def iterar(self):
+        """Genera (grupo, filas del grupo) en orden ascendente de grupo."""
+        for i, g in enumerate(self.grupos):
+            yield g, self.data.iloc[self.inicios[i]:self.inicios[i + 1]]
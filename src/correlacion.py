@@ -0,0 +1,201 @@
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO, metricas
+from .agregacion_streaming import filas_por_bloque
+
+# ==============================================================================
+# Matrices de correlación con acumuladores de co-momentos fusionables
+# ==============================================================================
+
+class CoMomentos:
+    """
+    Conteo, medias y co-momentos centrados (suma de (x - media_x) * (y - media_y)) de
+    varias columnas, por cada valor de una columna clave (ej: 'Year') o globales.
+
+    Dos acumuladores se fusionan de forma exacta con la fórmula de Chan et al., así que
+    los datos se pueden procesar por bloques (leyendo un CSV por partes) o en paralelo
+    y combinar al final. Las filas con algún valor nulo en las columnas se descartan
+    (correlación con filas completas; con datos sin nulos coincide con DataFrame.corr()).
+
+    Atributos:
+        - columnas: Lista de columnas numéricas.
+        - clave: Columna de agrupación (None = un solo grupo global).
+        - claves: Lista de valores de la clave vistos hasta ahora.
+        - n: Arreglo (claves,) con las filas acumuladas por clave.
+        - media: Arreglo (claves, columnas).
+        - comomentos: Arreglo (claves, columnas, columnas).
+    """
+
+    def __init__(self, columnas=metricas, clave=None):
+        self.columnas = list(columnas)
+        self.clave = clave
+        self.claves = []
+        self._indice = {}
+        m = len(self.columnas)
+        self.n = np.zeros(0)
+        self.media = np.zeros((0, m))
+        self.comomentos = np.zeros((0, m, m))
+
+    def _indices(self, claves):
+        """Posición de cada clave en los arreglos; las claves nuevas se agregan vacías."""
+        nuevas = [c for c in claves if c not in self._indice]
+        if nuevas:
+            for c in nuevas:
+                self._indice[c] = len(self.claves)
+                self.claves.append(c)
+            m = len(self.columnas)
+            self.n = np.concatenate([self.n, np.zeros(len(nuevas))])
+            self.media = np.concatenate([self.media, np.zeros((len(nuevas), m))])
+            self.comomentos = np.concatenate([self.comomentos, np.zeros((len(nuevas), m, m))])
+        return np.array([self._indice[c] for c in claves], dtype=np.intp)
+
+    def _combinar(self, indices, n, media, comomentos):
+        """Fórmula de Chan para fusionar (n, media, comomentos) en las posiciones indicadas (n > 0)."""
+        na = self.n[indices]
+        total = na + n
+        delta = media - self.media[indices]
+        self.media[indices] += delta * (n / total)[:, None]
+        self.comomentos[indices] += comomentos + (na * n / total)[:, None, None] * delta[:, :, None] * delta[:, None, :]
+        self.n[indices] = total
+
+    def actualizar(self, bloque):
+        """Incorpora las filas de un bloque (dataframe con las columnas y la clave)."""
+        X = bloque[self.columnas].to_numpy(dtype=np.float64)
+        if self.clave is None:
+            codigos, valores_clave = np.zeros(len(bloque), dtype=np.intp), [None]
+        else:
+            codigos, valores_clave = pd.factorize(bloque[self.clave])
+            valores_clave = list(valores_clave)
+        validas = (codigos >= 0) & ~np.isnan(X).any(axis=1)
+        X, codigos = X[validas], codigos[validas]
+        k, m = len(valores_clave), len(self.columnas)
+
+        n = np.bincount(codigos, minlength=k).astype(np.float64)
+        con_datos = n > 0
+        media = np.stack([np.bincount(codigos, X[:, j], minlength=k) for j in range(m)], axis=1)
+        media /= np.where(con_datos, n, 1)[:, None]
+        D = X - media[codigos]
+        comomentos = np.empty((k, m, m))
+        for i in range(m):
+            for j in range(i, m):
+                comomentos[:, i, j] = comomentos[:, j, i] = np.bincount(codigos, D[:, i] * D[:, j], minlength=k)
+
+        indices = self._indices([c for c, ok in zip(valores_clave, con_datos) if ok])
+        self._combinar(indices, n[con_datos], media[con_datos], comomentos[con_datos])
+        return self
+
+    def fusionar(self, otro):
+        """Suma a este acumulador los datos de otro con las mismas columnas y clave."""
+        if otro.columnas != self.columnas or otro.clave != self.clave:
+            raise ValueError("Solo se pueden fusionar acumuladores con las mismas columnas y clave")
+        con_datos = otro.n > 0
+        if con_datos.any():
+            claves = [c for c, ok in zip(otro.claves, con_datos) if ok]
+            self._combinar(self._indices(claves), otro.n[con_datos], otro.media[con_datos], otro.comomentos[con_datos])
+        return self
+
+    def _total(self, indices):
+        """(n, media, comomentos) de la unión de las claves indicadas (fórmula de Chan)."""
+        m = len(self.columnas)
+        n, media, comomentos = 0.0, np.zeros(m), np.zeros((m, m))
+        for i in indices:
+            total = n + self.n[i]
+            if total == 0:
+                continue
+            delta = self.media[i] - media
+            media = media + delta * self.n[i] / total
+            comomentos = comomentos + self.comomentos[i] + np.outer(delta, delta) * n * self.n[i] / total
+            n = total
+        return n, media, comomentos
+
+    def _a_correlacion(self, comomentos):
+        desviacion = np.sqrt(np.diagonal(comomentos, axis1=-2, axis2=-1))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = comomentos / (desviacion[..., :, None] * desviacion[..., None, :])
+        return np.clip(corr, -1.0, 1.0)
+
+    def _tabla(self, corr):
+        return pd.DataFrame(corr, index=self.columnas, columns=self.columnas)
+
+    def matriz(self, valor_clave=None):
+        """
+        Matriz de correlación (dataframe columnas x columnas) de un valor de la clave o,
+        sin valor_clave, de todas las filas acumuladas (fusionando todas las claves).
+        """
+        if valor_clave is None and (self.clave is not None or not self.claves):
+            _, _, comomentos = self._total(range(len(self.claves)))
+        else:
+            comomentos = self.comomentos[self._indice[valor_clave]]
+        return self._tabla(self._a_correlacion(comomentos))
+
+    def matrices(self):
+        """Diccionario valor de la clave -> matriz de correlación, en orden ascendente de la clave."""
+        corr = self._a_correlacion(self.comomentos)
+        return {c: self._tabla(corr[self._indice[c]]) for c in sorted(self.claves)}
+
+    def matrices_moviles(self, ventana):
+        """
+        Matrices de correlación de ventanas móviles de 'ventana' valores consecutivos de
+        la clave (ej: 5 años), indexadas por el último valor de cada ventana. Cada ventana
+        se obtiene fusionando los acumuladores de sus claves, sin volver a leer los datos.
+        """
+        orden = sorted(self.claves)
+        posiciones = [self._indice[c] for c in orden]
+        resultado = {}
+        for fin in range(ventana - 1, len(orden)):
+            _, _, comomentos = self._total(posiciones[fin - ventana + 1:fin + 1])
+            resultado[orden[fin]] = self._tabla(self._a_correlacion(comomentos))
+        return resultado
+
+    def serie(self, col_a, col_b):
+        """Serie (indexada por la clave) con la correlación entre dos columnas."""
+        i, j = self.columnas.index(col_a), self.columnas.index(col_b)
+        corr = self._a_correlacion(self.comomentos)[:, i, j]
+        return pd.Series(corr, index=pd.Index(self.claves, name=self.clave), name=f'{col_a} ~ {col_b}').sort_index()
+
+
+def _comomentos_parte(parte, columnas, clave):
+    return CoMomentos(columnas, clave).actualizar(parte)
+
+
+def calcular_comomentos(data, columnas=metricas, clave=None, n_procesos=1):
+    """
+    Entradas:
+        - data: Dataframe con las columnas y la clave.
+        - columnas: Columnas numéricas a correlacionar.
+        - clave: Columna por cuyos valores se separan las matrices (ej: 'Year', 'Country').
+        - n_procesos: Procesos entre los que se reparten las filas (1 = en este proceso).
+    Salida:
+        - Un CoMomentos con todos los datos (las partes se fusionan al final).
+    """
+    if n_procesos <= 1:
+        return CoMomentos(columnas, clave).actualizar(data)
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    limites = np.linspace(0, len(data), n_procesos + 1).astype(int)
+    partes = [data.iloc[a:b] for a, b in zip(limites[:-1], limites[1:])]
+    resultado = CoMomentos(columnas, clave)
+    with ProcessPoolExecutor(max_workers=n_procesos) as pool:
+        for parcial in pool.map(_comomentos_parte, partes, [columnas] * len(partes), [clave] * len(partes)):
+            resultado.fusionar(parcial)
+    return resultado
+
+
+def comomentos_csv(ruta_csv, columnas=metricas, clave=COLUMNA_AÑO, memoria_max_mb=256):
+    """
+    Entradas:
+        - ruta_csv: CSV con el formato de global_energy_consumption.csv (puede ser mayor que la RAM).
+        - columnas, clave: Como en calcular_comomentos.
+        - memoria_max_mb: Presupuesto de memoria (MiB) para el bloque en vuelo.
+    Salida:
+        - Un CoMomentos con todo el archivo, leído una sola vez por bloques. Con clave='Year'
+          da las matrices de todos los años en una pasada.
+    """
+    acumulador = CoMomentos(columnas, clave)
+    tipos = {COLUMNA_PAIS: 'category', COLUMNA_AÑO: 'int16'}
+    usar = list(dict.fromkeys(list(columnas) + ([clave] if clave else [])))
+    for bloque in pd.read_csv(ruta_csv, dtype=tipos, usecols=usar, chunksize=filas_por_bloque(ruta_csv, memoria_max_mb)):
+        acumulador.actualizar(bloque)
+    return acumulador
@@ -0,0 +1,156 @@
+import time
+import hashlib
+
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Cubo de agregados (Country x Year) compartido por las visualizaciones
+# ==============================================================================
+
+ESTADISTICAS_CUBO = ['count', 'sum', 'mean', 'median']
+
+
+class CuboAgregado:
+    """
+    Agregados de todas las métricas por (col_grupo, col_tiempo), calculados una sola vez.
+
+    'tabla' tiene índice (col_grupo, col_tiempo) ordenado y columnas (métrica, estadística)
+    con el conteo de no nulos, la suma, la media y la mediana. A partir de la suma y el
+    conteo se obtienen de forma exacta las medias y sumas de niveles más gruesos
+    (ej: por país), que es lo que necesitan las funciones crear_* de visualizaciones.
+    """
+
+    def __init__(self, tabla, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO):
+        self.tabla = tabla
+        self.col_grupo = col_grupo
+        self.col_tiempo = col_tiempo
+        self.metricas = list(dict.fromkeys(tabla.columns.get_level_values(0)))
+        self.huella = hashlib.sha256(
+            pd.util.hash_pandas_object(tabla, index=True).to_numpy().tobytes()
+            + repr((col_grupo, col_tiempo, list(map(str, tabla.columns)))).encode()
+        ).hexdigest()[:16]
+
+    def __repr__(self):
+        # La huella identifica el contenido (la usa la caché de figuras como argumento)
+        return f"CuboAgregado(huella='{self.huella}', grupos={self.tabla.index.levshape[0]}, metricas={len(self.metricas)})"
+
+    @classmethod
+    def construir(cls, data, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO, metricas=None):
+        """
+        Entradas:
+            - data: Dataframe con los datos originales.
+            - col_grupo: Columna de grupo (ej: 'Country').
+            - col_tiempo: Columna de tiempo (ej: 'Year').
+            - metricas: Columnas numéricas a incluir (por defecto todas las numéricas restantes).
+        Salida:
+            - Un CuboAgregado construido con un único groupby.
+        """
+        if metricas is None:
+            metricas = [c for c in data.select_dtypes('number').columns if c not in (col_grupo, col_tiempo)]
+        tabla = data.groupby([col_grupo, col_tiempo], observed=True)[list(metricas)].agg(ESTADISTICAS_CUBO)
+        return cls(tabla.sort_index(), col_grupo, col_tiempo)
+
+    def cubre(self, por, metricas):
+        """True si el cubo puede responder una agregación por 'por' sobre 'metricas'."""
+        por = [por] if isinstance(por, str) else list(por)
+        claves = {self.col_grupo, self.col_tiempo}
+        return bool(por) and set(por) <= claves and len(set(por)) == len(por) and set(metricas) <= set(self.metricas)
+
+    def _estadistica(self, estadistica, metricas):
+        bloque = self.tabla.loc[:, (list(metricas), estadistica)]
+        bloque.columns = bloque.columns.get_level_values(0)
+        return bloque
+
+    def _por(self, por):
+        por = [por] if isinstance(por, str) else list(por)
+        return por, [0 if c == self.col_grupo else 1 for c in por]
+
+    def suma(self, por, metricas):
+        """Equivalente a data.groupby(por, observed=True)[metricas].sum()."""
+        por, niveles = self._por(por)
+        resultado = self._estadistica('sum', metricas).groupby(level=niveles, observed=True).sum()
+        resultado.index.names = por
+        return resultado
+
+    def media(self, por, metricas):
+        """Equivalente (exacto) a data.groupby(por, observed=True)[metricas].mean()."""
+        por, niveles = self._por(por)
+        if niveles == [0, 1]:
+            return self._estadistica('mean', metricas)
+        suma = self._estadistica('sum', metricas).groupby(level=niveles, observed=True).sum()
+        conteo = self._estadistica('count', metricas).groupby(level=niveles, observed=True).sum()
+        resultado = suma / conteo.where(conteo > 0)
+        resultado.index.names = por
+        return resultado
+
+    def mediana(self, metricas):
+        """Mediana por (col_grupo, col_tiempo); las medianas no se pueden combinar entre niveles."""
+        return self._estadistica('median', metricas)
+
+    def guardar(self, ruta):
+        """Persiste el cubo en disco (formato pickle de pandas)."""
+        pd.to_pickle({'tabla': self.tabla, 'col_grupo': self.col_grupo, 'col_tiempo': self.col_tiempo}, ruta)
+
+    @classmethod
+    def cargar(cls, ruta):
+        """Lee un cubo guardado con guardar()."""
+        contenido = pd.read_pickle(ruta)
+        return cls(contenido['tabla'], contenido['col_grupo'], contenido['col_tiempo'])
+
+# ==============================================================================
+# Benchmark del tiempo de preparación de datos por figura
+# ==============================================================================
+
+def benchmark_preparacion(n_paises=200, n_años=25, filas_por_grupo=200, repeticiones=3, semilla=0):
+    """
+    Entradas:
+        - n_paises, n_años, filas_por_grupo: Tamaño del dataset sintético.
+        - repeticiones: Repeticiones por medición (se reporta el mejor tiempo).
+        - semilla: Semilla del generador de datos.
+    Salida:
+        - Un diccionario con el tiempo de construir el cubo y, por cada función crear_*,
+          el tiempo de preparación de datos directo sobre el dataframe y usando el cubo.
+        - El reporte también se imprime en pantalla.
+    """
+    from . import visualizaciones as vis
+    from .datos_sinteticos import generar_datos_sinteticos
+
+    data = generar_datos_sinteticos(n_paises, n_años, filas_por_grupo, semilla=semilla)
+    x, y = 'Total Energy Consumption (TWh)', 'Carbon Emissions (Million Tons)'
+    a, b = 'Industrial Energy Use (%)', 'Household Energy Use (%)'
+    cols = ['Renewable Energy Share (%)', 'Fossil Fuel Dependency (%)', x, y]
+
+    preparaciones = {
+        'crear_graf_lineas': lambda c: vis._datos_graf_lineas(data, COLUMNA_PAIS, COLUMNA_AÑO, cols[0], cubo=c),
+        'crear_grafico_correlacion': lambda c: vis._datos_grafico_correlacion(data, cols, COLUMNA_PAIS, cubo=c),
+        'crear_grafico_barras_agrupadas': lambda c: vis._datos_grafico_barras_agrupadas(data, COLUMNA_PAIS, cols[0], cols[1], cubo=c),
+        'crear_grafico_dispersion_por_año': lambda c: vis._datos_grafico_dispersion_por_año(data, COLUMNA_PAIS, COLUMNA_AÑO, 2020, x, y, cubo=c),
+        'crear_grafico_dispersion': lambda c: vis._datos_grafico_dispersion(data, COLUMNA_PAIS, x, y, cubo=c),
+        'crear_grafico_pastel': lambda c: vis._datos_grafico_pastel(data, COLUMNA_PAIS, a, b, cubo=c),
+    }
+
+    def _mejor(funcion):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append(time.perf_counter() - inicio)
+        return min(tiempos)
+
+    t_cubo = _mejor(lambda: CuboAgregado.construir(data))
+    cubo = CuboAgregado.construir(data)
+    resultados = {'filas': len(data), 'construccion_cubo_s': t_cubo, 'funciones': {}}
+    for nombre, preparar in preparaciones.items():
+        resultados['funciones'][nombre] = {'directo_s': _mejor(lambda: preparar(None)),
+                                           'cubo_s': _mejor(lambda: preparar(cubo))}
+
+    print(f"Preparación de datos por figura ({len(data):,} filas, cubo construido en {t_cubo * 1000:.1f} ms)")
+    for nombre, r in resultados['funciones'].items():
+        print(f"  {nombre:<35} directo = {r['directo_s'] * 1000:8.1f} ms   cubo = {r['cubo_s'] * 1000:8.2f} ms")
+    total_directo = sum(r['directo_s'] for r in resultados['funciones'].values())
+    total_cubo = t_cubo + sum(r['cubo_s'] for r in resultados['funciones'].values())
+    print(f"  Total: directo = {total_directo * 1000:.1f} ms   cubo (incluida construcción) = {total_cubo * 1000:.1f} ms")
+    print("-" * 55)
+    return resultados
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Generador de datos sintéticos con el esquema de global_energy_consumption.csv
+# ==============================================================================
+
+# Rangos (mínimo, máximo) observados en el dataset original para cada métrica
+RANGOS_METRICAS = {
+    'Total Energy Consumption (TWh)': (100.0, 10000.0),
+    'Per Capita Energy Use (kWh)': (500.0, 50000.0),
+    'Renewable Energy Share (%)': (5.0, 90.0),
+    'Fossil Fuel Dependency (%)': (10.0, 80.0),
+    'Industrial Energy Use (%)': (20.0, 60.0),
+    'Household Energy Use (%)': (10.0, 40.0),
+    'Carbon Emissions (Million Tons)': (50.0, 5000.0),
+    'Energy Price Index (USD/kWh)': (0.05, 0.5),
+}
+
+
+def generar_datos_sinteticos(n_paises=10, n_años=25, filas_por_grupo=40, año_inicio=2000, semilla=0, categorico=False):
+    """
+    Entradas:
+        - n_paises: Número de países (o regiones) distintos.
+        - n_años: Número de años consecutivos a partir de año_inicio.
+        - filas_por_grupo: Filas por cada par (Country, Year); el dataset original tiene ~40.
+        - año_inicio: Primer año de la serie.
+        - semilla: Semilla del generador aleatorio (misma semilla = mismos datos).
+        - categorico: Si es True la columna Country se devuelve como categoría.
+    Salida:
+        - Un dataframe con las columnas Country, Year y las ocho métricas del dataset
+          original (valores uniformes dentro de los rangos de RANGOS_METRICAS), con las
+          filas en orden aleatorio como en el CSV original.
+    """
+    rng = np.random.default_rng(semilla)
+    n_filas = n_paises * n_años * filas_por_grupo
+
+    codigos = np.repeat(np.arange(n_paises, dtype=np.int32), n_años * filas_por_grupo)
+    años = np.tile(np.repeat(np.arange(año_inicio, año_inicio + n_años, dtype=np.int64), filas_por_grupo), n_paises)
+    orden = rng.permutation(n_filas)
+
+    ancho = len(str(max(n_paises - 1, 0)))
+    nombres = np.array([f'País_{i:0{ancho}d}' for i in range(n_paises)])
+    paises = pd.Categorical.from_codes(codigos[orden], categories=nombres)
+
+    columnas = {COLUMNA_PAIS: paises if categorico else np.asarray(paises), COLUMNA_AÑO: años[orden]}
+    for metrica, (minimo, maximo) in RANGOS_METRICAS.items():
+        columnas[metrica] = np.round(rng.uniform(minimo, maximo, n_filas), 2)
+    return pd.DataFrame(columnas)
@@ -0,0 +1,269 @@
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# Motor de estadísticas por grupo (una sola pasada vectorizada)
+# ==============================================================================
+
+ESTADISTICAS_SOPORTADAS = ('count', 'sum', 'mean', 'min', 'max', 'median')
+
+# Máximo de celdas de la matriz grupos x tamaño del grupo más grande, en múltiplos de
+# las filas, para ordenar todos los bloques a la vez (más allá se ordena por categoría)
+RELLENO_MAXIMO = 2
+
+
+@dataclass
+class EstadisticasGrupo:
+    """
+    Resultado de calcular_estadisticas_grupo.
+
+    Atributos:
+        - grupos: Índice de pandas con los grupos (ej: países) en orden ascendente.
+        - categorias: Lista de columnas numéricas analizadas.
+        - valores: Diccionario nombre de estadística -> arreglo (grupos x categorías).
+          Los cuantiles se guardan con el nombre 'q<valor>' (ej: 'q0.25').
+    """
+    grupos: pd.Index
+    categorias: list
+    valores: dict = field(default_factory=dict)
+    _ordenes: dict = field(default_factory=dict, repr=False)
+
+    def tabla(self, estadistica):
+        """Devuelve la estadística como dataframe (grupos x categorías)."""
+        return pd.DataFrame(self.valores[estadistica], index=self.grupos, columns=self.categorias)
+
+    def _orden(self, estadistica, descendente):
+        # Orden estable por columna: ante empates se conserva el orden de los grupos,
+        # igual que idxmax/idxmin y nlargest/nsmallest(keep='first') de pandas
+        clave = (estadistica, descendente)
+        if clave not in self._ordenes:
+            valores = self.valores[estadistica]
+            self._ordenes[clave] = np.argsort(-valores if descendente else valores, axis=0, kind='stable')
+        return self._ordenes[clave]
+
+    def _extremos(self, estadistica, categoria, k, descendente):
+        j = self.categorias.index(categoria)
+        columna = self.valores[estadistica][:, j]
+        indices = self._orden(estadistica, descendente)[:, j]
+        # Los NaN quedan al final del orden y se descartan (como nlargest/nsmallest)
+        indices = indices[~np.isnan(columna[indices])][:k]
+        return [(self.grupos[i], columna[i]) for i in indices]
+
+    def mayores(self, estadistica, categoria, k=1):
+        """Lista de (grupo, valor) con los k valores más grandes de la estadística."""
+        return self._extremos(estadistica, categoria, k, descendente=True)
+
+    def menores(self, estadistica, categoria, k=1):
+        """Lista de (grupo, valor) con los k valores más pequeños de la estadística."""
+        return self._extremos(estadistica, categoria, k, descendente=False)
+
+
+def _nombre_cuantil(q):
+    return f'q{q:g}'
+
+
+def calcular_estadisticas_grupo(data, categorias, col_grupo='Country', estadisticas=('median',), cuantiles=(), n_procesos=1):
+    """
+    Entradas:
+        - data: Un dataframe de pandas.
+        - categorias: Lista de columnas numéricas sobre las que se calculan las estadísticas.
+        - col_grupo: Columna por la que se agrupa (ej: 'Country').
+        - estadisticas: Estadísticas a calcular, entre 'count', 'sum', 'mean', 'min', 'max' y 'median'.
+        - cuantiles: Cuantiles adicionales entre 0 y 1 (interpolación lineal, igual que pandas).
+        - n_procesos: Procesos entre los que se reparten los grupos (1 = en este proceso;
+          ver _valores_en_paralelo). El resultado es idéntico bit a bit.
+
+    Salida:
+        - Un objeto EstadisticasGrupo con todas las estadísticas de todas las categorías.
+        - Los valores coinciden con data.groupby(col_grupo)[categorias].<estadística>():
+          los NaN se ignoran y las filas con grupo nulo se descartan.
+
+    Las filas se ordenan una sola vez por grupo (ordenamiento radix sobre códigos enteros
+    pequeños) y todos los bloques se ordenan por valor a la vez, sin recorrer los grupos
+    en Python (ver _valores_por_grupo); las estadísticas se obtienen indexando los
+    bloques ordenados en desplazamientos calculados a partir del inicio de cada grupo.
+    """
+    desconocidas = set(estadisticas) - set(ESTADISTICAS_SOPORTADAS)
+    if desconocidas:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(desconocidas)}")
+
+    for q in cuantiles:
+        if not 0 <= q <= 1:
+            raise ValueError(f"El cuantil {q} debe estar entre 0 y 1")
+
+    codigos, grupos = pd.factorize(data[col_grupo], sort=True)
+    grupos = pd.Index(grupos, name=col_grupo)
+
+    if n_procesos > 1 and len(grupos) > 1:
+        valores = _valores_en_paralelo(data, categorias, codigos, len(grupos), estadisticas, cuantiles, n_procesos)
+        return EstadisticasGrupo(grupos=grupos, categorias=list(categorias), valores=valores)
+
+    # Matriz (categorías x filas): cada categoría ocupa una fila contigua en memoria
+    X = data[categorias].to_numpy(dtype=np.float64).T
+
+    validos = codigos >= 0
+    if not validos.all():
+        codigos, X = codigos[validos], X[:, validos]
+
+    valores = _valores_por_grupo(codigos, X, len(grupos), len(categorias), estadisticas, cuantiles)
+    return EstadisticasGrupo(grupos=grupos, categorias=list(categorias), valores=valores)
+
+
+def _valores_por_grupo(codigos, X, n_grupos, n_categorias, estadisticas, cuantiles):
+    """
+    Estadísticas (diccionario nombre -> arreglo n_grupos x n_categorias) de las filas
+    de X (categorías x filas) con códigos de grupo 0..n_grupos-1 (sin nulos).
+    """
+    # Orden estable por grupo; con códigos de 8/16 bits numpy usa ordenamiento radix
+    codigos = codigos.astype(np.min_scalar_type(max(n_grupos - 1, 0)))
+    tamanos = np.bincount(codigos, minlength=n_grupos)
+    inicios = np.cumsum(tamanos) - tamanos
+    n_filas = len(codigos)
+
+    # Orden por valor dentro de cada bloque (los NaN al final), sin recorrer los grupos
+    max_tamano = int(tamanos.max()) if n_grupos else 0
+    if n_grupos * max_tamano <= RELLENO_MAXIMO * n_filas:
+        # Grupos de tamaño parecido: los bloques se copian a una matriz grupos x max_tamano
+        # rellena con NaN y se ordenan todos a la vez con un solo np.sort por filas
+        X_ord = X.take(np.argsort(codigos, kind='stable'), axis=1)
+        if n_grupos * max_tamano == n_filas:
+            # Todos los grupos del mismo tamaño: la matriz es una vista sin relleno
+            X_ord.reshape(n_categorias, n_grupos, max_tamano).sort(axis=2)
+        else:
+            celda = np.arange(n_filas) + np.repeat(np.arange(n_grupos) * max_tamano - inicios, tamanos)
+            bloques = np.full((n_categorias, n_grupos * max_tamano), np.nan)
+            bloques[:, celda] = X_ord
+            bloques.reshape(n_categorias, n_grupos, max_tamano).sort(axis=2)
+            X_ord = bloques.take(celda, axis=1)
+            del bloques
+    else:
+        # Tamaños muy desiguales (el relleno no cabe): por categoría, un ordenamiento por
+        # valor y luego uno estable por grupo
+        X_ord = np.empty_like(X)
+        for c in range(n_categorias):
+            orden = np.argsort(X[c])
+            orden = orden[np.argsort(codigos[orden], kind='stable')]
+            X_ord[c] = X[c, orden]
+
+    if np.isnan(X_ord).any():
+        nulos = np.isnan(X_ord)
+        conteo = np.add.reduceat(~nulos, inicios, axis=1).T if n_grupos else np.zeros((0, n_categorias), dtype=np.int64)
+    else:
+        nulos = None
+        conteo = np.broadcast_to(tamanos[:, None], (n_grupos, n_categorias))
+
+    columnas = np.arange(n_categorias)
+    sin_datos = conteo == 0
+
+    def _en(posiciones):
+        valores = X_ord[columnas, posiciones]
+        valores[sin_datos] = np.nan
+        return valores
+
+    def _cuantil(q):
+        pos = q * (conteo - 1)
+        bajo = np.floor(pos).astype(np.int64)
+        alto = np.ceil(pos).astype(np.int64)
+        v_bajo = _en(inicios[:, None] + np.maximum(bajo, 0))
+        v_alto = _en(inicios[:, None] + np.maximum(alto, 0))
+        return v_bajo + (v_alto - v_bajo) * (pos - bajo)
+
+    valores = {}
+    if 'count' in estadisticas:
+        valores['count'] = np.array(conteo)
+    if 'sum' in estadisticas or 'mean' in estadisticas:
+        suma = np.add.reduceat(X_ord if nulos is None else np.where(nulos, 0.0, X_ord), inicios, axis=1).T
+        if 'sum' in estadisticas:
+            valores['sum'] = suma
+        if 'mean' in estadisticas:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                valores['mean'] = suma / conteo
+    if 'min' in estadisticas:
+        valores['min'] = _en(np.broadcast_to(inicios[:, None], conteo.shape))
+    if 'max' in estadisticas:
+        valores['max'] = _en(inicios[:, None] + np.maximum(conteo - 1, 0))
+    if 'median' in estadisticas:
+        # Promedio de los dos elementos centrales, igual que la mediana de pandas
+        medio_bajo = _en(inicios[:, None] + np.maximum((conteo - 1) // 2, 0))
+        medio_alto = _en(inicios[:, None] + conteo // 2 - (conteo == 0))
+        valores['median'] = (medio_bajo + medio_alto) / 2
+    for q in cuantiles:
+        valores[_nombre_cuantil(q)] = _cuantil(q)
+    return valores
+
+# ==============================================================================
+# Ruta paralela: particiones por grupo en un pool de procesos con memoria compartida
+# ==============================================================================
+
+def _estadisticas_particion(nombre_X, nombre_codigos, forma, tipo_codigos, particion, n_particiones, n_grupos,
+                            estadisticas, cuantiles):
+    """
+    Se ejecuta en un proceso trabajador: lee X y los códigos de la memoria compartida
+    (sin copiarlos por el pipe), toma las filas de sus grupos (código % n_particiones ==
+    particion) y calcula sus estadísticas con códigos locales densos (código // n_particiones).
+    """
+    from multiprocessing import shared_memory
+
+    shm_X = shared_memory.SharedMemory(name=nombre_X)
+    shm_codigos = shared_memory.SharedMemory(name=nombre_codigos)
+    try:
+        X = np.ndarray(forma, dtype=np.float64, buffer=shm_X.buf)
+        codigos = np.ndarray(forma[1], dtype=tipo_codigos, buffer=shm_codigos.buf)
+        filas = (codigos >= 0) & (codigos % n_particiones == particion)
+        locales = codigos[filas] // n_particiones
+        X_particion = X[:, filas]
+        del X, codigos
+    finally:
+        shm_X.close()
+        shm_codigos.close()
+    n_locales = len(range(particion, n_grupos, n_particiones))
+    return _valores_por_grupo(locales, X_particion, n_locales, forma[0], estadisticas, cuantiles)
+
+
+def _valores_en_paralelo(data, categorias, codigos, n_grupos, estadisticas, cuantiles, n_procesos):
+    """
+    Reparte los grupos entre n_procesos particiones por hash del código de grupo
+    (código % n_procesos): todas las filas de un grupo caen en la misma partición, así
+    que cada trabajador calcula medianas y cuantiles exactos de sus grupos. Las columnas
+    numéricas y los códigos se publican una vez en memoria compartida y los resultados
+    (grupos x categorías, pequeños) se intercalan de vuelta en el orden global.
+
+    Dentro de cada grupo las filas conservan su orden original, así que sumas, medias,
+    medianas y cuantiles coinciden bit a bit con la ruta de un solo proceso.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+
+    n_particiones = min(n_procesos, n_grupos)
+    forma = (len(categorias), len(codigos))
+    codigos = codigos.astype(np.int32 if n_grupos < 2**31 else np.int64)
+    shm_X = shared_memory.SharedMemory(create=True, size=max(forma[0] * forma[1] * 8, 1))
+    shm_codigos = shared_memory.SharedMemory(create=True, size=max(codigos.nbytes, 1))
+    try:
+        X = np.ndarray(forma, dtype=np.float64, buffer=shm_X.buf)
+        # Columna por columna: no se crea la matriz completa intermedia de to_numpy()
+        for j, categoria in enumerate(categorias):
+            X[j] = data[categoria].to_numpy(dtype=np.float64)
+        np.ndarray(codigos.shape, dtype=codigos.dtype, buffer=shm_codigos.buf)[:] = codigos
+        del X
+
+        with ProcessPoolExecutor(max_workers=n_particiones) as pool:
+            futuros = [pool.submit(_estadisticas_particion, shm_X.name, shm_codigos.name, forma, codigos.dtype,
+                                   k, n_particiones, n_grupos, tuple(estadisticas), tuple(cuantiles))
+                       for k in range(n_particiones)]
+            parciales = [f.result() for f in futuros]
+    finally:
+        shm_X.close()
+        shm_X.unlink()
+        shm_codigos.close()
+        shm_codigos.unlink()
+
+    valores = {}
+    for nombre in parciales[0]:
+        ejemplo = parciales[0][nombre]
+        valores[nombre] = np.empty((n_grupos, forma[0]), dtype=ejemplo.dtype)
+        for k, parcial in enumerate(parciales):
+            valores[nombre][k::n_particiones] = parcial[nombre]
+    return valores
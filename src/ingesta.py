@@ -0,0 +1,136 @@
+import os
+import sys
+import glob
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from .carga_datos import ESQUEMA, leer_csv_tipado
+
+# ==============================================================================
+# Ingesta concurrente de varios CSV (ej: uno por región y año) en un solo dataframe
+# ==============================================================================
+
+def resolver_archivos(fuente, patron='*.csv'):
+    """
+    Entradas:
+        - fuente: Carpeta, patrón glob (ej: 'entregas/*/energia_*.csv') o lista de rutas.
+        - patron: Patrón de archivos cuando fuente es una carpeta.
+    Salida:
+        - Lista ordenada de rutas (ValueError si no hay ninguna).
+    """
+    if isinstance(fuente, (list, tuple)):
+        rutas = list(fuente)
+    elif os.path.isdir(fuente):
+        rutas = sorted(glob.glob(os.path.join(fuente, patron)))
+    else:
+        rutas = sorted(glob.glob(fuente, recursive=True))
+    if not rutas:
+        raise ValueError(f"No se encontraron archivos en {fuente!r}")
+    return rutas
+
+
+def _leer_archivo(ruta, esquema):
+    """Parsea un archivo con el esquema tipado; devuelve (dataframe, registro de rendimiento)."""
+    inicio = time.perf_counter()
+    data = leer_csv_tipado(ruta, esquema)
+    segundos = time.perf_counter() - inicio
+    tamano = os.path.getsize(ruta)
+    return data, {
+        'ruta': ruta,
+        'filas': len(data),
+        'bytes': tamano,
+        'segundos': segundos,
+        'mb_s': tamano / 2**20 / segundos if segundos > 0 else float('inf'),
+        'filas_s': len(data) / segundos if segundos > 0 else float('inf'),
+    }
+
+
+def _concatenar(partes):
+    """
+    Une los dataframes columna por columna con una sola copia por columna. Las columnas
+    categóricas se unifican con union_categoricals: las categorías se combinan una vez
+    y solo se reasignan los códigos enteros de cada archivo (los textos no se vuelven a
+    codificar).
+    """
+    columnas = {}
+    for col in partes[0].columns:
+        series = [p[col] for p in partes]
+        if isinstance(series[0].dtype, pd.CategoricalDtype):
+            columnas[col] = union_categoricals(series, sort_categories=True)
+        else:
+            columnas[col] = np.concatenate([s.to_numpy() for s in series])
+    return pd.DataFrame(columnas, copy=False)
+
+
+def ingerir_archivos(fuente, patron='*.csv', n_trabajadores=None, usar_procesos=False, esquema=None):
+    """
+    Entradas:
+        - fuente: Carpeta, patrón glob o lista de CSV con el formato de global_energy_consumption.csv.
+        - patron: Patrón de archivos cuando fuente es una carpeta.
+        - n_trabajadores: Tamaño del pool (por defecto min(32, os.cpu_count() + 4)).
+        - usar_procesos: False = pool de hilos (el parser de pandas libera el GIL
+          durante buena parte del parseo y no hay que copiar resultados entre
+          procesos); True = pool de procesos (para archivos grandes con mucho trabajo
+          en Python o muchos núcleos).
+        - esquema: Diccionario columna -> dtype (por defecto ESQUEMA de carga_datos).
+    Salida:
+        - (data, informe): un solo dataframe tipado con las filas de todos los archivos
+          en el orden de las rutas (Country categórica con las categorías de todos los
+          archivos, ordenadas) y una lista con el rendimiento de cada archivo ('ruta',
+          'filas', 'bytes', 'segundos', 'mb_s', 'filas_s').
+    """
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+    rutas = resolver_archivos(fuente, patron)
+    esquema = ESQUEMA if esquema is None else esquema
+    Pool = ProcessPoolExecutor if usar_procesos else ThreadPoolExecutor
+    with Pool(max_workers=n_trabajadores) as pool:
+        resultados = list(pool.map(_leer_archivo, rutas, [esquema] * len(rutas)))
+
+    partes = [r[0] for r in resultados]
+    informe = [r[1] for r in resultados]
+    columnas = list(partes[0].columns)
+    for parte, registro in zip(partes, informe):
+        if list(parte.columns) != columnas:
+            raise ValueError(f"{registro['ruta']} no tiene las mismas columnas que {informe[0]['ruta']}")
+    return _concatenar(partes), informe
+
+
+def imprimir_informe(informe, segundos_total=None, max_archivos=10):
+    """Resumen del rendimiento por archivo (los max_archivos más lentos) y total."""
+    filas = sum(r['filas'] for r in informe)
+    megas = sum(r['bytes'] for r in informe) / 2**20
+    print(f"Ingesta: {len(informe)} archivos, {filas:,} filas, {megas:.1f} MiB")
+    for r in sorted(informe, key=lambda r: r['segundos'], reverse=True)[:max_archivos]:
+        print(f"  {os.path.basename(r['ruta']):<40} {r['filas']:>10,} filas  {r['segundos'] * 1000:8.1f} ms  "
+              f"{r['mb_s']:7.1f} MiB/s")
+    if segundos_total:
+        print(f"  Total: {segundos_total:.2f} s ({megas / segundos_total:.1f} MiB/s, {filas / segundos_total:,.0f} filas/s)")
+    print("-" * 55)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Une varios CSV con el esquema del dataset en un solo archivo.')
+    parser.add_argument('fuente', help='Carpeta o patrón glob de los CSV.')
+    parser.add_argument('--patron', default='*.csv', help="Patrón dentro de la carpeta (por defecto '*.csv').")
+    parser.add_argument('--trabajadores', type=int, help='Tamaño del pool.')
+    parser.add_argument('--procesos', action='store_true', help='Usar un pool de procesos en lugar de hilos.')
+    parser.add_argument('--salida', help='CSV unido de salida (opcional).')
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    data, informe = ingerir_archivos(args.fuente, args.patron, args.trabajadores, args.procesos)
+    imprimir_informe(informe, time.perf_counter() - inicio)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        data.to_csv(args.salida, index=False)
+        print(f"Dataset unido: {args.salida} ({len(data):,} filas)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
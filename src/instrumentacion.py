@@ -0,0 +1,201 @@
+import os
+import csv
+import json
+import time
+import functools
+import tracemalloc
+
+# ==============================================================================
+# Instrumentación opcional por etapas (tiempo real, tiempo de CPU y memoria)
+# ==============================================================================
+
+# Registro activo (None = desactivada; etapa() devuelve un contexto vacío)
+INSTRUMENTACION_ACTIVA = None
+
+CAMPOS_RESUMEN = ['etapa', 'llamadas', 'segundos', 'segundos_cpu', 'segundos_medio',
+                  'segundos_max', 'pico_memoria_max_bytes', 'memoria_neta_bytes']
+
+
+class _EtapaNula:
+    """Contexto sin efecto que se usa cuando la instrumentación está desactivada."""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_ETAPA_NULA = _EtapaNula()
+
+
+class _Etapa:
+    __slots__ = ('registro', 'nombre', 'inicio', 'cpu_inicio', 'memoria_inicio', 'pico_hijos')
+
+    def __init__(self, registro, nombre):
+        self.registro = registro
+        self.nombre = nombre
+
+    def __enter__(self):
+        registro = self.registro
+        registro._pila.append(self)
+        self.pico_hijos = 0
+        if registro.memoria:
+            # El pico se reinicia por etapa; el del padre se reconstruye al salir
+            self.memoria_inicio, pico = tracemalloc.get_traced_memory()
+            if len(registro._pila) > 1:
+                padre = registro._pila[-2]
+                padre.pico_hijos = max(padre.pico_hijos, pico)
+            tracemalloc.reset_peak()
+        self.cpu_inicio = time.process_time()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        segundos = time.perf_counter() - self.inicio
+        segundos_cpu = time.process_time() - self.cpu_inicio
+        registro = self.registro
+        nombre = '/'.join(e.nombre for e in registro._pila)
+        registro._pila.pop()
+
+        pico = memoria_neta = 0
+        if registro.memoria:
+            actual, pico_propio = tracemalloc.get_traced_memory()
+            pico_absoluto = max(pico_propio, self.pico_hijos)
+            pico = pico_absoluto - self.memoria_inicio
+            memoria_neta = actual - self.memoria_inicio
+            if registro._pila:
+                padre = registro._pila[-1]
+                padre.pico_hijos = max(padre.pico_hijos, pico_absoluto)
+
+        registro.registrar(nombre, segundos, segundos_cpu, pico, memoria_neta)
+        return False
+
+
+class RegistroEtapas:
+    """
+    Mediciones de las etapas ejecutadas mientras la instrumentación está activa.
+
+    Las etapas anidadas se nombran con su ruta completa (ej: 'crear_histograma/guardado').
+    'llamadas' guarda una fila por ejecución de cada etapa y 'resumen()' las agrega.
+    """
+
+    def __init__(self, memoria=True):
+        self.memoria = memoria
+        self.llamadas = []
+        self._pila = []
+        self._iniciado_tracemalloc = False
+        if memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._iniciado_tracemalloc = True
+
+    def cerrar(self):
+        if self._iniciado_tracemalloc:
+            tracemalloc.stop()
+            self._iniciado_tracemalloc = False
+
+    def registrar(self, etapa, segundos, segundos_cpu, pico_memoria_bytes=0, memoria_neta_bytes=0):
+        self.llamadas.append({'etapa': etapa, 'segundos': segundos, 'segundos_cpu': segundos_cpu,
+                              'pico_memoria_bytes': pico_memoria_bytes, 'memoria_neta_bytes': memoria_neta_bytes,
+                              'proceso': os.getpid()})
+
+    def incorporar(self, llamadas):
+        """Agrega llamadas medidas en otro proceso (ej: los trabajadores de render_lote)."""
+        self.llamadas.extend(llamadas)
+
+    def vaciar(self):
+        """Devuelve las llamadas registradas y deja el registro vacío."""
+        llamadas, self.llamadas = self.llamadas, []
+        return llamadas
+
+    def resumen(self):
+        """
+        Salida:
+            - Lista de diccionarios (uno por etapa, campos de CAMPOS_RESUMEN) ordenada por
+              tiempo total descendente.
+        """
+        por_etapa = {}
+        for llamada in self.llamadas:
+            r = por_etapa.setdefault(llamada['etapa'], {
+                'etapa': llamada['etapa'], 'llamadas': 0, 'segundos': 0.0, 'segundos_cpu': 0.0,
+                'segundos_max': 0.0, 'pico_memoria_max_bytes': 0, 'memoria_neta_bytes': 0})
+            r['llamadas'] += 1
+            r['segundos'] += llamada['segundos']
+            r['segundos_cpu'] += llamada['segundos_cpu']
+            r['segundos_max'] = max(r['segundos_max'], llamada['segundos'])
+            r['pico_memoria_max_bytes'] = max(r['pico_memoria_max_bytes'], llamada['pico_memoria_bytes'])
+            r['memoria_neta_bytes'] += llamada['memoria_neta_bytes']
+        for r in por_etapa.values():
+            r['segundos_medio'] = r['segundos'] / r['llamadas']
+        return sorted(por_etapa.values(), key=lambda r: r['segundos'], reverse=True)
+
+    def exportar_json(self, ruta, incluir_llamadas=False):
+        """Escribe el resumen (y opcionalmente cada llamada) en un archivo JSON."""
+        contenido = {'memoria': self.memoria, 'resumen': self.resumen()}
+        if incluir_llamadas:
+            contenido['llamadas'] = self.llamadas
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8') as f:
+            json.dump(contenido, f, ensure_ascii=False, indent=2)
+
+    def exportar_csv(self, ruta):
+        """Escribe el resumen por etapa en un archivo CSV."""
+        os.makedirs(os.path.dirname(os.path.abspath(ruta)), exist_ok=True)
+        with open(ruta, 'w', encoding='utf-8', newline='') as f:
+            escritor = csv.DictWriter(f, fieldnames=CAMPOS_RESUMEN)
+            escritor.writeheader()
+            escritor.writerows(self.resumen())
+
+    def imprimir(self):
+        print(f"{'Etapa':<50} {'Llamadas':>8} {'Total (s)':>10} {'CPU (s)':>10} {'Pico (MiB)':>11}")
+        for r in self.resumen():
+            print(f"{r['etapa']:<50} {r['llamadas']:>8} {r['segundos']:>10.3f} {r['segundos_cpu']:>10.3f} "
+                  f"{r['pico_memoria_max_bytes'] / 2**20:>11.1f}")
+        print("-" * 55)
+
+
+def activar_instrumentacion(memoria=True):
+    """
+    Entradas:
+        - memoria: Si es True mide también la memoria con tracemalloc (más costoso: las
+          asignaciones de Python se vuelven ~2-3 veces más lentas mientras está activa).
+    Salida:
+        - El RegistroEtapas activo. Desde este momento las etapas de visualizaciones y
+          procesamiento_datos quedan registradas.
+    """
+    global INSTRUMENTACION_ACTIVA
+    desactivar_instrumentacion()
+    INSTRUMENTACION_ACTIVA = RegistroEtapas(memoria)
+    return INSTRUMENTACION_ACTIVA
+
+
+def desactivar_instrumentacion():
+    global INSTRUMENTACION_ACTIVA
+    if INSTRUMENTACION_ACTIVA is not None:
+        INSTRUMENTACION_ACTIVA.cerrar()
+    INSTRUMENTACION_ACTIVA = None
+
+
+def etapa(nombre):
+    """
+    Contexto que mide el bloque como la etapa 'nombre' (anidada dentro de la etapa en
+    curso). Con la instrumentación desactivada devuelve un contexto vacío compartido.
+    """
+    registro = INSTRUMENTACION_ACTIVA
+    if registro is None:
+        return _ETAPA_NULA
+    return _Etapa(registro, nombre)
+
+
+def instrumentar(funcion):
+    """Decorador: mide cada llamada a la función como una etapa con su nombre."""
+    nombre = funcion.__name__
+
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        if INSTRUMENTACION_ACTIVA is None:
+            return funcion(*args, **kwargs)
+        with _Etapa(INSTRUMENTACION_ACTIVA, nombre):
+            return funcion(*args, **kwargs)
+    return envoltura
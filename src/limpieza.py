@@ -0,0 +1,223 @@
+import os
+import sys
+import argparse
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO, RUTA_CSV_ORIGINAL, RUTA_DATASET_LIMPIO
+
+# ==============================================================================
+# Limpieza vectorizada: rangos válidos, participaciones sectoriales y duplicados
+# ==============================================================================
+
+RUTA_CSV_LIMPIO = os.path.join(RUTA_DATASET_LIMPIO, 'global_energy_consumption_limpio.csv')
+
+INDUSTRIAL = 'Industrial Energy Use (%)'
+DOMESTICO = 'Household Energy Use (%)'
+
+# Rango válido (mínimo, máximo) de cada métrica; None = sin límite
+RANGOS = {
+    'Total Energy Consumption (TWh)': (0, None),
+    'Per Capita Energy Use (kWh)': (0, None),
+    'Renewable Energy Share (%)': (0, 100),
+    'Fossil Fuel Dependency (%)': (0, 100),
+    'Industrial Energy Use (%)': (0, 100),
+    'Household Energy Use (%)': (0, 100),
+    'Carbon Emissions (Million Tons)': (0, None),
+    'Energy Price Index (USD/kWh)': (0, None),
+}
+
+# Columnas que son partes de un mismo total y no pueden sumar más de 100 %
+PARTICIPACIONES_SECTORIALES = (INDUSTRIAL, DOMESTICO)
+
+POLITICAS_RANGO = ('nulo', 'recortar', 'eliminar', 'error')
+POLITICAS_SECTORES = ('nulo', 'escalar', 'eliminar', 'ignorar', 'error')
+POLITICAS_DUPLICADOS = ('media', 'mediana', 'primera', 'ultima', 'error')
+
+
+class ErrorLimpieza(ValueError):
+    """Datos que no cumplen una regla cuya política es 'error'."""
+
+
+@dataclass
+class InformeLimpieza:
+    """
+    Resultado de limpiar_datos.
+
+    Atributos:
+        - filas_entrada, filas_salida: Filas antes y después de la limpieza.
+        - fuera_de_rango: Diccionario columna -> valores fuera de su rango.
+        - sectores_excedidos: Filas cuyas participaciones sectoriales suman más de 100 %.
+        - filas_eliminadas: Filas descartadas por las políticas 'eliminar' o por no tener país o año.
+        - grupos_duplicados: Pares (Country, Year) que aparecían más de una vez.
+        - filas_duplicadas: Filas que se combinaron con otra del mismo par.
+    """
+    filas_entrada: int = 0
+    filas_salida: int = 0
+    fuera_de_rango: dict = field(default_factory=dict)
+    sectores_excedidos: int = 0
+    filas_eliminadas: int = 0
+    grupos_duplicados: int = 0
+    filas_duplicadas: int = 0
+
+    def imprimir(self):
+        print(f"Limpieza: {self.filas_entrada:,} filas -> {self.filas_salida:,} filas "
+              f"({self.filas_entrada / max(self.filas_salida, 1):.1f}x menos)")
+        for col, n in self.fuera_de_rango.items():
+            if n:
+                print(f"  {col:<35} {n:>8,} valores fuera de rango")
+        print(f"  Participaciones sectoriales > 100 %: {self.sectores_excedidos:,} filas")
+        print(f"  Filas eliminadas: {self.filas_eliminadas:,}")
+        print(f"  Pares (País, Año) duplicados: {self.grupos_duplicados:,} ({self.filas_duplicadas:,} filas combinadas)")
+        print("-" * 55)
+
+
+def _validar_politica(nombre, valor, opciones):
+    if valor not in opciones:
+        raise ValueError(f"{nombre} debe ser uno de {opciones}, no {valor!r}")
+
+
+def limpiar_datos(data, politica_rango='nulo', politica_sectores='nulo', politica_duplicados='media', rangos=None,
+                  participaciones=PARTICIPACIONES_SECTORIALES, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO):
+    """
+    Entradas:
+        - data: Dataframe con el formato de global_energy_consumption.csv.
+        - politica_rango: Qué hacer con un valor fuera de RANGOS: 'nulo' (se reemplaza
+          por NaN), 'recortar' (se lleva al límite), 'eliminar' (se descarta la fila)
+          o 'error' (ErrorLimpieza).
+        - politica_sectores: Qué hacer si las participaciones sectoriales de una fila
+          suman más de 100 %: 'nulo' (ambas a NaN), 'escalar' (se reparten para sumar
+          100), 'eliminar', 'ignorar' o 'error'.
+        - politica_duplicados: Cómo se combinan las filas de un mismo (Country, Year):
+          'media', 'mediana', 'primera', 'ultima' (según el orden del archivo) o 'error'.
+        - rangos: Diccionario columna -> (mínimo, máximo) (por defecto RANGOS).
+        - participaciones: Columnas que son partes de un mismo 100 %.
+        - col_grupo, col_tiempo: Columnas que identifican una observación.
+    Salida:
+        - (limpio, informe): dataframe con una fila por (Country, Year), ordenado por
+          país y año, con los tipos de entrada (Country categórica, Year int16 y
+          métricas float32), y un InformeLimpieza. Las medias y medianas ignoran NaN.
+    """
+    _validar_politica('politica_rango', politica_rango, POLITICAS_RANGO)
+    _validar_politica('politica_sectores', politica_sectores, POLITICAS_SECTORES)
+    _validar_politica('politica_duplicados', politica_duplicados, POLITICAS_DUPLICADOS)
+    rangos = RANGOS if rangos is None else rangos
+    informe = InformeLimpieza(filas_entrada=len(data))
+
+    columnas = [c for c in data.columns if c not in (col_grupo, col_tiempo)]
+    valores = data[columnas].to_numpy(dtype=np.float64, copy=True)
+    conservar = data[col_grupo].notna().to_numpy() & data[col_tiempo].notna().to_numpy()
+
+    # Rangos: una comparación por columna sobre el arreglo completo
+    con_rango = [(j, rangos[c]) for j, c in enumerate(columnas) if c in rangos]
+    if con_rango:
+        indices = [j for j, _ in con_rango]
+        minimos = np.array([-np.inf if r[0] is None else r[0] for _, r in con_rango])
+        maximos = np.array([np.inf if r[1] is None else r[1] for _, r in con_rango])
+        bloque = valores[:, indices]
+        fuera = (bloque < minimos) | (bloque > maximos)
+        informe.fuera_de_rango = {columnas[j]: int(n) for j, n in zip(indices, fuera.sum(axis=0))}
+        if fuera.any():
+            if politica_rango == 'error':
+                raise ErrorLimpieza(f"Valores fuera de rango: { {c: n for c, n in informe.fuera_de_rango.items() if n} }")
+            if politica_rango == 'nulo':
+                bloque[fuera] = np.nan
+            elif politica_rango == 'recortar':
+                bloque = np.clip(bloque, minimos, maximos)
+            else:
+                conservar &= ~fuera.any(axis=1)
+            valores[:, indices] = bloque
+
+    # Participaciones sectoriales (después de los rangos: se comparan valores ya válidos)
+    partes = [columnas.index(c) for c in participaciones if c in columnas]
+    if len(partes) > 1:
+        suma = valores[:, partes].sum(axis=1)
+        excedidas = suma > 100
+        informe.sectores_excedidos = int(excedidas.sum())
+        if excedidas.any():
+            if politica_sectores == 'error':
+                raise ErrorLimpieza(f"{informe.sectores_excedidos} filas con participaciones sectoriales > 100 %")
+            if politica_sectores == 'nulo':
+                valores[np.ix_(excedidas, partes)] = np.nan
+            elif politica_sectores == 'escalar':
+                valores[np.ix_(excedidas, partes)] *= (100 / suma[excedidas])[:, None]
+            elif politica_sectores == 'eliminar':
+                conservar &= ~excedidas
+
+    informe.filas_eliminadas = int((~conservar).sum())
+    claves = data.loc[conservar, [col_grupo, col_tiempo]].reset_index(drop=True)
+    tabla = pd.concat([claves, pd.DataFrame(valores[conservar], columns=columnas)], axis=1)
+
+    # Duplicados: un solo groupby ordenado (o un ordenamiento estable para primera/última)
+    tamaños = tabla.groupby([col_grupo, col_tiempo], observed=True, sort=False).size()
+    informe.grupos_duplicados = int((tamaños > 1).sum())
+    informe.filas_duplicadas = int((tamaños - 1).sum())
+    if politica_duplicados == 'error' and informe.grupos_duplicados:
+        raise ErrorLimpieza(f"{informe.grupos_duplicados} pares ({col_grupo}, {col_tiempo}) duplicados")
+
+    if politica_duplicados in ('primera', 'ultima'):
+        ordenada = tabla.sort_values([col_grupo, col_tiempo], kind='stable')
+        limpio = ordenada.drop_duplicates([col_grupo, col_tiempo], keep='first' if politica_duplicados == 'primera' else 'last')
+    else:
+        agrupado = tabla.groupby([col_grupo, col_tiempo], observed=True, sort=True)[columnas]
+        limpio = (agrupado.median() if politica_duplicados == 'mediana' else agrupado.mean()).reset_index()
+
+    limpio = limpio.reset_index(drop=True)
+    tipos = {c: data[c].dtype for c in data.columns}
+    limpio = limpio.astype(tipos)[list(data.columns)]
+    informe.filas_salida = len(limpio)
+    return limpio, informe
+
+
+def guardar_dataset_limpio(limpio, ruta=RUTA_CSV_LIMPIO):
+    """
+    Escribe el dataset limpio como CSV (mismas columnas que el original, ordenado por
+    país y año) de forma atómica y devuelve la ruta. Se puede leer con
+    carga_datos.cargar_datos(ruta), que además le genera su propio snapshot.
+    """
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    tmp = ruta + '.tmp'
+    limpio.to_csv(tmp, index=False)
+    os.replace(tmp, ruta)
+    return ruta
+
+
+def limpiar_csv(ruta_csv=RUTA_CSV_ORIGINAL, ruta_salida=RUTA_CSV_LIMPIO, **politicas):
+    """
+    Carga el CSV con el esquema tipado, lo limpia con limpiar_datos(**politicas) y
+    escribe el resultado en ruta_salida (por defecto data/dataset_limpio/).
+    Devuelve (limpio, informe).
+    """
+    from .carga_datos import leer_csv_tipado
+
+    limpio, informe = limpiar_datos(leer_csv_tipado(ruta_csv), **politicas)
+    guardar_dataset_limpio(limpio, ruta_salida)
+    return limpio, informe
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Limpia y deduplica el dataset y lo escribe en data/dataset_limpio/.')
+    parser.add_argument('--entrada', default=RUTA_CSV_ORIGINAL, help='CSV de entrada (por defecto el dataset original).')
+    parser.add_argument('--salida', default=RUTA_CSV_LIMPIO, help='CSV limpio de salida.')
+    parser.add_argument('--rango', choices=POLITICAS_RANGO, default='nulo', help='Política para valores fuera de rango.')
+    parser.add_argument('--sectores', choices=POLITICAS_SECTORES, default='nulo',
+                        help='Política para participaciones sectoriales > 100 %%.')
+    parser.add_argument('--duplicados', choices=POLITICAS_DUPLICADOS, default='media',
+                        help='Política para pares (País, Año) repetidos.')
+    args = parser.parse_args(argv)
+
+    try:
+        _, informe = limpiar_csv(args.entrada, args.salida, politica_rango=args.rango,
+                                 politica_sectores=args.sectores, politica_duplicados=args.duplicados)
+    except ErrorLimpieza as e:
+        print(f"Error de limpieza: {e}", file=sys.stderr)
+        return 1
+    informe.imprimir()
+    print(f"Dataset limpio: {args.salida}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
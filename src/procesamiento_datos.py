@@ -1,5 +1,8 @@
 import pandas as pd
 
+from .estadisticas_grupo import calcular_estadisticas_grupo
+from .instrumentacion import etapa, instrumentar
+
 categorias = [
     'Total Energy Consumption (TWh)',
     'Per Capita Energy Use (kWh)',
@@ -13,71 +16,73 @@ categorias = [
 # Calculo de las medianas (máxima y minima) para cada categoría numerica
 # ==============================================================================
 
-def mediana_categoria(data, categorias):
+@instrumentar
+def mediana_categoria(data, categorias, estadisticas=None, n_procesos=1):
     """
     Entradas:
         - data: Un dataframe de pandas.
+        - estadisticas: Resultado previo de calcular_estadisticas_grupo con la mediana por
+          país (opcional); permite reutilizar un solo cálculo en varios reportes.
+        - n_procesos: Procesos para calcular las medianas por particiones de países
+          (1 = en este proceso; el resultado es el mismo).
         
     """
-    # Calcular la mediana de cada categoría por país
-    medianas_por_pais = data.groupby('Country')[categorias].median()
+    # Calcular la mediana de cada categoría por país (una sola pasada para todas las categorías)
+    if estadisticas is None:
+        with etapa('estadisticas'):
+            estadisticas = calcular_estadisticas_grupo(data, categorias, 'Country', estadisticas=('median',),
+                                                       n_procesos=n_procesos)
 
     resultados = {}
 
     for categoria in categorias:
-        # Encontrar el país con la mediana más grande para la categoría actual
-        pais_max_mediana = medianas_por_pais[categoria].idxmax()
-        valor_max_mediana = medianas_por_pais[categoria].max()
-
-        # Encontrar el país con la mediana más pequeña para la categoría actual
-        pais_min_mediana = medianas_por_pais[categoria].idxmin()
-        valor_min_mediana = medianas_por_pais[categoria].min()
-
         resultados[categoria] = {
-            'Mediana más grande': (pais_max_mediana, valor_max_mediana),
-            'Mediana más pequeña': (pais_min_mediana, valor_min_mediana)
+            'Mediana más grande': estadisticas.mayores('median', categoria, 1)[0],
+            'Mediana más pequeña': estadisticas.menores('median', categoria, 1)[0]
         }
 
     # Imprimir los resultados
-    for categoria, result in resultados.items():
-        print(f"Categoría: {categoria}")
-        print(f"  Mediana más grande: País = {result['Mediana más grande'][0]}, Valor = {result['Mediana más grande'][1]:.2f}")
-        print(f"  Mediana más pequeña: País = {result['Mediana más pequeña'][0]}, Valor = {result['Mediana más pequeña'][1]:.2f}")
-        print("-" * 55)
+    with etapa('impresion'):
+        for categoria, result in resultados.items():
+            print(f"Categoría: {categoria}")
+            print(f"  Mediana más grande: País = {result['Mediana más grande'][0]}, Valor = {result['Mediana más grande'][1]:.2f}")
+            print(f"  Mediana más pequeña: País = {result['Mediana más pequeña'][0]}, Valor = {result['Mediana más pequeña'][1]:.2f}")
+            print("-" * 55)
 
 
-def top_mediana_categoria(data, categorias):
+@instrumentar
+def top_mediana_categoria(data, categorias, estadisticas=None, n_procesos=1):
     """
     Entradas:
         - data: Un dataframe de pandas.
+        - estadisticas: Resultado previo de calcular_estadisticas_grupo con la mediana por
+          país (opcional); permite reutilizar un solo cálculo en varios reportes.
+        - n_procesos: Procesos para calcular las medianas por particiones de países
+          (1 = en este proceso; el resultado es el mismo).
         
     """
-    # Calcular la mediana de cada categoría por país
-    medianas_por_pais = data.groupby('Country')[categorias].median()
+    # Calcular la mediana de cada categoría por país (una sola pasada para todas las categorías)
+    if estadisticas is None:
+        with etapa('estadisticas'):
+            estadisticas = calcular_estadisticas_grupo(data, categorias, 'Country', estadisticas=('median',),
+                                                       n_procesos=n_procesos)
 
     resultados = {}
 
     for categoria in categorias:
-        # Encontrar el top 3 paises con la mediana más grande para la categoría actual
-        top_3_max = medianas_por_pais[categoria].nlargest(3).index.tolist()
-        top_3_max_valores = medianas_por_pais[categoria].nlargest(3).values.tolist()
-
-        # Encontrar el top 3 paises con la mediana más pequeña para la categoría actual
-        top_3_min = medianas_por_pais[categoria].nsmallest(3).index.tolist()
-        top_3_min_valores = medianas_por_pais[categoria].nsmallest(3).values.tolist()
-
         resultados[categoria] = {
-            'Top 3 Mediana más grande': list(zip(top_3_max, top_3_max_valores)),
-            'Top 3 Mediana más pequeña': list(zip(top_3_min, top_3_min_valores))
+            'Top 3 Mediana más grande': estadisticas.mayores('median', categoria, 3),
+            'Top 3 Mediana más pequeña': estadisticas.menores('median', categoria, 3)
         }
 
     # Imprimir los resultados
-    for categoria, result in resultados.items():
-        print(f"Categoría: {categoria}")
-        print("  Top 3 Mediana más grande:")
-        for pais, valor in result['Top 3 Mediana más grande']:
-            print(f"    País = {pais}, Valor = {valor:.2f}")
-        print("  Top 3 Mediana más pequeña:")
-        for pais, valor in result['Top 3 Mediana más pequeña']:
-            print(f"    País = {pais}, Valor = {valor:.2f}")
-        print("-" * 55)   
\ No newline at end of file
+    with etapa('impresion'):
+        for categoria, result in resultados.items():
+            print(f"Categoría: {categoria}")
+            print("  Top 3 Mediana más grande:")
+            for pais, valor in result['Top 3 Mediana más grande']:
+                print(f"    País = {pais}, Valor = {valor:.2f}")
+            print("  Top 3 Mediana más pequeña:")
+            for pais, valor in result['Top 3 Mediana más pequeña']:
+                print(f"    País = {pais}, Valor = {valor:.2f}")
+            print("-" * 55)   
\ No newline at end of file
@@ -0,0 +1,166 @@
+import os
+import time
+import inspect
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from . import cache_figuras
+from . import instrumentacion
+from . import salida_figuras
+
+# ==============================================================================
+# Renderizado por lotes de las figuras del reporte en un pool de procesos
+# ==============================================================================
+
+RUTA_REPORTE_FIGURAS = os.path.join('..', 'reporte', 'figuras')
+
+# Estado de cada proceso trabajador (se fija una sola vez en el inicializador)
+_datos_trabajador = None
+_cubo_trabajador = None
+
+
+def _inicializar_trabajador(data, ruta_salida, config_cache, memoria_instrumentacion=None, ruta_almacen=None,
+                            config_salida=None):
+    """
+    Prepara un proceso del pool: backend Agg (sin pantalla), carpeta de salida,
+    desactivación de plt.show() y, si se indica, la caché de figuras compartida y la
+    instrumentación por etapas (memoria_instrumentacion: None = desactivada) y el
+    escritor de figuras en segundo plano (config_salida: argumentos de activar_escritor).
+    El dataframe se recibe una sola vez por proceso; con ruta_almacen cada proceso
+    abre el almacén mapeado en memoria (una sola copia en disco y en la caché de
+    páginas) y arma su CuboAgregado a partir de él.
+    """
+    global _datos_trabajador, _cubo_trabajador
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+    from . import visualizaciones
+    visualizaciones.RUTA_FIGURAS = ruta_salida
+    visualizaciones.MOSTRAR_FIGURAS = False
+    if config_cache is not None:
+        cache_figuras.activar_cache(**config_cache)
+    if memoria_instrumentacion is not None:
+        instrumentacion.activar_instrumentacion(memoria_instrumentacion)
+    if config_salida is not None:
+        salida_figuras.activar_escritor(**config_salida)
+    _datos_trabajador = data
+    if ruta_almacen is not None:
+        from .almacen_panel import AlmacenPanel
+        _cubo_trabajador = AlmacenPanel(ruta_almacen).cubo()
+
+
+def _renderizar_especificacion(indice, especificacion):
+    """Renderiza una figura en el proceso actual y devuelve su registro de tiempos."""
+    import matplotlib.pyplot as plt
+    from . import visualizaciones
+
+    nombre = especificacion['funcion']
+    inicio = time.perf_counter()
+    cpu_inicio = time.process_time()
+    cache = cache_figuras.CACHE_ACTIVA
+    aciertos_previos = cache.aciertos if cache is not None else 0
+    error = None
+    try:
+        funcion = getattr(visualizaciones, nombre)
+        args, kwargs = especificacion.get('args', ()), dict(especificacion.get('kwargs', {}))
+        if _cubo_trabajador is not None:
+            # Las funciones que aceptan cubo= lo reciben del almacén si la especificación no lo fija
+            firma = inspect.signature(funcion)
+            if 'cubo' in firma.parameters and 'cubo' not in firma.bind_partial(_datos_trabajador, *args, **kwargs).arguments:
+                kwargs['cubo'] = _cubo_trabajador
+        funcion(_datos_trabajador, *args, **kwargs)
+    except Exception:
+        error = traceback.format_exc(limit=3)
+    finally:
+        plt.close('all')
+    try:
+        # La figura cuenta como terminada cuando sus archivos están escritos
+        salida_figuras.esperar_escrituras()
+    except Exception:
+        error = error or traceback.format_exc(limit=3)
+
+    registro = instrumentacion.INSTRUMENTACION_ACTIVA
+    return {
+        'indice': indice,
+        'funcion': nombre,
+        'segundos': time.perf_counter() - inicio,
+        'segundos_cpu': time.process_time() - cpu_inicio,
+        'proceso': os.getpid(),
+        'cache': None if cache is None else ('acierto' if cache.aciertos > aciertos_previos else 'fallo'),
+        'error': error,
+        'etapas': registro.vaciar() if registro is not None else None,
+    }
+
+
+def renderizar_lote(data, especificaciones, ruta_salida=RUTA_REPORTE_FIGURAS, n_procesos=None, cache=None, mostrar_resumen=True,
+                    almacen=None, salida=None):
+    """
+    Entradas:
+        - data: Dataframe con los datos que reciben todas las figuras.
+        - especificaciones: Lista de diccionarios que describen cada figura, por ejemplo
+          {'funcion': 'crear_histograma',
+           'kwargs': {'nombre_col': 'Renewable Energy Share (%)',
+                      'etiqueta_eje_x': 'Porcentaje', 'etiqueta_eje_y': 'Frecuencia'}}.
+          'funcion' es el nombre de una función crear_* de visualizaciones; 'args' y
+          'kwargs' son los argumentos que siguen a data.
+        - ruta_salida: Carpeta donde se escriben las figuras (por defecto '../reporte/figuras').
+        - n_procesos: Número de procesos del pool (por defecto os.cpu_count()).
+        - cache: CacheFiguras (ej: la devuelta por cache_figuras.activar_cache) que los
+          procesos comparten para no volver a renderizar figuras sin cambios.
+        - mostrar_resumen: Si es True imprime el tiempo de cada figura y el total.
+        - almacen: Carpeta de un almacén de almacen_panel (opcional). Los procesos lo
+          abren mapeado en memoria y pasan su cubo a las funciones que aceptan cubo=;
+          si todas las figuras lo aceptan, data puede ser None y no se copia a los procesos.
+        - salida: Diccionario con la configuración de salida del reporte, con los
+          argumentos de salida_figuras.activar_escritor (ej: {'formato': 'png', 'dpi': 150,
+          'nivel_compresion': 1}). Cada proceso codifica y escribe sus figuras en hilos
+          de fondo mientras dibuja la siguiente. None = guardado síncrono con plt.savefig.
+    Salida:
+        - Una lista (en el orden de 'especificaciones') de diccionarios con 'funcion',
+          'segundos', 'segundos_cpu', 'proceso', 'cache' ('acierto', 'fallo' o None)
+          y 'error' (traceback o None).
+        - Si la instrumentación está activa en el proceso principal, los trabajadores
+          también miden sus etapas y estas se incorporan al registro activo.
+        - Las figuras se renderizan con el backend Agg y nunca se llama a plt.show();
+          un error en una figura se reporta sin detener el resto del lote.
+    """
+    os.makedirs(ruta_salida, exist_ok=True)
+    n_procesos = n_procesos or os.cpu_count() or 1
+
+    config_cache = None
+    if cache is not None:
+        config_cache = {'ruta': cache.ruta, 'max_bytes': cache.max_bytes, 'max_edad_s': cache.max_edad_s}
+    registro = instrumentacion.INSTRUMENTACION_ACTIVA
+    memoria_instrumentacion = registro.memoria if registro is not None else None
+
+    inicio = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_procesos, initializer=_inicializar_trabajador,
+                             initargs=(data, ruta_salida, config_cache, memoria_instrumentacion, almacen, salida)) as pool:
+        futuros = [pool.submit(_renderizar_especificacion, i, esp) for i, esp in enumerate(especificaciones)]
+        resultados = [f.result() for f in futuros]
+    total = time.perf_counter() - inicio
+    for r in resultados:
+        etapas = r.pop('etapas')
+        if registro is not None and etapas:
+            registro.incorporar(etapas)
+
+    if mostrar_resumen:
+        print(f"Figuras renderizadas: {len(resultados)} con {n_procesos} procesos en {total:.2f} s")
+        for r in resultados:
+            estado = 'ERROR' if r['error'] else 'ok'
+            if r['cache']:
+                estado += f" (caché: {r['cache']})"
+            print(f"  [{r['indice']:>3}] {r['funcion']:<35} {r['segundos']:7.2f} s  {estado}")
+        suma = sum(r['segundos'] for r in resultados)
+        print(f"  Suma de tiempos por figura: {suma:.2f} s (aceleración {suma / total if total else 0:.1f}x)")
+        if cache is not None:
+            aciertos = sum(r['cache'] == 'acierto' for r in resultados)
+            print(f"  Caché: {aciertos} aciertos, {len(resultados) - aciertos} fallos")
+        print("-" * 55)
+    if cache is not None:
+        for r in resultados:
+            if r['cache'] == 'acierto':
+                cache.aciertos += 1
+            elif r['cache'] == 'fallo':
+                cache.fallos += 1
+    return resultados
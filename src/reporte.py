@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import argparse
+import traceback
+
+from .carga_datos import RAIZ_PROYECTO, RUTA_CSV_ORIGINAL, RUTA_DATASET_LIMPIO, COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Generación del reporte completo sin pantalla (línea de comandos)
+# ==============================================================================
+
+# Carpeta de salida por defecto (absoluta: no depende del directorio desde el que se lanza)
+RUTA_REPORTE = os.path.join(RAIZ_PROYECTO, 'reporte', 'figuras')
+
+CONSUMO = 'Total Energy Consumption (TWh)'
+EMISIONES = 'Carbon Emissions (Million Tons)'
+RENOVABLE = 'Renewable Energy Share (%)'
+FOSIL = 'Fossil Fuel Dependency (%)'
+INDUSTRIAL = 'Industrial Energy Use (%)'
+DOMESTICO = 'Household Energy Use (%)'
+
+
+def especificaciones_reporte(data):
+    """
+    Entradas:
+        - data: Dataframe con los datos del reporte (se usa para elegir el último año).
+    Salida:
+        - Diccionario ordenado nombre -> especificación {'funcion', 'args', 'kwargs'}
+          (el formato de render_lote) con todas las figuras del reporte.
+    """
+    from .carga_datos import metricas
+
+    ultimo_año = str(int(data[COLUMNA_AÑO].max()))
+    return {
+        'histograma_renovable': {'funcion': 'crear_histograma',
+                                 'args': (RENOVABLE, 'Porcentaje de renovables', 'Frecuencia')},
+        'kde_renovable': {'funcion': 'crear_grafico_kde',
+                          'args': (RENOVABLE, 'Porcentaje de renovables', 'Densidad')},
+        'boxplot_renovable': {'funcion': 'crear_boxplot',
+                              'args': (COLUMNA_PAIS, RENOVABLE, 'Participación de renovables por país',
+                                       'País', 'Porcentaje (%)')},
+        'lineas_consumo': {'funcion': 'crear_graf_lineas',
+                           'args': (COLUMNA_PAIS, COLUMNA_AÑO, CONSUMO, 'Año', 'Consumo (TWh)',
+                                    'Consumo de energía por país')},
+        'lineas_renovable': {'funcion': 'crear_graf_lineas',
+                             'args': (COLUMNA_PAIS, COLUMNA_AÑO, RENOVABLE, 'Año', 'Porcentaje (%)',
+                                      'Participación de renovables por país')},
+        'correlacion': {'funcion': 'crear_grafico_correlacion',
+                        'args': (list(metricas), COLUMNA_PAIS, 'Correlación entre métricas (promedio por país)')},
+        'barras_renovable_fosil': {'funcion': 'crear_grafico_barras_agrupadas',
+                                   'args': (COLUMNA_PAIS, RENOVABLE, FOSIL, 'Tipo de energía', 'Porcentaje',
+                                            'País', 'Porcentaje (%)', 'Renovables frente a fósiles por país')},
+        'dispersion_ultimo_año': {'funcion': 'crear_grafico_dispersion_por_año',
+                                  'args': (COLUMNA_PAIS, COLUMNA_AÑO, ultimo_año, CONSUMO, EMISIONES,
+                                           'Consumo (TWh)', 'Emisiones (millones de t)',
+                                           f'Consumo frente a emisiones en {ultimo_año}')},
+        'dispersion_todos_los_años': {'funcion': 'crear_grafico_dispersion_todos_los_años',
+                                      'args': (COLUMNA_PAIS, COLUMNA_AÑO, CONSUMO, EMISIONES, 'Consumo (TWh)',
+                                               'Emisiones (millones de t)', 'Consumo frente a emisiones'),
+                                      'kwargs': {'salida': 'tira'}},
+        'dispersion': {'funcion': 'crear_grafico_dispersion',
+                       'args': (COLUMNA_PAIS, CONSUMO, EMISIONES, 'Consumo (TWh)', 'Emisiones (millones de t)',
+                                'Consumo frente a emisiones (promedio por país)')},
+        'pastel_sectores': {'funcion': 'crear_grafico_pastel',
+                            'args': (COLUMNA_PAIS, INDUSTRIAL, DOMESTICO, 'Uso de energía por sector en', 5, 2)},
+    }
+
+
+def _renderizar_en_proceso(data, especificaciones, ruta_salida, salida):
+    """Renderiza las figuras una tras otra en este proceso; mismo formato de resultados que render_lote."""
+    import matplotlib.pyplot as plt
+    from . import visualizaciones
+    from . import salida_figuras
+
+    ruta_original, mostrar_original = visualizaciones.RUTA_FIGURAS, visualizaciones.MOSTRAR_FIGURAS
+    visualizaciones.RUTA_FIGURAS, visualizaciones.MOSTRAR_FIGURAS = ruta_salida, False
+    if salida is not None:
+        salida_figuras.activar_escritor(**salida)
+    resultados = []
+    try:
+        for i, especificacion in enumerate(especificaciones):
+            inicio = time.perf_counter()
+            error = None
+            try:
+                funcion = getattr(visualizaciones, especificacion['funcion'])
+                funcion(data, *especificacion.get('args', ()), **especificacion.get('kwargs', {}))
+                salida_figuras.esperar_escrituras()
+            except Exception:
+                error = traceback.format_exc(limit=3)
+            finally:
+                plt.close('all')
+            resultados.append({'indice': i, 'funcion': especificacion['funcion'],
+                               'segundos': time.perf_counter() - inicio, 'error': error})
+    finally:
+        salida_figuras.desactivar_escritor()
+        visualizaciones.RUTA_FIGURAS, visualizaciones.MOSTRAR_FIGURAS = ruta_original, mostrar_original
+    return resultados
+
+
+def generar_reporte(ruta_csv=RUTA_CSV_ORIGINAL, ruta_salida=RUTA_REPORTE, figuras=None, n_procesos=1,
+                    salida=None, usar_snapshot=True, dir_snapshot=RUTA_DATASET_LIMPIO, limpiar=False):
+    """
+    Entradas:
+        - ruta_csv: CSV de entrada con el formato de global_energy_consumption.csv.
+        - ruta_salida: Carpeta donde se escriben las figuras (se crea si no existe).
+        - figuras: Nombres de especificaciones_reporte a generar (por defecto todas).
+        - n_procesos: 1 = en este proceso; más de 1 = pool de render_lote.
+        - salida: Configuración de salida (argumentos de salida_figuras.activar_escritor,
+          ej: {'formato': 'png', 'dpi': 150, 'nivel_compresion': 1}); None = plt.savefig.
+        - usar_snapshot, dir_snapshot: Como en carga_datos.cargar_datos.
+        - limpiar: Si es True las figuras se generan sobre limpieza.limpiar_datos(data)
+          (una fila por país y año; ver sus políticas por defecto).
+    Salida:
+        - Lista de resultados por figura ('funcion', 'segundos', 'error', ...). Las
+          figuras se dibujan con el backend Agg y nunca se muestran.
+    """
+    # El backend se fija antes de que cualquier módulo importe pyplot
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+    from .carga_datos import cargar_datos
+
+    data = cargar_datos(ruta_csv, dir_snapshot, usar_snapshot=usar_snapshot)
+    if limpiar:
+        from .limpieza import limpiar_datos
+        data, _ = limpiar_datos(data)
+    disponibles = especificaciones_reporte(data)
+    figuras = list(disponibles) if not figuras else list(figuras)
+    desconocidas = [f for f in figuras if f not in disponibles]
+    if desconocidas:
+        raise ValueError(f"Figuras desconocidas: {desconocidas}. Disponibles: {list(disponibles)}")
+    especificaciones = [disponibles[f] for f in figuras]
+
+    os.makedirs(ruta_salida, exist_ok=True)
+    if n_procesos > 1:
+        from .render_lote import renderizar_lote
+        return renderizar_lote(data, especificaciones, ruta_salida, n_procesos, mostrar_resumen=False, salida=salida)
+    return _renderizar_en_proceso(data, especificaciones, ruta_salida, salida)
+
+
+def main(argv=None):
+    inicio = time.perf_counter()
+    parser = argparse.ArgumentParser(description='Genera las figuras del reporte sin pantalla.')
+    parser.add_argument('--entrada', default=RUTA_CSV_ORIGINAL, help='CSV de entrada (por defecto el dataset original).')
+    parser.add_argument('--salida', default=RUTA_REPORTE, help='Carpeta de las figuras (por defecto reporte/figuras).')
+    parser.add_argument('--figuras', nargs='*', help='Subconjunto de figuras a generar (ver --listar).')
+    parser.add_argument('--listar', action='store_true', help='Muestra los nombres de las figuras y termina.')
+    parser.add_argument('--procesos', type=int, default=1, help='Procesos para renderizar (por defecto 1).')
+    parser.add_argument('--formato', choices=['png', 'jpg', 'webp', 'pdf', 'svg'], help='Formato de las figuras.')
+    parser.add_argument('--dpi', type=int, help='Resolución de todas las figuras.')
+    parser.add_argument('--compresion', type=int, choices=range(10), metavar='0-9',
+                        help='Nivel de compresión PNG (por defecto 6).')
+    parser.add_argument('--limpiar', action='store_true', help='Deduplicar y validar los datos antes de graficar.')
+    parser.add_argument('--sin-snapshot', action='store_true', help='Parsear siempre el CSV sin escribir snapshot.')
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        # Solo los nombres: no hace falta leer el CSV completo
+        import pandas as pd
+        for nombre in especificaciones_reporte(pd.DataFrame({COLUMNA_AÑO: [0]})):
+            print(nombre)
+        return 0
+
+    salida = None
+    if args.formato or args.dpi or args.compresion is not None:
+        salida = {'formato': args.formato, 'dpi': args.dpi,
+                  'nivel_compresion': 6 if args.compresion is None else args.compresion}
+
+    resultados = generar_reporte(args.entrada, args.salida, args.figuras, args.procesos, salida,
+                                 usar_snapshot=not args.sin_snapshot, limpiar=args.limpiar)
+    errores = [r for r in resultados if r['error']]
+    for r in resultados:
+        print(f"  {r['funcion']:<35} {r['segundos']:7.2f} s  {'ERROR' if r['error'] else 'ok'}")
+        if r['error']:
+            print(r['error'], file=sys.stderr)
+    print(f"Figuras: {len(resultados) - len(errores)} de {len(resultados)} en {args.salida} "
+          f"({time.perf_counter() - inicio:.2f} s)")
+    return 1 if errores else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,190 @@
+import io
+import os
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# ==============================================================================
+# Escritura de figuras: nombres de archivo y codificación en segundo plano
+# ==============================================================================
+
+# Escritor activo (None = las figuras se guardan con plt.savefig, de forma síncrona)
+ESCRITOR_ACTIVO = None
+
+# Formatos que se rasterizan en el hilo principal y se codifican con PIL en segundo plano
+FORMATOS_RASTER = ('png', 'jpg', 'jpeg', 'webp')
+
+# Sufijo único de los archivos temporales (dos escrituras de la misma ruta no se pisan)
+_contador_temporales = itertools.count()
+
+
+def limpiar_nombre(texto):
+    """
+    Convierte un texto (ej: el nombre de una columna) en parte de un nombre de archivo:
+    espacios y '/' pasan a '_' y se quitan los paréntesis.
+    Ej: 'Renewable Energy Share (%)' -> 'Renewable_Energy_Share_%'.
+    """
+    return str(texto).replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+
+
+class EscritorFiguras:
+    """
+    Guarda figuras sin bloquear el renderizado de la siguiente.
+
+    En el hilo que llama solo se rasteriza la figura a un buffer (PNG sin compresión,
+    que es casi una copia de memoria); la compresión con PIL y la escritura en disco
+    se hacen en un pool de hilos (zlib y la E/S liberan el GIL). Los formatos
+    vectoriales (pdf, svg) se generan en el hilo que llama y solo la escritura pasa
+    a segundo plano.
+
+    Atributos de configuración (por reporte):
+        - formato: Formato de salida que reemplaza la extensión de cada ruta (None = el
+          de la ruta).
+        - dpi: Resolución que reemplaza la de cada figura (None = la indicada por cada
+          función o la de matplotlib).
+        - nivel_compresion: Nivel zlib de PNG (0-9; 1 es mucho más rápido que el 6 de
+          matplotlib y los archivos son algo más grandes).
+        - calidad: Calidad de JPEG/WEBP (1-100).
+        - max_pendientes: Máximo de figuras en cola o escribiéndose (cada una retiene su
+          buffer sin comprimir); al llegar al límite guardar espera a que termine una.
+
+    Si una ruta se guarda de nuevo antes de escribirse, la nueva escritura espera a la
+    anterior (gana la última) y esperar relanza el error de cualquiera de las dos.
+    """
+
+    def __init__(self, n_hilos=2, formato=None, dpi=None, nivel_compresion=6, calidad=90, max_pendientes=None):
+        self.formato = formato.lower().lstrip('.') if formato else None
+        self.dpi = dpi
+        self.nivel_compresion = nivel_compresion
+        self.calidad = calidad
+        self.max_pendientes = max_pendientes or 2 * n_hilos
+        self._pool = ThreadPoolExecutor(max_workers=n_hilos, thread_name_prefix='escritor_figuras')
+        self._cupos = threading.BoundedSemaphore(self.max_pendientes)
+        self._pendientes = {}  # ruta -> tareas en orden de envío
+
+    def guardar(self, fig, ruta, **kwargs):
+        """
+        Entradas:
+            - fig: Figura de matplotlib (se puede cerrar en cuanto la función retorna).
+            - ruta: Ruta de destino; su extensión se cambia si hay un formato configurado.
+            - kwargs: Argumentos de savefig (ej: dpi, bbox_inches).
+        Salida:
+            - La ruta final. El archivo queda escrito cuando termina su tarea (ver esperar).
+        """
+        base, extension = os.path.splitext(ruta)
+        formato = self.formato or extension.lstrip('.').lower() or 'png'
+        ruta = base + '.' + formato
+        if self.dpi is not None:
+            kwargs['dpi'] = self.dpi
+
+        # Se reserva el cupo antes de rasterizar: así se acota también la memoria de los buffers
+        self._cupos.acquire()
+        try:
+            buffer = io.BytesIO()
+            if formato in FORMATOS_RASTER:
+                fig.savefig(buffer, format='png', pil_kwargs={'compress_level': 0}, **kwargs)
+                trabajo, argumentos = self._codificar, (buffer, ruta, formato)
+            else:
+                fig.savefig(buffer, format=formato, **kwargs)
+                trabajo, argumentos = self._escribir, (buffer.getvalue(), ruta)
+            previas = self._pendientes.setdefault(ruta, [])
+            tarea = self._pool.submit(self._en_orden, previas[-1] if previas else None, trabajo, *argumentos)
+        except BaseException:
+            self._cupos.release()
+            raise
+        tarea.add_done_callback(lambda _: self._cupos.release())
+        previas.append(tarea)
+        return ruta
+
+    @staticmethod
+    def _en_orden(anterior, trabajo, *argumentos):
+        # El pool reparte las tareas en orden de envío: la anterior ya está en curso o
+        # terminó, así que esperarla no bloquea el pool. Su error lo relanza esperar.
+        if anterior is not None:
+            wait([anterior])
+        trabajo(*argumentos)
+
+    def _codificar(self, buffer, ruta, formato):
+        from PIL import Image
+
+        buffer.seek(0)
+        with Image.open(buffer) as imagen:
+            if formato == 'png':
+                opciones = {'compress_level': self.nivel_compresion}
+                if 'dpi' in imagen.info:
+                    opciones['dpi'] = imagen.info['dpi']
+                contenido = io.BytesIO()
+                imagen.save(contenido, format='PNG', **opciones)
+            else:
+                contenido = io.BytesIO()
+                imagen.convert('RGB').save(contenido, format='JPEG' if formato in ('jpg', 'jpeg') else 'WEBP',
+                                           quality=self.calidad)
+        self._escribir(contenido.getvalue(), ruta)
+
+    @staticmethod
+    def _escribir(contenido, ruta):
+        # Escritura atómica: un lector nunca ve un archivo a medio escribir
+        tmp = f'{ruta}.{os.getpid()}-{next(_contador_temporales)}.tmp'
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(contenido)
+            os.replace(tmp, ruta)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+
+    def descripcion(self):
+        """Texto con la configuración de salida (forma parte de la clave de la caché de figuras)."""
+        return f'|{self.formato}|{self.dpi}|{self.nivel_compresion}|{self.calidad}'
+
+    def esperar(self, rutas=None):
+        """Espera a que se escriban las rutas indicadas (o todas) y relanza su error si falló."""
+        rutas = list(self._pendientes) if rutas is None else [r for r in rutas if r in self._pendientes]
+        error = None
+        for ruta in rutas:
+            for tarea in self._pendientes.pop(ruta):
+                try:
+                    tarea.result()
+                except Exception as e:
+                    error = error or e
+        if error is not None:
+            raise error
+
+    def cerrar(self):
+        """Espera todas las escrituras pendientes y libera los hilos."""
+        try:
+            self.esperar()
+        finally:
+            self._pool.shutdown(wait=True)
+
+
+def activar_escritor(n_hilos=2, formato=None, dpi=None, nivel_compresion=6, calidad=90, max_pendientes=None):
+    """
+    Activa el guardado en segundo plano para las funciones crear_* con la configuración
+    de salida del reporte (ver EscritorFiguras) y devuelve el escritor. Si ya había uno
+    activo, primero se terminan sus escrituras.
+    """
+    global ESCRITOR_ACTIVO
+    desactivar_escritor()
+    ESCRITOR_ACTIVO = EscritorFiguras(n_hilos, formato, dpi, nivel_compresion, calidad, max_pendientes)
+    return ESCRITOR_ACTIVO
+
+
+def desactivar_escritor():
+    """Termina las escrituras pendientes y vuelve al guardado síncrono."""
+    global ESCRITOR_ACTIVO
+    escritor, ESCRITOR_ACTIVO = ESCRITOR_ACTIVO, None
+    if escritor is not None:
+        escritor.cerrar()
+
+
+def descripcion_salida():
+    """Configuración del escritor activo como texto ('' si las figuras se guardan de forma síncrona)."""
+    return '' if ESCRITOR_ACTIVO is None else ESCRITOR_ACTIVO.descripcion()
+
+
+def esperar_escrituras(rutas=None):
+    """Espera las escrituras pendientes del escritor activo (no hace nada si no hay)."""
+    if ESCRITOR_ACTIVO is not None:
+        ESCRITOR_ACTIVO.esperar(rutas)
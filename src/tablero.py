@@ -0,0 +1,503 @@
+import os
+import sys
+import html
+import json
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .carga_datos import RAIZ_PROYECTO, RUTA_CSV_ORIGINAL, RUTA_DATASET_LIMPIO, COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Tablero HTML estático: agregados precalculados, reducidos y filtrados en el navegador
+# ==============================================================================
+
+RUTA_TABLERO = os.path.join(RAIZ_PROYECTO, 'reporte', 'tablero.html')
+
+# Límites del contenido embebido: el tamaño del HTML depende de estos valores y del
+# número de métricas, no del número de filas de los datos
+MAX_PAISES = 40        # los demás países se suman en un grupo 'Otros'
+MAX_PUNTOS_SERIE = 60  # años consecutivos se agrupan en tramos si hay más
+BINS_HISTOGRAMA = 24
+CIFRAS_SIGNIFICATIVAS = 6
+
+GRUPO_OTROS = 'Otros'
+CONSUMO = 'Total Energy Consumption (TWh)'
+
+
+def _redondear(valores, cifras=CIFRAS_SIGNIFICATIVAS):
+    """Redondea a 'cifras' cifras significativas (los JSON con float64 completos ocupan el triple)."""
+    x = np.asarray(valores, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        magnitud = np.floor(np.log10(np.abs(x)))
+    escala = 10.0 ** (cifras - 1 - np.where(np.isfinite(magnitud), magnitud, 0))
+    return np.round(x * escala) / escala
+
+
+def _a_lista(valores, cifras=CIFRAS_SIGNIFICATIVAS):
+    """Arreglo plano -> lista JSON con NaN como None."""
+    x = _redondear(np.ravel(valores), cifras)
+    return [None if np.isnan(v) else v for v in x.tolist()]
+
+
+def _sumas_y_conteos(data, metricas, col_grupo, col_tiempo, cubo=None):
+    """Tabla (col_grupo, col_tiempo) x (métrica, 'sum'/'count'), del cubo si lo cubre."""
+    if cubo is not None and cubo.cubre([col_grupo, col_tiempo], metricas):
+        return cubo.tabla.loc[:, (metricas, ['sum', 'count'])]
+    return data.groupby([col_grupo, col_tiempo], observed=True)[metricas].agg(['sum', 'count'])
+
+
+def datos_tablero(data, metricas=None, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO, cubo=None,
+                  max_paises=MAX_PAISES, max_puntos=MAX_PUNTOS_SERIE, bins=BINS_HISTOGRAMA):
+    """
+    Entradas:
+        - data: Dataframe con el formato de global_energy_consumption.csv.
+        - metricas: Columnas numéricas del tablero (por defecto todas salvo país y año).
+        - col_grupo, col_tiempo: Columnas de grupo y de tiempo.
+        - cubo: CuboAgregado precalculado (opcional); si lo cubre, no se agrupa data.
+        - max_paises: Países que se conservan (los de mayor consumo total); el resto se
+          suma en GRUPO_OTROS.
+        - max_puntos: Máximo de puntos por serie; si hay más años se agrupan en tramos
+          de años consecutivos del mismo ancho.
+        - bins: Intervalos de los histogramas.
+    Salida:
+        - Diccionario serializable con sumas y conteos por (país, tramo de años, métrica),
+          histogramas por país y la matriz de correlación de todos los datos. Con sumas
+          y conteos el navegador obtiene de forma exacta las medias de las líneas, las
+          barras y los pasteles y las sumas de la dispersión para cualquier selección
+          de países y años.
+    """
+    if metricas is None:
+        metricas = [c for c in data.select_dtypes('number').columns if c not in (col_grupo, col_tiempo)]
+    metricas = list(metricas)
+
+    tabla = _sumas_y_conteos(data, metricas, col_grupo, col_tiempo, cubo)
+    sumas = tabla.xs('sum', axis=1, level=1)[metricas]
+    conteos = tabla.xs('count', axis=1, level=1)[metricas]
+
+    # Malla completa país x año (las combinaciones sin datos quedan con conteo 0)
+    paises = sumas.index.get_level_values(0).unique()
+    años = np.sort(sumas.index.get_level_values(1).unique().to_numpy())
+    malla = pd.MultiIndex.from_product([paises, años])
+    s = sumas.reindex(malla, fill_value=0).to_numpy(np.float64).reshape(len(paises), len(años), len(metricas))
+    c = conteos.reindex(malla, fill_value=0).to_numpy(np.int64).reshape(len(paises), len(años), len(metricas))
+    s = np.nan_to_num(s)
+
+    # Países: los de mayor consumo (o de la primera métrica) y el resto sumado en 'Otros'
+    criterio = metricas.index(CONSUMO) if CONSUMO in metricas else 0
+    orden = np.argsort(-s[:, :, criterio].sum(axis=1), kind='stable')
+    if len(paises) > max_paises:
+        conservados, resto = np.sort(orden[:max_paises - 1]), orden[max_paises - 1:]
+        s = np.concatenate([s[conservados], s[resto].sum(axis=0, keepdims=True)])
+        c = np.concatenate([c[conservados], c[resto].sum(axis=0, keepdims=True)])
+        nombres = [str(p) for p in paises[conservados]] + [GRUPO_OTROS]
+        destino = np.full(len(paises), len(conservados))
+        destino[conservados] = np.arange(len(conservados))
+    else:
+        nombres = [str(p) for p in paises]
+        destino = np.arange(len(paises))
+
+    # Años: tramos consecutivos de 'ancho' años (las sumas y los conteos se suman)
+    ancho = max(1, -(-len(años) // max_puntos))
+    inicios = np.arange(0, len(años), ancho)
+    s = np.add.reduceat(s, inicios, axis=1)
+    c = np.add.reduceat(c, inicios, axis=1)
+
+    # Histogramas por país con bordes comunes: un bincount por métrica sobre todas las filas
+    posicion = pd.Index(paises).get_indexer(data[col_grupo])
+    valida = posicion >= 0
+    grupo = np.where(valida, destino[np.maximum(posicion, 0)], 0)
+    bordes, histogramas = [], []
+    for m in metricas:
+        x = data[m].to_numpy(np.float64)
+        ok = valida & ~np.isnan(x)
+        minimo, maximo = (float(x[ok].min()), float(x[ok].max())) if ok.any() else (0.0, 1.0)
+        b = np.histogram_bin_edges([], bins=bins, range=(minimo, maximo))
+        intervalo = np.clip(np.searchsorted(b, x[ok], side='right') - 1, 0, bins - 1)
+        histogramas.append(np.bincount(grupo[ok] * bins + intervalo, minlength=len(nombres) * bins).tolist())
+        bordes.append(_a_lista(b))
+
+    # Correlación de las medias por país (la de crear_grafico_correlacion, sin agrupar 'Otros')
+    medias_pais = (sumas.groupby(level=0, observed=True).sum()
+                   / conteos.groupby(level=0, observed=True).sum().replace(0, np.nan))
+    correlacion = medias_pais.corr().to_numpy()
+
+    return {
+        'metricas': metricas,
+        'paises': nombres,
+        'años': [int(a) for a in años[inicios]],
+        'ancho_años': int(ancho),
+        'año_final': int(años[-1]) if len(años) else None,
+        'sumas': [_a_lista(s[:, :, j]) for j in range(len(metricas))],
+        'conteos': [c[:, :, j].ravel().tolist() for j in range(len(metricas))],
+        'bins': int(bins),
+        'bordes': bordes,
+        'histogramas': histogramas,
+        'correlacion': _a_lista(correlacion, 4),
+        'filas': int(len(data)),
+        'paises_originales': int(len(paises)),
+    }
+
+
+def html_tablero(datos, titulo='Consumo de energía global'):
+    """Documento HTML autocontenido (sin dependencias externas) con los datos embebidos como JSON."""
+    carga = json.dumps(datos, ensure_ascii=False, separators=(',', ':'), allow_nan=False)
+    # Un '</script>' dentro de un texto cerraría el bloque antes de tiempo
+    carga = carga.replace('</', '<\\/')
+    return PLANTILLA_HTML.replace('__TITULO__', html.escape(titulo)).replace('__DATOS__', carga)
+
+
+def exportar_tablero(data, ruta=RUTA_TABLERO, titulo='Consumo de energía global', **opciones):
+    """
+    Calcula datos_tablero(data, **opciones), escribe el HTML de forma atómica y
+    devuelve (ruta, bytes escritos).
+    """
+    contenido = html_tablero(datos_tablero(data, **opciones), titulo).encode('utf-8')
+    os.makedirs(os.path.dirname(ruta) or '.', exist_ok=True)
+    tmp = ruta + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(contenido)
+    os.replace(tmp, ruta)
+    return ruta, len(contenido)
+
+
+def main(argv=None):
+    inicio = time.perf_counter()
+    parser = argparse.ArgumentParser(description='Exporta un tablero HTML estático con los agregados del reporte.')
+    parser.add_argument('--entrada', default=RUTA_CSV_ORIGINAL, help='CSV de entrada (por defecto el dataset original).')
+    parser.add_argument('--salida', default=RUTA_TABLERO, help='Archivo HTML (por defecto reporte/tablero.html).')
+    parser.add_argument('--titulo', default='Consumo de energía global', help='Título del tablero.')
+    parser.add_argument('--max-paises', type=int, default=MAX_PAISES, help='Países incluidos (el resto va a "Otros").')
+    parser.add_argument('--max-puntos', type=int, default=MAX_PUNTOS_SERIE, help='Puntos máximos por serie.')
+    parser.add_argument('--bins', type=int, default=BINS_HISTOGRAMA, help='Intervalos de los histogramas.')
+    parser.add_argument('--limpiar', action='store_true', help='Deduplicar y validar los datos antes de agregar.')
+    parser.add_argument('--sin-snapshot', action='store_true', help='Parsear siempre el CSV sin escribir snapshot.')
+    args = parser.parse_args(argv)
+
+    if args.max_paises < 2 or args.max_puntos < 1 or args.bins < 1:
+        parser.error('--max-paises debe ser al menos 2 y --max-puntos y --bins al menos 1')
+
+    from .carga_datos import cargar_datos
+    data = cargar_datos(args.entrada, RUTA_DATASET_LIMPIO, usar_snapshot=not args.sin_snapshot)
+    if args.limpiar:
+        from .limpieza import limpiar_datos
+        data, _ = limpiar_datos(data)
+
+    ruta, tamano = exportar_tablero(data, args.salida, args.titulo, max_paises=args.max_paises,
+                                    max_puntos=args.max_puntos, bins=args.bins)
+    print(f"Tablero: {ruta} ({tamano / 1024:.1f} KiB, {len(data):,} filas, "
+          f"{time.perf_counter() - inicio:.2f} s)")
+    return 0
+
+
+# ==============================================================================
+# Plantilla (HTML + CSS + JavaScript sin bibliotecas; dibuja en <canvas>)
+# ==============================================================================
+
+PLANTILLA_HTML = r"""<!DOCTYPE html>
+<html lang="es">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITULO__</title>
+<style>
+  body { margin: 0; font: 13px system-ui, sans-serif; color: #222; background: #f4f5f7; display: flex; }
+  aside { width: 230px; flex: none; padding: 12px; background: #fff; border-right: 1px solid #ddd;
+          height: 100vh; box-sizing: border-box; overflow-y: auto; position: sticky; top: 0; }
+  main { flex: 1; padding: 12px; display: grid; grid-template-columns: repeat(auto-fill, minmax(520px, 1fr)); gap: 12px; }
+  h1 { font-size: 16px; margin: 0 0 8px; }
+  h2 { font-size: 13px; margin: 0 0 6px; display: flex; gap: 6px; align-items: center; flex-wrap: wrap; }
+  section { background: #fff; border: 1px solid #ddd; border-radius: 4px; padding: 8px; }
+  canvas { width: 100%; height: 320px; display: block; }
+  select { max-width: 220px; font-size: 12px; }
+  .pais { display: block; white-space: nowrap; }
+  .nota { color: #666; font-size: 11px; margin: 6px 0; }
+  button { font-size: 11px; margin-right: 4px; }
+</style>
+</head>
+<body>
+<aside>
+  <h1>__TITULO__</h1>
+  <div class="nota" id="resumen"></div>
+  <b>Años</b>
+  <div>Desde <select id="desde"></select> hasta <select id="hasta"></select></div>
+  <p><b>Países</b><br><button id="todos">Todos</button><button id="ninguno">Ninguno</button></p>
+  <div id="paises"></div>
+</aside>
+<main>
+  <section><h2>Líneas: <select id="m-lineas"></select></h2><canvas id="c-lineas"></canvas></section>
+  <section><h2>Barras: <select id="m-barras1"></select> y <select id="m-barras2"></select></h2><canvas id="c-barras"></canvas></section>
+  <section><h2>Dispersión (sumas): <select id="m-x"></select> frente a <select id="m-y"></select></h2><canvas id="c-dispersion"></canvas></section>
+  <section><h2>Correlación entre métricas (promedio por país)</h2><canvas id="c-correlacion"></canvas></section>
+  <section><h2>Pasteles: <select id="m-pastel1"></select> y <select id="m-pastel2"></select></h2><canvas id="c-pastel"></canvas></section>
+  <section><h2>Histograma (todos los años): <select id="m-hist"></select></h2><canvas id="c-hist"></canvas></section>
+</main>
+<script id="datos" type="application/json">__DATOS__</script>
+<script>
+"use strict";
+const D = JSON.parse(document.getElementById('datos').textContent);
+const P = D.paises.length, A = D.años.length, M = D.metricas.length;
+const COLORES = ['#1f77b4','#ff7f0e','#2ca02c','#d62728','#9467bd','#8c564b','#e377c2','#7f7f7f','#bcbd22','#17becf'];
+const color = i => COLORES[i % COLORES.length];
+const $ = id => document.getElementById(id);
+const seleccion = new Array(P).fill(true);
+
+// ---- Filtros -----------------------------------------------------------------
+function opciones(sel, textos, valor) {
+  textos.forEach((t, i) => sel.add(new Option(t, i)));
+  sel.value = valor;
+  sel.onchange = programar;
+}
+const idx = (nombre, defecto) => Math.max(0, D.metricas.indexOf(nombre) >= 0 ? D.metricas.indexOf(nombre) : defecto);
+const etiquetasAño = D.años.map(a => D.ancho_años > 1 ? a + '–' + Math.min(a + D.ancho_años - 1, D.año_final) : String(a));
+opciones($('desde'), etiquetasAño, 0);
+opciones($('hasta'), etiquetasAño, A - 1);
+opciones($('m-lineas'), D.metricas, idx('Renewable Energy Share (%)', 0));
+opciones($('m-barras1'), D.metricas, idx('Renewable Energy Share (%)', 0));
+opciones($('m-barras2'), D.metricas, idx('Fossil Fuel Dependency (%)', Math.min(1, M - 1)));
+opciones($('m-x'), D.metricas, idx('Total Energy Consumption (TWh)', 0));
+opciones($('m-y'), D.metricas, idx('Carbon Emissions (Million Tons)', Math.min(1, M - 1)));
+opciones($('m-pastel1'), D.metricas, idx('Industrial Energy Use (%)', 0));
+opciones($('m-pastel2'), D.metricas, idx('Household Energy Use (%)', Math.min(1, M - 1)));
+opciones($('m-hist'), D.metricas, idx('Renewable Energy Share (%)', 0));
+D.paises.forEach((p, i) => {
+  const l = document.createElement('label');
+  l.className = 'pais';
+  l.innerHTML = '<input type="checkbox" checked> <span style="color:' + color(i) + '">■</span> ';
+  l.append(p);
+  l.firstChild.onchange = e => { seleccion[i] = e.target.checked; programar(); };
+  $('paises').append(l);
+});
+function marcar(v) {
+  seleccion.fill(v);
+  document.querySelectorAll('#paises input').forEach(c => c.checked = v);
+  programar();
+}
+$('todos').onclick = () => marcar(true);
+$('ninguno').onclick = () => marcar(false);
+$('resumen').textContent = D.filas.toLocaleString() + ' filas, ' + D.paises_originales + ' países' +
+  (D.paises_originales > P ? ' (' + (D.paises_originales - P + 1) + ' en "Otros")' : '') +
+  (D.ancho_años > 1 ? ', tramos de ' + D.ancho_años + ' años' : '');
+
+// ---- Agregados a partir de sumas y conteos ----------------------------------
+function rango() {
+  const a = +$('desde').value, b = +$('hasta').value;
+  return [Math.min(a, b), Math.max(a, b)];
+}
+function totalPais(m, p, a0, a1) {
+  let s = 0, c = 0;
+  for (let a = a0; a <= a1; a++) { s += D.sumas[m][p * A + a]; c += D.conteos[m][p * A + a]; }
+  return [s, c];
+}
+const mediaPais = (m, p, a0, a1) => { const [s, c] = totalPais(m, p, a0, a1); return c ? s / c : null; };
+const elegidos = () => seleccion.map((v, i) => v ? i : -1).filter(i => i >= 0);
+
+// ---- Dibujo --------------------------------------------------------------------
+function lienzo(id) {
+  const cv = $(id), r = window.devicePixelRatio || 1;
+  const w = cv.clientWidth, h = cv.clientHeight;
+  cv.width = w * r; cv.height = h * r;
+  const ctx = cv.getContext('2d');
+  ctx.setTransform(r, 0, 0, r, 0, 0);
+  ctx.font = '11px system-ui, sans-serif';
+  return [ctx, w, h];
+}
+function marcas(min, max, n) {
+  if (!(max > min)) { max = min + 1; }
+  const paso0 = (max - min) / n, e = Math.pow(10, Math.floor(Math.log10(paso0)));
+  const paso = [1, 2, 5, 10].map(f => f * e).find(p => p >= paso0);
+  const r = [];
+  for (let v = Math.ceil(min / paso) * paso; v <= max + paso * 1e-9; v += paso) r.push(+v.toPrecision(12));
+  return r;
+}
+const formato = v => Math.abs(v) >= 1e4 ? (v / 1e3).toFixed(0) + 'k' : +v.toPrecision(4) + '';
+function ejes(ctx, w, h, xmin, xmax, ymin, ymax, opts) {
+  const m = { l: 52, r: 10, t: 8, b: opts.etiquetasX ? 70 : 26 };
+  if (!(xmax > xmin)) { xmin -= 0.5; xmax += 0.5; }
+  if (!(ymax > ymin)) { ymin -= 0.5; ymax += 0.5; }
+  const X = v => m.l + (v - xmin) / (xmax - xmin) * (w - m.l - m.r);
+  const Y = v => h - m.b - (v - ymin) / (ymax - ymin) * (h - m.t - m.b);
+  ctx.strokeStyle = '#e5e5e5'; ctx.fillStyle = '#555'; ctx.textAlign = 'right'; ctx.textBaseline = 'middle';
+  for (const v of marcas(ymin, ymax, 5)) {
+    ctx.beginPath(); ctx.moveTo(m.l, Y(v)); ctx.lineTo(w - m.r, Y(v)); ctx.stroke();
+    ctx.fillText(formato(v), m.l - 4, Y(v));
+  }
+  ctx.textAlign = 'center'; ctx.textBaseline = 'top';
+  if (opts.etiquetasX) {
+    opts.etiquetasX.forEach((t, i) => {
+      ctx.save(); ctx.translate(X(i), h - m.b + 4); ctx.rotate(-Math.PI / 4);
+      ctx.textAlign = 'right'; ctx.fillText(t.length > 14 ? t.slice(0, 13) + '…' : t, 0, 0); ctx.restore();
+    });
+  } else {
+    for (const v of marcas(xmin, xmax, 6)) ctx.fillText(opts.formatoX ? opts.formatoX(v) : formato(v), X(v), h - m.b + 4);
+  }
+  ctx.strokeStyle = '#999'; ctx.beginPath(); ctx.moveTo(m.l, m.t); ctx.lineTo(m.l, h - m.b); ctx.lineTo(w - m.r, h - m.b); ctx.stroke();
+  return [X, Y];
+}
+function extremos(valores) {
+  let min = Infinity, max = -Infinity;
+  for (const v of valores) if (v !== null && isFinite(v)) { if (v < min) min = v; if (v > max) max = v; }
+  return min <= max ? [min, max] : [0, 1];
+}
+function vacio(ctx, w, h) {
+  ctx.fillStyle = '#888'; ctx.textAlign = 'center'; ctx.fillText('Sin datos para la selección', w / 2, h / 2);
+}
+
+function dibujarLineas() {
+  const [ctx, w, h] = lienzo('c-lineas'), m = +$('m-lineas').value, [a0, a1] = rango(), ps = elegidos();
+  const series = ps.map(p => D.años.map((_, a) => mediaPais(m, p, a, a)));
+  const valores = series.flatMap(s => s.slice(a0, a1 + 1));
+  if (!valores.some(v => v !== null)) return vacio(ctx, w, h);
+  const [ymin, ymax] = extremos(valores);
+  const [X, Y] = ejes(ctx, w, h, D.años[a0], D.años[a1], ymin, ymax, { formatoX: v => String(Math.round(v)) });
+  ctx.lineWidth = 1.5;
+  ps.forEach((p, k) => {
+    ctx.strokeStyle = color(p); ctx.beginPath();
+    let abierto = false;
+    for (let a = a0; a <= a1; a++) {
+      const v = series[k][a];
+      if (v === null) { abierto = false; continue; }
+      abierto ? ctx.lineTo(X(D.años[a]), Y(v)) : ctx.moveTo(X(D.años[a]), Y(v));
+      abierto = true;
+    }
+    ctx.stroke();
+  });
+}
+
+function dibujarBarras() {
+  const [ctx, w, h] = lienzo('c-barras'), m1 = +$('m-barras1').value, m2 = +$('m-barras2').value;
+  const [a0, a1] = rango(), ps = elegidos();
+  const v1 = ps.map(p => mediaPais(m1, p, a0, a1)), v2 = ps.map(p => mediaPais(m2, p, a0, a1));
+  if (!ps.length) return vacio(ctx, w, h);
+  const [, ymax] = extremos(v1.concat(v2));
+  const [X, Y] = ejes(ctx, w, h, -0.5, ps.length - 0.5, 0, Math.max(ymax, 0), { etiquetasX: ps.map(p => D.paises[p]) });
+  const ancho = (X(1) - X(0)) * 0.4;
+  ps.forEach((p, i) => {
+    [[v1[i], '#009688', -ancho], [v2[i], '#23bac4', 0]].forEach(([v, c, d]) => {
+      if (v === null) return;
+      ctx.fillStyle = c; ctx.fillRect(X(i) + d, Y(v), ancho, Y(0) - Y(v));
+    });
+  });
+  ctx.textAlign = 'left'; ctx.textBaseline = 'top';
+  [[m1, '#009688'], [m2, '#23bac4']].forEach(([m, c], k) => {
+    ctx.fillStyle = c; ctx.fillRect(60, 10 + k * 14, 10, 10);
+    ctx.fillStyle = '#333'; ctx.fillText(D.metricas[m], 74, 9 + k * 14);
+  });
+}
+
+function dibujarDispersion() {
+  const [ctx, w, h] = lienzo('c-dispersion'), mx = +$('m-x').value, my = +$('m-y').value;
+  const [a0, a1] = rango(), ps = elegidos().filter(p => totalPais(mx, p, a0, a1)[1] && totalPais(my, p, a0, a1)[1]);
+  if (!ps.length) return vacio(ctx, w, h);
+  const x = ps.map(p => totalPais(mx, p, a0, a1)[0]), y = ps.map(p => totalPais(my, p, a0, a1)[0]);
+  const [xmin, xmax] = extremos(x), [ymin, ymax] = extremos(y);
+  const dx = (xmax - xmin) * 0.05 || 1, dy = (ymax - ymin) * 0.05 || 1;
+  const [X, Y] = ejes(ctx, w, h, xmin - dx, xmax + dx, ymin - dy, ymax + dy, {});
+  ctx.textAlign = 'right'; ctx.textBaseline = 'bottom';
+  ps.forEach((p, i) => {
+    ctx.fillStyle = color(p); ctx.globalAlpha = 0.8;
+    ctx.beginPath(); ctx.arc(X(x[i]), Y(y[i]), 4, 0, 2 * Math.PI); ctx.fill();
+    ctx.globalAlpha = 1; ctx.fillStyle = '#333';
+    if (ps.length <= 30) ctx.fillText(D.paises[p], X(x[i]) - 3, Y(y[i]) - 3);
+  });
+}
+
+function pearson(a, b) {
+  const pares = a.map((v, i) => [v, b[i]]).filter(([u, v]) => u !== null && v !== null);
+  const n = pares.length;
+  if (n < 2) return null;
+  let su = 0, sv = 0; for (const [u, v] of pares) { su += u; sv += v; }
+  const mu = su / n, mv = sv / n;
+  let cuv = 0, cuu = 0, cvv = 0;
+  for (const [u, v] of pares) { cuv += (u - mu) * (v - mv); cuu += (u - mu) ** 2; cvv += (v - mv) ** 2; }
+  return cuu && cvv ? cuv / Math.sqrt(cuu * cvv) : null;
+}
+function dibujarCorrelacion() {
+  const [ctx, w, h] = lienzo('c-correlacion'), [a0, a1] = rango(), ps = elegidos();
+  // Sin filtros se usa la matriz precalculada con todos los países (incluidos los de 'Otros')
+  const completo = ps.length === P && a0 === 0 && a1 === A - 1;
+  const medias = D.metricas.map((_, m) => ps.map(p => mediaPais(m, p, a0, a1)));
+  const r = (i, j) => completo ? D.correlacion[i * M + j] : pearson(medias[i], medias[j]);
+  const izq = 150, lado = Math.min((w - izq - 10) / M, (h - 20) / M);
+  const corto = t => t.length > 24 ? t.slice(0, 23) + '…' : t;
+  ctx.textBaseline = 'middle';
+  for (let i = 0; i < M; i++) {
+    ctx.fillStyle = '#333'; ctx.textAlign = 'right'; ctx.fillText(corto(D.metricas[i]), izq - 4, 10 + (i + 0.5) * lado);
+    for (let j = 0; j < M; j++) {
+      const v = r(i, j), x0 = izq + j * lado, y0 = 10 + i * lado;
+      const t = v === null ? 0 : Math.abs(v);
+      ctx.fillStyle = v === null ? '#eee' : v >= 0 ? `rgba(214,39,40,${t})` : `rgba(31,119,180,${t})`;
+      ctx.fillRect(x0, y0, lado - 1, lado - 1);
+      if (lado > 26) {
+        ctx.fillStyle = t > 0.6 ? '#fff' : '#333'; ctx.textAlign = 'center';
+        ctx.fillText(v === null ? '–' : v.toFixed(2), x0 + lado / 2, y0 + lado / 2);
+      }
+    }
+  }
+}
+
+function dibujarPasteles() {
+  const [ctx, w, h] = lienzo('c-pastel'), m1 = +$('m-pastel1').value, m2 = +$('m-pastel2').value;
+  const [a0, a1] = rango(), ps = elegidos();
+  if (!ps.length) return vacio(ctx, w, h);
+  const cols = Math.ceil(Math.sqrt(ps.length * w / h)), filas = Math.ceil(ps.length / cols);
+  const cw = w / cols, ch = (h - 18) / filas, radio = Math.max(2, Math.min(cw, ch - 14) / 2 - 4);
+  ps.forEach((p, k) => {
+    const cx = (k % cols + 0.5) * cw, cy = Math.floor(k / cols) * ch + 14 + radio;
+    const v = [mediaPais(m1, p, a0, a1) || 0, mediaPais(m2, p, a0, a1) || 0], total = v[0] + v[1];
+    ctx.fillStyle = '#333'; ctx.textAlign = 'center'; ctx.textBaseline = 'bottom';
+    ctx.fillText(D.paises[p], cx, cy - radio - 1);
+    if (!(total > 0)) return;
+    let ang = -Math.PI / 2;
+    v.forEach((x, i) => {
+      const fin = ang + 2 * Math.PI * x / total;
+      ctx.fillStyle = ['#009688', '#23bac4'][i];
+      ctx.beginPath(); ctx.moveTo(cx, cy); ctx.arc(cx, cy, radio, ang, fin); ctx.fill();
+      if (radio > 30) {
+        const medio = (ang + fin) / 2;
+        ctx.fillStyle = '#fff'; ctx.textBaseline = 'middle';
+        ctx.fillText((100 * x / total).toFixed(1) + '%', cx + Math.cos(medio) * radio * 0.6, cy + Math.sin(medio) * radio * 0.6);
+      }
+      ang = fin;
+    });
+  });
+  ctx.textAlign = 'left'; ctx.textBaseline = 'top';
+  [[m1, '#009688'], [m2, '#23bac4']].forEach(([m, c], k) => {
+    const x0 = 4 + k * w / 2;
+    ctx.fillStyle = c; ctx.fillRect(x0, h - 14, 10, 10);
+    ctx.fillStyle = '#333'; ctx.fillText(D.metricas[m], x0 + 14, h - 15);
+  });
+}
+
+function dibujarHistograma() {
+  const [ctx, w, h] = lienzo('c-hist'), m = +$('m-hist').value, ps = elegidos(), b = D.bordes[m];
+  const conteos = new Array(D.bins).fill(0);
+  for (const p of ps) for (let k = 0; k < D.bins; k++) conteos[k] += D.histogramas[m][p * D.bins + k];
+  if (!conteos.some(c => c)) return vacio(ctx, w, h);
+  const [X, Y] = ejes(ctx, w, h, b[0], b[D.bins], 0, Math.max(...conteos), {});
+  ctx.fillStyle = '#2a9d8f';
+  conteos.forEach((c, k) => ctx.fillRect(X(b[k]) + 0.5, Y(c), Math.max(1, X(b[k + 1]) - X(b[k]) - 1), Y(0) - Y(c)));
+}
+
+// ---- Redibujo (como mucho una vez por cuadro) ---------------------------------
+let pendiente = false;
+function programar() {
+  if (pendiente) return;
+  pendiente = true;
+  requestAnimationFrame(() => {
+    pendiente = false;
+    dibujarLineas(); dibujarBarras(); dibujarDispersion(); dibujarCorrelacion(); dibujarPasteles(); dibujarHistograma();
+  });
+}
+window.addEventListener('resize', programar);
+programar();
+</script>
+</body>
+</html>
+"""
+
+
+if __name__ == '__main__':
+    sys.exit(main())
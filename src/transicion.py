@@ -0,0 +1,231 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .carga_datos import COLUMNA_PAIS, COLUMNA_AÑO
+
+# ==============================================================================
+# Métricas de transición energética sobre un panel denso País x Año x Métrica
+# ==============================================================================
+
+CONSUMO = 'Total Energy Consumption (TWh)'
+RENOVABLE = 'Renewable Energy Share (%)'
+FOSIL = 'Fossil Fuel Dependency (%)'
+
+
+def _primera_valida(valores):
+    """Índice (por fila) de la primera columna no nula; -1 si la fila es toda NaN."""
+    validos = ~np.isnan(valores)
+    return np.where(validos.any(axis=1), validos.argmax(axis=1), -1)
+
+
+def _ultima_valida(valores):
+    """Índice (por fila) de la última columna no nula; -1 si la fila es toda NaN."""
+    validos = ~np.isnan(valores)
+    return np.where(validos.any(axis=1), valores.shape[1] - 1 - validos[:, ::-1].argmax(axis=1), -1)
+
+
+def _tomar(valores, indices):
+    """valores[i, indices[i]] por fila, con NaN donde indices es -1."""
+    filas = np.arange(valores.shape[0])
+    return np.where(indices >= 0, valores[filas, np.maximum(indices, 0)], np.nan)
+
+
+@dataclass
+class PanelTransicion:
+    """
+    Datos agregados por (Country, Year) en un arreglo denso.
+
+    Atributos:
+        - paises: Índice de pandas con los países en orden ascendente.
+        - años: Arreglo con todos los años consecutivos entre el primero y el último
+          (los años sin datos de un país quedan como NaN).
+        - metricas: Lista de métricas (tercera dimensión).
+        - valores: Arreglo float64 de forma (países, años, métricas).
+    """
+    paises: pd.Index
+    años: np.ndarray
+    metricas: list
+    valores: np.ndarray
+
+    @classmethod
+    def construir(cls, data, metricas=None, col_grupo=COLUMNA_PAIS, col_tiempo=COLUMNA_AÑO, cubo=None):
+        """
+        Entradas:
+            - data: Dataframe con los datos originales (una o varias filas por país y año).
+            - metricas: Columnas a incluir (por defecto todas las numéricas restantes).
+            - col_grupo, col_tiempo: Columnas de país y de año.
+            - cubo: CuboAgregado precalculado (opcional); si lo cubre, no se agrupa data.
+        Salida:
+            - Un PanelTransicion con la media de cada métrica por país y año.
+        """
+        if metricas is None:
+            fuente = cubo.metricas if cubo is not None else data.select_dtypes('number').columns
+            metricas = [c for c in fuente if c not in (col_grupo, col_tiempo)]
+        metricas = list(metricas)
+
+        if cubo is not None and cubo.cubre([col_grupo, col_tiempo], metricas):
+            medias = cubo.media([col_grupo, col_tiempo], metricas)
+        else:
+            medias = data.groupby([col_grupo, col_tiempo], observed=True)[metricas].mean()
+
+        grupos = medias.index.get_level_values(0)
+        tiempos = np.asarray(medias.index.get_level_values(1), dtype=np.int64)
+        codigos, paises = pd.factorize(grupos, sort=True)
+        años = np.arange(tiempos.min(), tiempos.max() + 1) if len(tiempos) else np.array([], dtype=np.int64)
+
+        valores = np.full((len(paises), len(años), len(metricas)), np.nan)
+        valores[codigos, tiempos - (años[0] if len(años) else 0)] = medias.to_numpy(dtype=np.float64)
+        return cls(pd.Index(paises, name=col_grupo), años, metricas, valores)
+
+    def serie(self, metrica):
+        """Vista (sin copia) de una métrica: arreglo (países, años)."""
+        return self.valores[:, :, self.metricas.index(metrica)]
+
+    def tabla(self, metrica):
+        """La métrica como dataframe (países x años)."""
+        return pd.DataFrame(self.serie(metrica), index=self.paises, columns=pd.Index(self.años, name=COLUMNA_AÑO))
+
+    def _tabla(self, valores):
+        return pd.DataFrame(valores, index=self.paises, columns=pd.Index(self.años, name=COLUMNA_AÑO))
+
+    def variacion_anual(self, metrica, relativa=False):
+        """
+        Variación respecto al año anterior (países x años; el primer año es NaN).
+        Si falta alguno de los dos años la variación es NaN. Con relativa=True se
+        devuelve el cambio porcentual.
+        """
+        v = self.serie(metrica)
+        delta = np.full_like(v, np.nan)
+        delta[:, 1:] = v[:, 1:] - v[:, :-1]
+        if relativa:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                delta[:, 1:] = np.where(v[:, :-1] != 0, delta[:, 1:] / np.abs(v[:, :-1]) * 100, np.nan)
+        return self._tabla(delta)
+
+    def cagr(self, metrica, año_inicio=None, año_fin=None):
+        """
+        Tasa de crecimiento anual compuesta (en %) de cada país entre su primer y su
+        último año con datos dentro de [año_inicio, año_fin]. Es NaN si el país tiene
+        menos de dos años con datos o algún extremo no es positivo.
+        """
+        desde = 0 if año_inicio is None else int(np.searchsorted(self.años, año_inicio))
+        hasta = len(self.años) if año_fin is None else int(np.searchsorted(self.años, año_fin, side='right'))
+        v = self.serie(metrica)[:, desde:hasta]
+        primera, ultima = _primera_valida(v), _ultima_valida(v)
+        inicial, final = _tomar(v, primera), _tomar(v, ultima)
+        periodos = (ultima - primera).astype(np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tasa = np.where((periodos > 0) & (inicial > 0) & (final > 0),
+                            (final / inicial) ** (1 / periodos) - 1, np.nan)
+        return pd.Series(tasa * 100, index=self.paises, name=f'CAGR {metrica}')
+
+    def pendiente_movil(self, metrica, ventana=5, min_periodos=3):
+        """
+        Pendiente de mínimos cuadrados (unidades por año) en una ventana móvil de 'ventana'
+        años que termina en cada año (países x años). Los años sin datos se omiten y la
+        pendiente es NaN si la ventana tiene menos de min_periodos años con datos.
+        Con ventana=None se usa todo el periodo (una pendiente por país).
+        """
+        v = self.serie(metrica)
+        validos = ~np.isnan(v)
+        # Años centrados para reducir el error de redondeo de las sumas
+        t = np.broadcast_to(self.años - self.años.mean(), v.shape)
+        y = np.where(validos, v, 0.0)
+        x = np.where(validos, t, 0.0)
+        sumas = [validos.astype(np.float64), x, y, x * y, x * x]
+
+        if ventana is None:
+            n, sx, sy, sxy, sxx = (s.sum(axis=1) for s in sumas)
+        else:
+            def _suma_movil(s):
+                acumulada = np.concatenate([np.zeros((s.shape[0], 1)), np.cumsum(s, axis=1)], axis=1)
+                inicio = np.maximum(np.arange(1, s.shape[1] + 1) - ventana, 0)
+                return acumulada[:, 1:] - acumulada[:, inicio]
+            n, sx, sy, sxy, sxx = (_suma_movil(s) for s in sumas)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            denominador = n * sxx - sx * sx
+            pendiente = np.where((n >= min_periodos) & (denominador > 0), (n * sxy - sx * sy) / denominador, np.nan)
+
+        if ventana is None:
+            return pd.Series(pendiente, index=self.paises, name=f'Pendiente {metrica}')
+        return self._tabla(pendiente)
+
+    def años_hasta(self, objetivo, metrica=RENOVABLE, ventana=5, min_periodos=3):
+        """
+        Entradas:
+            - objetivo: Valor a alcanzar (ej: 50 para 50 % de renovables).
+            - metrica: Métrica que se proyecta.
+            - ventana, min_periodos: Ventana de la pendiente con la que se proyecta.
+        Salida:
+            - Dataframe por país con el último valor, su año, la pendiente reciente y los
+              años estimados para llegar al objetivo con una proyección lineal: 0 si ya se
+              alcanzó, inf si la pendiente no va hacia el objetivo, NaN si no hay datos
+              suficientes. 'año_estimado' es el último año con datos más esos años.
+        """
+        v = self.serie(metrica)
+        ultima = _ultima_valida(v)
+        valor = _tomar(v, ultima)
+        año_ultimo = np.where(ultima >= 0, self.años[np.maximum(ultima, 0)], -1)
+        pendiente = _tomar(self.pendiente_movil(metrica, ventana, min_periodos).to_numpy(), ultima)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            faltante = objetivo - valor
+            años = np.where(faltante <= 0, 0.0, np.where(pendiente > 0, faltante / pendiente, np.inf))
+        años = np.where(np.isnan(valor) | (np.isnan(pendiente) & (faltante > 0)), np.nan, años)
+
+        return pd.DataFrame({
+            'ultimo_valor': valor,
+            'ultimo_año': np.where(año_ultimo >= 0, año_ultimo, np.nan),
+            'pendiente': pendiente,
+            'años_hasta_objetivo': años,
+            'año_estimado': np.where(np.isfinite(años), año_ultimo + np.ceil(años), np.nan),
+        }, index=self.paises)
+
+    def ranking_inercia(self, metrica=FOSIL):
+        """
+        Ranking de inercia de la matriz energética: cuanto menos baja (o más sube) la
+        métrica a lo largo del periodo, mayor la inercia.
+
+        Salida:
+            - Dataframe por país con la pendiente de todo el periodo (unidades por año),
+              la variación total (último - primer valor), la volatilidad (desviación
+              estándar de las variaciones anuales) y 'posicion' (1 = mayor inercia),
+              ordenado por posición. Los países sin pendiente quedan al final.
+        """
+        v = self.serie(metrica)
+        pendiente = self.pendiente_movil(metrica, ventana=None, min_periodos=2).to_numpy()
+        variacion = _tomar(v, _ultima_valida(v)) - _tomar(v, _primera_valida(v))
+        deltas = np.diff(v, axis=1)
+        validos = ~np.isnan(deltas)
+        n = validos.sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            media = np.where(validos, deltas, 0).sum(axis=1) / n
+            volatilidad = np.sqrt(np.where(validos, (deltas - media[:, None]) ** 2, 0).sum(axis=1) / (n - 1))
+        volatilidad = np.where(n >= 2, volatilidad, np.nan)
+
+        resultado = pd.DataFrame({'pendiente': pendiente, 'variacion_total': variacion,
+                                  'volatilidad': volatilidad}, index=self.paises)
+        resultado = resultado.sort_values('pendiente', ascending=False, na_position='last', kind='stable')
+        resultado['posicion'] = np.arange(1, len(resultado) + 1)
+        return resultado
+
+    def resumen(self, objetivo_renovable=50, ventana=5):
+        """
+        Tabla por país con el CAGR del consumo, la pendiente reciente de renovables, los
+        años estimados hasta objetivo_renovable y la posición en el ranking de inercia fósil.
+        """
+        partes = {}
+        if CONSUMO in self.metricas:
+            partes['cagr_consumo_%'] = self.cagr(CONSUMO)
+        if RENOVABLE in self.metricas:
+            hasta = self.años_hasta(objetivo_renovable, RENOVABLE, ventana)
+            partes['pendiente_renovable'] = hasta['pendiente']
+            partes[f'años_hasta_{objetivo_renovable:g}%_renovable'] = hasta['años_hasta_objetivo']
+        if FOSIL in self.metricas:
+            inercia = self.ranking_inercia(FOSIL)
+            partes['pendiente_fosil'] = inercia['pendiente']
+            partes['posicion_inercia_fosil'] = inercia['posicion']
+        return pd.DataFrame(partes, index=self.paises)
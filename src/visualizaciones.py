@@ -1,80 +1,167 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import matplotlib
 import os
-import ipywidgets as widgets
-from ipywidgets import interact, fixed, interactive, VBox, HBox
+
+from .cache_figuras import con_cache, registrar_guardado
+from .instrumentacion import etapa, instrumentar
+from .densidad import kde_fft, HistogramaIncremental
+from .consulta import IndiceConsulta
+from . import salida_figuras
+from .salida_figuras import limpiar_nombre
+
+# ==============================================================================
+# Configuración de salida de las figuras
+# ==============================================================================
+
+# Carpeta donde se guardan las figuras (relativa a notebooks/ por defecto)
+RUTA_FIGURAS = os.path.join('..', 'reporte', 'figuras')
+
+# Si es False las figuras solo se guardan y se cierran (modo por lotes, sin pantalla)
+MOSTRAR_FIGURAS = True
+
+
+def _guardar_figura(ruta_completa, **kwargs):
+    """
+    Guarda la figura actual y la registra en la caché de figuras (si está activa).
+    Con un escritor activo (salida_figuras.activar_escritor) aquí solo se rasteriza la
+    figura; la compresión y la escritura siguen en segundo plano con el formato, dpi y
+    compresión del reporte.
+    """
+    import matplotlib.pyplot as plt
+
+    escritor = salida_figuras.ESCRITOR_ACTIVO
+    with etapa('guardado'):
+        if escritor is not None:
+            ruta_completa = escritor.guardar(plt.gcf(), ruta_completa, **kwargs)
+        else:
+            plt.savefig(ruta_completa, **kwargs)
+    registrar_guardado(ruta_completa)
+
+
+def _contexto_cache():
+    # Carpeta absoluta: la caché restaura a rutas absolutas, así que la misma clave desde
+    # otro directorio de trabajo no debe apuntar a la carpeta de salida anterior
+    return os.path.abspath(RUTA_FIGURAS) + salida_figuras.descripcion_salida()
+
+
+def _mostrar_figura():
+    """Muestra la figura actual o, en modo por lotes, la cierra para liberar memoria."""
+    import matplotlib.pyplot as plt
+
+    with etapa('mostrar'):
+        if MOSTRAR_FIGURAS:
+            plt.show()
+        else:
+            plt.close()
+
+
+def _categorias_presentes(serie):
+    """Quita las categorías sin filas (seaborn dibuja un espacio vacío por cada categoría del tipo)."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.remove_unused_categories()
+    return serie
 
 # ==============================================================================
 # Funcióin para crear histogramas
 # ==============================================================================
 
-def crear_histograma(data, nombre_col, etiqueta_eje_x, etiqueta_eje_y):
+@instrumentar
+@con_cache('nombre_col', contexto=_contexto_cache)
+def crear_histograma(data, nombre_col, etiqueta_eje_x, etiqueta_eje_y, rapido=False):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
         - nombre_col: Nombre de la columna que se va a graficar.
         - etiqueta_eje_x: Es la etiqueta del eje x.
         - etiqueta_eje_y: Es la etiqueta del eje y.
+        - rapido: Si es True los conteos se calculan por bloques con HistogramaIncremental
+          y se dibujan las 24 barras ya contadas (mismo resultado que plt.hist, sin que
+          matplotlib procese la columna completa).
     salida: 
         - Un gráfico con un histograma.
         - El gráfico se guarda como un archivo PNG en la ruta '../reporte/figuras/'
           con un nombre de archivo generado a partir del nombre de nombre_col.
         - El gráfico también se muestra en pantalla.
     """
-    plt.hist(data[nombre_col], bins=24, alpha=0.5, color='blue', edgecolor='black')
-    plt.xlabel(etiqueta_eje_x)
-    plt.ylabel(etiqueta_eje_y)
-    plt.title('Histograma de ' + nombre_col)
+    import matplotlib.pyplot as plt
+
+    with etapa('dibujo'):
+        if rapido:
+            histograma = HistogramaIncremental.desde_valores(data[nombre_col], bins=24)
+            plt.hist(histograma.bordes[:-1], bins=histograma.bordes, weights=histograma.conteos,
+                     alpha=0.5, color='blue', edgecolor='black')
+        else:
+            plt.hist(data[nombre_col], bins=24, alpha=0.5, color='blue', edgecolor='black')
+        plt.xlabel(etiqueta_eje_x)
+        plt.ylabel(etiqueta_eje_y)
+        plt.title('Histograma de ' + nombre_col)
     
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Histograma_" + nombre_col.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Histograma_" + limpiar_nombre(nombre_col)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
-    plt.show()
+    _guardar_figura(ruta_completa)
+    _mostrar_figura()
 
 # ==============================================================================
 # Función para crear un grafico KDE (similar a la función de densidad de probabilidad)
 # ==============================================================================
 
-def crear_grafico_kde(data, nombre_col, etiqueta_eje_x, etiqueta_eje_y):
+@instrumentar
+@con_cache('nombre_col', contexto=_contexto_cache)
+def crear_grafico_kde(data, nombre_col, etiqueta_eje_x, etiqueta_eje_y, rapido=False):
     """
     Entradas: 
         - data: Es la información que se va a graficar (dataframe).
         - nombre_col: Nombre de la columna que se va a graficar.
         - etiqueta_eje_x: Es la etiqueta del eje x.
         - etiqueta_eje_y: Es la etiqueta del eje y.
+        - rapido: Si es True la densidad se calcula con densidad.kde_fft (agrupamiento
+          lineal + FFT, error < 1e-4 del máximo frente a seaborn) en lugar de evaluar el
+          kernel en cada dato; pensado para columnas de millones de filas.
     Salida: 
         - Un gráfico con un grafico KDE.
         - El gráfico se guarda como un archivo PNG en la ruta '../reporte/figuras/'
           con un nombre de archivo generado a partir del nombre de nombre_col.
         - El gráfico también se muestra en pantalla.
     """
-    sns.kdeplot(data[nombre_col], fill=True, color='skyblue')
-    plt.title('Grafico KDE de ' + nombre_col)
-    plt.xlabel(etiqueta_eje_x)
-    plt.ylabel(etiqueta_eje_y)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    with etapa('dibujo'):
+        if rapido:
+            # Mismo estilo que sns.kdeplot(fill=True): relleno con alpha 0.25 y borde opaco
+            soporte, densidad = kde_fft(data[nombre_col])
+            ax = plt.gca()
+            ax.fill_between(soporte, 0, densidad, facecolor=matplotlib.colors.to_rgba('skyblue', 0.25), edgecolor='skyblue')
+            ax.set_ylim(bottom=0)
+        else:
+            sns.kdeplot(data[nombre_col], fill=True, color='skyblue')
+        plt.title('Grafico KDE de ' + nombre_col)
+        plt.xlabel(etiqueta_eje_x)
+        plt.ylabel(etiqueta_eje_y)
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "KDE_" + nombre_col.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "KDE_" + limpiar_nombre(nombre_col)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
-    plt.show()
+    _guardar_figura(ruta_completa)
+    _mostrar_figura()
 
 # ==============================================================================
 # Bloxplot
 # ==============================================================================
+@instrumentar
+@con_cache('nombre_col1', 'nombre_col2', contexto=_contexto_cache)
 def crear_boxplot(data, nombre_col1, nombre_col2, titulo, etiqueta_eje_x, etiqueta_eje_y):
     """
     Entradas:
@@ -92,91 +179,130 @@ def crear_boxplot(data, nombre_col1, nombre_col2, titulo, etiqueta_eje_x, etique
           con un nombre de archivo generado a partir del nombre de la columna del eje y.
         - El gráfico también se muestra en pantalla.
     """
-    sns.boxplot(x = data[nombre_col1], y = data[nombre_col2], hue = data[nombre_col1], palette='viridis')
-    plt.title(titulo, fontsize=16)
-    plt.xlabel(etiqueta_eje_x, fontsize=12)
-    plt.ylabel(etiqueta_eje_y, fontsize=12)
-
-    # Estética extra
-    sns.despine(offset=10, trim=True)  # Quitar bordes innecesarios
-    plt.tight_layout()                 # Evita recortes de texto
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    with etapa('dibujo'):
+        grupos = _categorias_presentes(data[nombre_col1])
+        sns.boxplot(x = grupos, y = data[nombre_col2], hue = grupos, palette='viridis')
+        plt.title(titulo, fontsize=16)
+        plt.xlabel(etiqueta_eje_x, fontsize=12)
+        plt.ylabel(etiqueta_eje_y, fontsize=12)
+
+        # Estética extra
+        sns.despine(offset=10, trim=True)  # Quitar bordes innecesarios
+    with etapa('tight_layout'):
+        plt.tight_layout()                 # Evita recortes de texto
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Box_plot_" + nombre_col2.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Box_plot_" + limpiar_nombre(nombre_col2)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
-    plt.show()
+    _guardar_figura(ruta_completa)
+    _mostrar_figura()
 
 # ==============================================================================
 # Grafico de líneas (multiples)
 # ==============================================================================
-def crear_graf_lineas(data, col_car1, col_car2, col_data, etiqueta_eje_x, etiqueta_eje_y, titulo):
+def _datos_graf_lineas(data, col_car1, col_car2, col_data, cubo=None):
+    """Media de col_data por (col_car1, col_car2), ordenada por ambas columnas."""
+    if cubo is not None and cubo.cubre([col_car1, col_car2], [col_data]):
+        return cubo.media([col_car1, col_car2], [col_data]).reset_index()
+
+    df_ordenado = data.sort_values(by=[col_car1, col_car2])
+
+    # Agrupando por país y año y calculando la media (esto ya lo tenías bien)
+    return df_ordenado.groupby([col_car1, col_car2], observed=True).mean().reset_index()
+
+
+@instrumentar
+@con_cache('col_car1', 'col_car2', 'col_data', contexto=_contexto_cache)
+def crear_graf_lineas(data, col_car1, col_car2, col_data, etiqueta_eje_x, etiqueta_eje_y, titulo, cubo=None):
     """
     Entradas:
         - data: Es un dataframe que contiene los datos de interes.
         - col_car1: Nombre de la columna caracteristica (por ejemplo: 'Country')
         - col_car2: Nombre de la columna caracteristica (por ejemplo: 'Year')
         - col_data: Nombre de la columna de los valores a graficar (por ejemplo: 'Renewable Energy Share (%)').
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
     Salidas:
         - Grafico de líneas que muestra el comportamiento promedio de las variables.
     """
-    df_ordenado = data.sort_values(by=[col_car1, col_car2])
+    import matplotlib.pyplot as plt
 
-    # Obteniendo la lista única de países
-    lista_paises = df_ordenado[col_car1].unique().tolist()
-
-    # Agrupando por país y año y calculando la media (esto ya lo tenías bien)
-    df_agrupado = df_ordenado.groupby([col_car1, col_car2]).mean().reset_index()
+    with etapa('agregacion'):
+        df_agrupado = _datos_graf_lineas(data, col_car1, col_car2, col_data, cubo)
 
-    fig, ax = plt.subplots(figsize=(12, 8))
+    with etapa('dibujo'):
+        # El agrupado ya viene ordenado por país y año: cada país es un bloque contiguo
+        indice = IndiceConsulta(df_agrupado, col_car1, col_car2)
 
-    for pais in lista_paises:
-        # Filtrando los datos para el país actual
-        pais_data = df_agrupado[df_agrupado[col_car1] == pais]
+        fig, ax = plt.subplots(figsize=(12, 8))
 
-        # Graficando la serie de tiempo para el país
-        ax.plot(pais_data[col_car2], pais_data[col_data], label=pais)
+        for pais, pais_data in indice.iterar():
+            # Graficando la serie de tiempo para el país
+            ax.plot(pais_data[col_car2], pais_data[col_data], label=pais)
 
-    ax.set_xlabel(etiqueta_eje_x, fontsize=12)
-    ax.set_ylabel(etiqueta_eje_y, fontsize=12)
-    ax.set_title(titulo, fontsize=14)
-    ax.grid(True, alpha=0.3)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
+        ax.set_xlabel(etiqueta_eje_x, fontsize=12)
+        ax.set_ylabel(etiqueta_eje_y, fontsize=12)
+        ax.set_title(titulo, fontsize=14)
+        ax.grid(True, alpha=0.3)
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
 
-    # Añadir leyenda en una ubicación óptima
-    ax.legend(loc='best', fontsize=10)
+        # Añadir leyenda en una ubicación óptima
+        ax.legend(loc='best', fontsize=10)
 
     # Ajustar los márgenes
-    plt.tight_layout()
+    with etapa('tight_layout'):
+        plt.tight_layout()
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_lineas_" + col_data.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Grafico_de_lineas_" + limpiar_nombre(col_data)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
+    _guardar_figura(ruta_completa)
     # Mostrar el gráfico
-    plt.show()
+    _mostrar_figura()
 
 # ==============================================================================
 # Grafico de correlación
 # ==============================================================================
 
-def crear_grafico_correlacion(data, cols, agrupar_por, titulo):
+def _datos_grafico_correlacion(data, cols, agrupar_por, cubo=None):
+    """Matriz de correlación de las medias de cols por agrupar_por."""
+    if cubo is not None and cubo.cubre([agrupar_por], cols):
+        return cubo.media([agrupar_por], cols)[cols].corr()
+
+    # Ordenando el dataframe por país y luego por año
+    df_ordenado = data.sort_values(by=[agrupar_por])
+
+    # Agrupando por país y año y calculando la media (esto ya lo tenías bien)
+    df_agrupado = df_ordenado.groupby([agrupar_por], observed=True).mean().reset_index()
+
+    return df_agrupado[cols].corr()
+
+
+@instrumentar
+@con_cache('cols', 'agrupar_por', contexto=_contexto_cache)
+def crear_grafico_correlacion(data, cols, agrupar_por, titulo, cubo=None, matriz=None):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
         - cols: Lista de columnas que se van a graficar (dataframe).
         - agrupar_por: Columna que se va a agrupar (dataframe).
         - titulo: Título del gráfico (string).
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
+        - matriz: Matriz de correlación ya calculada (opcional, ej: una de
+          correlacion.CoMomentos.matrices()); si se indica se dibuja directamente
+          (restringida a cols) y data no se lee.
 
     Salida:
         - Un gráfico de correlación que muestra la relación entre las dos variables.
@@ -184,38 +310,37 @@ def crear_grafico_correlacion(data, cols, agrupar_por, titulo):
           con un nombre de archivo generado a partir del nombre de la columna del eje y.
         - El gráfico también se muestra en pantalla.
     """
-    # Ordenando el dataframe por país y luego por año
-    df_ordenado = data.sort_values(by=[agrupar_por])
-
-    # Obteniendo la lista única de países
-    lista_paises = df_ordenado[agrupar_por].unique().tolist()
-
-    # Agrupando por país y año y calculando la media (esto ya lo tenías bien)
-    df_agrupado = df_ordenado.groupby([agrupar_por]).mean().reset_index()
-
-    corr_matrix = df_agrupado[cols].corr()
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(corr_matrix,
-                annot=True,            # Mostrar valores
-                cmap='coolwarm',       # Colormap
-                linewidths=0.5,        # Ancho de bordes
-                fmt=".2f",             # Formato decimal
-                annot_kws={"size": 10},
-                vmin=-1, 
-                vmax=1)       # Rango de colores = 1
-
-    plt.title(titulo, pad = 20)
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if matriz is not None:
+        corr_matrix = matriz.loc[cols, cols]
+    else:
+        with etapa('agregacion'):
+            corr_matrix = _datos_grafico_correlacion(data, cols, agrupar_por, cubo)
+    with etapa('dibujo'):
+        plt.figure(figsize=(12, 8))
+        sns.heatmap(corr_matrix,
+                    annot=True,            # Mostrar valores
+                    cmap='coolwarm',       # Colormap
+                    linewidths=0.5,        # Ancho de bordes
+                    fmt=".2f",             # Formato decimal
+                    annot_kws={"size": 10},
+                    vmin=-1, 
+                    vmax=1)       # Rango de colores = 1
+
+        plt.title(titulo, pad = 20)
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_correlación_" + titulo.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Grafico_de_correlación_" + limpiar_nombre(titulo)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa, dpi=300, bbox_inches="tight")
+    _guardar_figura(ruta_completa, dpi=300, bbox_inches="tight")
     # Mostrar el gráfico
-    plt.show()
+    _mostrar_figura()
     
 
 # ==============================================================================
@@ -234,16 +359,38 @@ def crear_graf_interactivo(dataframe):
     Retorna:
     --------
     Un widget interactivo para visualizar los datos
+
+    Notas:
+    ------
+    - La agrupación por (Categoría, Tiempo) se calcula una sola vez por combinación y se
+      reutiliza al cambiar la columna de valores.
+    - Las cajas de texto solo se aplican al presionar Enter o al salir de ellas, y solo
+      cambian los textos de la figura (no se vuelve a agrupar ni a dibujar las líneas).
+    - La figura se crea una vez y sus líneas se actualizan en su lugar.
+    - No se escribe ningún archivo hasta que se presiona "Guardar PNG".
     """
-    # Función intermedia para usar con interact
-    def actualizar_grafico(col_car1, col_car2, col_data, etiqueta_x, etiqueta_y, titulo):
-        crear_graf_lineas(dataframe , col_car1, col_car2, col_data, etiqueta_x, etiqueta_y, titulo)
-    
+    import ipywidgets as widgets
+    from ipywidgets import VBox, HBox
+    from matplotlib.figure import Figure
+    from IPython.display import display
+
+    # Agrupaciones memorizadas por (col_car1, col_car2)
+    agrupaciones = {}
+
+    def agrupar(col_car1, col_car2):
+        clave = (col_car1, col_car2)
+        if clave not in agrupaciones:
+            agrupaciones[clave] = (dataframe.groupby([col_car1, col_car2], observed=True)
+                                   .mean(numeric_only=True).sort_index())
+        return agrupaciones[clave]
+
     # Crear los widgets
     columnas = list(dataframe.columns)
+    numericas = list(dataframe.select_dtypes('number').columns)
     
     col_car1_dropdown = widgets.Dropdown(
         options=columnas,
+        value='Country' if 'Country' in columnas else columnas[0],
         description='Categoría:',
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
@@ -251,6 +398,7 @@ def crear_graf_interactivo(dataframe):
     
     col_car2_dropdown = widgets.Dropdown(
         options=columnas,
+        value='Year' if 'Year' in columnas else columnas[0],
         description='Tiempo:',
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
@@ -258,6 +406,7 @@ def crear_graf_interactivo(dataframe):
     
     col_data_dropdown = widgets.Dropdown(
         options=columnas,
+        value=next((c for c in numericas if c not in ('Country', 'Year')), columnas[0]),
         description='Valor:',
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
@@ -266,6 +415,7 @@ def crear_graf_interactivo(dataframe):
     etiqueta_x = widgets.Text(
         value='Año',
         description='Etiqueta X:',
+        continuous_update=False,
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
     )
@@ -273,6 +423,7 @@ def crear_graf_interactivo(dataframe):
     etiqueta_y = widgets.Text(
         value='Valor',
         description='Etiqueta Y:',
+        continuous_update=False,
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
     )
@@ -280,35 +431,116 @@ def crear_graf_interactivo(dataframe):
     titulo_widget = widgets.Text(
         value='Gráfico de líneas',
         description='Título:',
+        continuous_update=False,
         style={'description_width': 'initial'},
         layout=widgets.Layout(width='300px')
     )
-    
-    # Crear el widget interactivo
-    interactive_plot = interactive(
-        actualizar_grafico,
-        col_car1=col_car1_dropdown,
-        col_car2=col_car2_dropdown,
-        col_data=col_data_dropdown,
-        etiqueta_x=etiqueta_x,
-        etiqueta_y=etiqueta_y,
-        titulo=titulo_widget
-    )
+
+    boton_guardar = widgets.Button(description='Guardar PNG', layout=widgets.Layout(width='150px'))
+    mensaje = widgets.Label()
+    salida = widgets.Output()
+
+    # Figura única (sin pyplot: no se muestra sola ni depende del estado global)
+    fig = Figure(figsize=(12, 8))
+    ax = fig.add_subplot()
+    ax.grid(True, alpha=0.3)
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    lineas = {}
+
+    def mostrar():
+        with salida:
+            salida.clear_output(wait=True)
+            display(fig)
+
+    def actualizar_textos(*_):
+        ax.set_xlabel(etiqueta_x.value, fontsize=12)
+        ax.set_ylabel(etiqueta_y.value, fontsize=12)
+        ax.set_title(titulo_widget.value, fontsize=14)
+
+    def actualizar_lineas(*_):
+        col_car1, col_car2, col_data = col_car1_dropdown.value, col_car2_dropdown.value, col_data_dropdown.value
+        try:
+            df_agrupado = agrupar(col_car1, col_car2)
+            serie = df_agrupado[col_data]
+        except (KeyError, ValueError, TypeError) as error:
+            mensaje.value = f"No se puede graficar: {error}"
+            return False
+        mensaje.value = ''
+
+        grupos = serie.index.get_level_values(0)
+        tiempos = serie.index.get_level_values(1)
+        limites = np.flatnonzero(np.r_[True, grupos[1:] != grupos[:-1], True])
+        presentes = set()
+        for inicio, fin in zip(limites[:-1], limites[1:]):
+            grupo = grupos[inicio]
+            presentes.add(grupo)
+            if grupo in lineas:
+                lineas[grupo].set_data(tiempos[inicio:fin], serie.values[inicio:fin])
+            else:
+                lineas[grupo], = ax.plot(tiempos[inicio:fin], serie.values[inicio:fin], label=grupo)
+
+        cambio_grupos = set(lineas) != presentes
+        for grupo in set(lineas) - presentes:
+            lineas.pop(grupo).remove()
+        if cambio_grupos or ax.get_legend() is None:
+            ax.legend(loc='best', fontsize=10)
+
+        ax.relim()
+        ax.autoscale_view()
+        return True
+
+    def al_cambiar_datos(*_):
+        if actualizar_lineas():
+            mostrar()
+
+    def al_cambiar_texto(*_):
+        actualizar_textos()
+        mostrar()
+
+    def guardar(_):
+        ruta_figura = RUTA_FIGURAS
+        os.makedirs(ruta_figura, exist_ok=True)
+        nombre_archivo = "Grafico_de_lineas_" + limpiar_nombre(col_data_dropdown.value)
+        ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
+        fig.tight_layout()
+        fig.savefig(ruta_completa)
+        mensaje.value = f"Guardado en {ruta_completa}"
+
+    for widget in (col_car1_dropdown, col_car2_dropdown, col_data_dropdown):
+        widget.observe(al_cambiar_datos, names='value')
+    for widget in (etiqueta_x, etiqueta_y, titulo_widget):
+        widget.observe(al_cambiar_texto, names='value')
+    boton_guardar.on_click(guardar)
+
+    actualizar_textos()
+    actualizar_lineas()
+    mostrar()
     
     # Organizar mejor la disposición
     inputs = VBox([
         HBox([col_car1_dropdown, col_car2_dropdown]),
         HBox([col_data_dropdown, etiqueta_x]),
-        HBox([etiqueta_y, titulo_widget])
+        HBox([etiqueta_y, titulo_widget]),
+        HBox([boton_guardar, mensaje])
     ])
     
     # Retornar el widget completo
-    return VBox([inputs, interactive_plot.children[-1]])
+    return VBox([inputs, salida])
 
 # ==============================================================================
 # Grafico de barras agrupadas
 # ==============================================================================
-def crear_grafico_barras_agrupadas(data, col_grup,col_categoria, col_subcategoria, nombre_variable, col_valor, etiqueta_x, etiqueta_y, titulo):
+def _datos_grafico_barras_agrupadas(data, col_grup, col_categoria, col_subcategoria, cubo=None):
+    """Media de las dos columnas por col_grup (una fila por grupo)."""
+    if cubo is not None and cubo.cubre([col_grup], [col_categoria, col_subcategoria]):
+        return cubo.media([col_grup], [col_categoria, col_subcategoria]).reset_index()
+    return data.groupby(col_grup, observed=True)[[col_categoria, col_subcategoria]].mean().reset_index()
+
+
+@instrumentar
+@con_cache('col_grup', 'col_categoria', 'col_subcategoria', contexto=_contexto_cache)
+def crear_grafico_barras_agrupadas(data, col_grup,col_categoria, col_subcategoria, nombre_variable, col_valor, etiqueta_x, etiqueta_y, titulo, cubo=None):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
@@ -320,6 +552,7 @@ def crear_grafico_barras_agrupadas(data, col_grup,col_categoria, col_subcategori
         - etiqueta_x: Etiqueta del eje x (ej: 'País').
         - etiqueta_y: Etiqueta del eje y (ej: 'Porcentaje (%)').
         - titulo: Título del gráfico 'Distribución de Tipos de Energía por País'.
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
 
     Salida:
         - Un gráfico de barras agrupadas que muestra la relación entre las dos variables.
@@ -327,36 +560,168 @@ def crear_grafico_barras_agrupadas(data, col_grup,col_categoria, col_subcategori
           con un nombre de archivo generado a partir del nombre de la columna del eje y.
         - El gráfico también se muestra en pantalla.
     """
-    df_tipo_energia = data.groupby(col_grup)[[col_categoria, col_subcategoria]].mean().reset_index()
-
-    # Apilando el dataframe para crear un gráfico de barras
-    tabla_apilada = df_tipo_energia.melt(id_vars=[col_grup], var_name=nombre_variable, value_name=col_valor)
-
-    plt.figure()
-    sns.barplot(data=tabla_apilada, x=col_grup, y=col_valor, hue=nombre_variable, palette="Set2")
-    plt.title(titulo)
-    plt.xlabel(etiqueta_x)
-    plt.ylabel(etiqueta_y)
-    plt.xticks(rotation=90)
-    plt.legend(title=nombre_variable)
-    plt.tight_layout()
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    with etapa('agregacion'):
+        df_tipo_energia = _datos_grafico_barras_agrupadas(data, col_grup, col_categoria, col_subcategoria, cubo)
+
+    with etapa('melt'):
+        # Apilando el dataframe para crear un gráfico de barras
+        tabla_apilada = df_tipo_energia.melt(id_vars=[col_grup], var_name=nombre_variable, value_name=col_valor)
+        tabla_apilada[col_grup] = _categorias_presentes(tabla_apilada[col_grup])
+
+    with etapa('dibujo'):
+        plt.figure()
+        sns.barplot(data=tabla_apilada, x=col_grup, y=col_valor, hue=nombre_variable, palette="Set2")
+        plt.title(titulo)
+        plt.xlabel(etiqueta_x)
+        plt.ylabel(etiqueta_y)
+        plt.xticks(rotation=90)
+        plt.legend(title=nombre_variable)
+    with etapa('tight_layout'):
+        plt.tight_layout()
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_barras_agrupadas_" + col_valor.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Grafico_de_barras_agrupadas_" + limpiar_nombre(col_valor)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
+    _guardar_figura(ruta_completa)
 
-    plt.show()
+    _mostrar_figura()
 
 # ==============================================================================
 # Grafico de dispersión
 # ==============================================================================
-def crear_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, año, col_x, col_y, etiqueta_x, etiqueta_y, titulo):
+
+# Modo automático: hasta UMBRAL_PUNTOS_INDIVIDUALES puntos se dibuja uno por uno (aspecto
+# original); hasta UMBRAL_PUNTOS_DENSIDAD como una sola colección; por encima, hexbin
+UMBRAL_PUNTOS_INDIVIDUALES = 20
+UMBRAL_PUNTOS_DENSIDAD = 20000
+
+# Máximo de etiquetas de texto en los modos 'coleccion' y 'densidad'
+MAX_ETIQUETAS_DISPERSION = 30
+
+MODOS_DISPERSION = ('auto', 'individual', 'coleccion', 'densidad')
+
+
+def _modo_dispersion(modo, n_puntos):
+    if modo not in MODOS_DISPERSION:
+        raise ValueError(f"modo debe ser uno de {MODOS_DISPERSION}, no {modo!r}")
+    if modo != 'auto':
+        return modo
+    if n_puntos <= UMBRAL_PUNTOS_INDIVIDUALES:
+        return 'individual'
+    return 'coleccion' if n_puntos <= UMBRAL_PUNTOS_DENSIDAD else 'densidad'
+
+
+def _seleccionar_etiquetas(ax, x, y, etiquetas, max_etiquetas, tamaño_fuente=8):
+    """
+    Índices de los puntos a etiquetar: se recorren de mayor a menor (x + y normalizados)
+    y se acepta un punto solo si el recuadro aproximado de su etiqueta (en píxeles, a la
+    izquierda y encima del punto) no se solapa con los ya aceptados, hasta max_etiquetas.
+    """
+    if max_etiquetas <= 0 or len(x) == 0:
+        return np.array([], dtype=np.intp)
+
+    def _normalizar(v):
+        rango = np.ptp(v)
+        return (v - v.min()) / rango if rango > 0 else np.zeros_like(v, dtype=float)
+
+    # Solo se revisan los candidatos más prioritarios para acotar el costo
+    candidatos = np.argsort(-(_normalizar(x) + _normalizar(y)), kind='stable')[:50 * max_etiquetas]
+    ax.autoscale_view()  # límites definitivos antes de pasar a píxeles
+    puntos = ax.transData.transform(np.column_stack([x[candidatos], y[candidatos]]))
+    pixeles = tamaño_fuente * ax.figure.dpi / 72
+    anchos = np.char.str_len(etiquetas[candidatos]) * 0.6 * pixeles
+
+    # Recuadros (x0, y0, x1, y1) de las etiquetas aceptadas
+    cajas = np.empty((max_etiquetas, 4))
+    elegidos = []
+    for k, i in enumerate(candidatos):
+        caja = (puntos[k, 0] - anchos[k], puntos[k, 1], puntos[k, 0], puntos[k, 1] + pixeles)
+        previas = cajas[:len(elegidos)]
+        if np.any((previas[:, 0] < caja[2]) & (caja[0] < previas[:, 2]) &
+                  (previas[:, 1] < caja[3]) & (caja[1] < previas[:, 3])):
+            continue
+        cajas[len(elegidos)] = caja
+        elegidos.append(i)
+        if len(elegidos) == max_etiquetas:
+            break
+    return np.array(elegidos, dtype=np.intp)
+
+
+def _dibujar_dispersion(x, y, etiquetas, alpha, modo='auto', max_etiquetas=MAX_ETIQUETAS_DISPERSION):
+    """
+    Dibuja los puntos (x, y) con sus etiquetas en los ejes actuales.
+
+    Modos:
+        - 'individual': un scatter y un texto por punto (colores de tab10).
+        - 'coleccion': un solo scatter para todos los puntos (tab10 hasta 10 grupos y
+          viridis por encima) y solo las etiquetas de _seleccionar_etiquetas.
+        - 'densidad': hexbin con escala logarítmica y las etiquetas seleccionadas.
+        - 'auto': elige según UMBRAL_PUNTOS_INDIVIDUALES y UMBRAL_PUNTOS_DENSIDAD.
+    """
+    import matplotlib.pyplot as plt
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    etiquetas = np.asarray(etiquetas).astype(str)
+    modo = _modo_dispersion(modo, len(x))
+    ax = plt.gca()
+
+    if modo == 'individual':
+        colores = plt.cm.tab10(np.linspace(0, 1, len(x))) # Usamos un mapa de colores para obtener colores distintos
+        for i, etiqueta in enumerate(etiquetas):
+            ax.scatter(x[i], y[i], color=colores[i], label=etiqueta, alpha=alpha, edgecolors='black')
+            ax.text(x[i], y[i], etiqueta, fontsize=8, ha='right', va='bottom') # Añadir etiquetas a los puntos
+        return
+
+    if modo == 'coleccion':
+        mapa = plt.cm.tab10 if len(x) <= 10 else plt.cm.viridis
+        colores = mapa(np.linspace(0, 1, len(x)))
+        tamaño = float(np.clip(20000 / max(len(x), 1), 4, 36))
+        ax.scatter(x, y, c=colores, s=tamaño, alpha=alpha, edgecolors='black', linewidths=0.3)
+    else:
+        hb = ax.hexbin(x, y, gridsize=60, bins='log', mincnt=1, cmap='viridis')
+        plt.colorbar(hb, ax=ax, label='Puntos por celda')
+
+    for i in _seleccionar_etiquetas(ax, x, y, etiquetas, max_etiquetas):
+        ax.text(x[i], y[i], etiquetas[i], fontsize=8, ha='right', va='bottom')
+
+def _indice_sumas_por_año(data, col_categoria, col_subcategoria, col_x, col_y, cubo=None):
+    """
+    IndiceConsulta sobre las sumas de col_x y col_y por (col_categoria, col_subcategoria),
+    solo con los grupos presentes en data. Lo comparten el gráfico de un año y el de
+    todos los años.
+    """
+    if cubo is not None and cubo.cubre([col_categoria, col_subcategoria], [col_x, col_y]):
+        data_agrupada = cubo.suma([col_categoria, col_subcategoria], [col_x, col_y]).reset_index()
+    else:
+        # Agrupando los datos segun las columnas de categoria y subcategoria
+        data_agrupada = data.groupby([col_categoria, col_subcategoria], observed=True)[[col_x, col_y]].sum().reset_index()
+    return IndiceConsulta(data_agrupada, col_categoria, col_subcategoria)
+
+
+def _datos_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, año, col_x, col_y, cubo=None):
+    """Sumas de col_x y col_y por (col_categoria, col_subcategoria) del año indicado, ordenadas por col_x."""
+    indice = _indice_sumas_por_año(data, col_categoria, col_subcategoria, col_x, col_y, cubo)
+
+    # Filtrando los datos para el año seleccionado (un corte por grupo sobre el agrupado ordenado)
+    data_filtrada = indice.tiempo(int(año))
+
+    # Ordenando los datos por el eje x
+    return data_filtrada.sort_values(by=col_x)
+
+
+@instrumentar
+@con_cache('col_categoria', 'col_subcategoria', 'col_x', 'col_y', contexto=_contexto_cache)
+def crear_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, año, col_x, col_y, etiqueta_x, etiqueta_y, titulo, cubo=None,
+                                     modo='auto', max_etiquetas=MAX_ETIQUETAS_DISPERSION):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
@@ -368,6 +733,10 @@ def crear_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, añ
         - etiqueta_x: Etiqueta del eje x.
         - etiqueta_y: Etiqueta del eje y.
         - titulo: Título del gráfico (ej: 'Relación entre el Consumo Total de Energía y las Emisiones de Carbono por País').
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
+        - modo: 'auto', 'individual', 'coleccion' o 'densidad' (ver _dibujar_dispersion);
+          con miles de grupos 'coleccion' y 'densidad' mantienen el tiempo casi constante.
+        - max_etiquetas: Máximo de etiquetas (sin solaparse) en los modos 'coleccion' y 'densidad'.
 
     Salida:
         - Un gráfico de dispersión que muestra la relación entre las dos variables.
@@ -375,48 +744,231 @@ def crear_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, añ
           con un nombre de archivo generado a partir del nombre de la columna del eje y.
         - El gráfico también se muestra en pantalla.
     """
-    # Agrupando los datos segun las columnas de categoria y subcategoria
-    data_agrupada = data.groupby([col_categoria, col_subcategoria])[[col_x, col_y]].sum().reset_index()
+    import matplotlib.pyplot as plt
 
-    # Filtrando los datos para el año seleccionado
-    data_filtrada = data_agrupada[data_agrupada[col_subcategoria] == int(año)]
+    with etapa('agregacion'):
+        data_filtrada = _datos_grafico_dispersion_por_año(data, col_categoria, col_subcategoria, año, col_x, col_y, cubo)
 
-    # Ordenando los datos por el eje x
-    data_filtrada = data_filtrada.sort_values(by=col_x)
-
-    x = data_filtrada[col_x]
-    y = data_filtrada[col_y]
-    etiquetas = data_filtrada[col_categoria]
-
-    colors = plt.cm.tab10(np.linspace(0, 1, len(etiquetas)))
-
-    plt.figure()
+    with etapa('dibujo'):
+        plt.figure()
 
-    for i, etiqueta in enumerate(etiquetas):
-        plt.scatter(x.iloc[i], y.iloc[i], color=colors[i], label=etiqueta, alpha=0.8, edgecolors='black')
-        plt.text(x.iloc[i], y.iloc[i], etiqueta, fontsize=8, ha='right', va='bottom') # Añadir etiquetas a los puntos
+        _dibujar_dispersion(data_filtrada[col_x], data_filtrada[col_y], data_filtrada[col_categoria], 0.8, modo, max_etiquetas)
 
-    plt.title(titulo+" - "+año, fontsize=16)
-    plt.xlabel(etiqueta_x+" - "+año, fontsize=12)
-    plt.ylabel(etiqueta_y+" - "+año, fontsize=12)
-    plt.xticks(rotation=90)
-    plt.grid(True, alpha=0.7, color='gray', linestyle='-', linewidth=0.5)
-    plt.tight_layout()
+        plt.title(titulo+" - "+año, fontsize=16)
+        plt.xlabel(etiqueta_x+" - "+año, fontsize=12)
+        plt.ylabel(etiqueta_y+" - "+año, fontsize=12)
+        plt.xticks(rotation=90)
+        plt.grid(True, alpha=0.7, color='gray', linestyle='-', linewidth=0.5)
+    with etapa('tight_layout'):
+        plt.tight_layout()
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_dispersion_" + col_y.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_") + "_" + año
+    nombre_archivo = "Grafico_de_dispersion_" + limpiar_nombre(col_y) + "_" + año
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
+    _guardar_figura(ruta_completa)
+
+    _mostrar_figura()
+
+
+def _cuadros_dispersion_por_año(data, col_categoria, col_subcategoria, col_x, col_y, años=None, cubo=None):
+    """
+    Agrupa una sola vez por (col_categoria, col_subcategoria) con _indice_sumas_por_año
+    y devuelve la lista de cuadros (año, x, y, etiquetas), cada uno igual al resultado
+    de _datos_grafico_dispersion_por_año para ese año. años=None = todos los años con datos.
+    """
+    indice = _indice_sumas_por_año(data, col_categoria, col_subcategoria, col_x, col_y, cubo)
+    if años is None:
+        años = np.unique(indice.data[col_subcategoria].to_numpy())
+    cuadros = []
+    for año in años:
+        filas = indice.tiempo(int(año)).sort_values(by=col_x)
+        cuadros.append((str(año), filas[col_x].to_numpy(dtype=float), filas[col_y].to_numpy(dtype=float),
+                        filas[col_categoria].to_numpy().astype(str)))
+    return cuadros
+
+
+def _limites_compartidos(cuadros, margen=0.05):
+    """Límites (x_min, x_max, y_min, y_max) comunes a todos los cuadros, con un margen relativo."""
+    limites = []
+    for k in (1, 2):
+        valores = np.concatenate([c[k] for c in cuadros]) if cuadros else np.array([])
+        valores = valores[np.isfinite(valores)]
+        minimo, maximo = (valores.min(), valores.max()) if len(valores) else (0.0, 1.0)
+        holgura = (maximo - minimo) * margen or 1.0
+        limites += [minimo - holgura, maximo + holgura]
+    return tuple(limites)
+
+
+def _renderizar_cuadros_dispersion(cuadros, limites, etiqueta_x, etiqueta_y, titulo, max_etiquetas, rutas=None,
+                                   en_proceso=False):
+    """
+    Dibuja los cuadros sobre una sola figura: el scatter, los textos, el título y las
+    etiquetas de los ejes se crean una vez y en cada año solo se actualizan sus datos.
+
+    Con rutas se guarda cada cuadro en su ruta (con _guardar_figura si en_proceso, para
+    usar el escritor activo y la caché) y se devuelven las rutas; sin rutas se devuelven
+    los píxeles RGBA de cada cuadro.
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure()
+    ax = fig.gca()
+    puntos = ax.scatter([], [], alpha=0.8, edgecolors='black')
+    ax.set_xlim(limites[0], limites[1])
+    ax.set_ylim(limites[2], limites[3])
+    ax.tick_params(axis='x', labelrotation=90)
+    ax.grid(True, alpha=0.7, color='gray', linestyle='-', linewidth=0.5)
+    titulo_ax = ax.set_title('', fontsize=16)
+    textos = []
+
+    resultados = []
+    for i, (año, x, y, etiquetas) in enumerate(cuadros):
+        mapa = plt.cm.tab10 if len(x) <= 10 else plt.cm.viridis
+        puntos.set_offsets(np.column_stack([x, y]) if len(x) else np.empty((0, 2)))
+        puntos.set_facecolor(mapa(np.linspace(0, 1, len(x))))
+        puntos.set_sizes([float(np.clip(20000 / max(len(x), 1), 4, 36))])
+
+        # Todos los puntos llevan etiqueta si caben; si no, las que no se solapan
+        elegidos = np.arange(len(x)) if len(x) <= max_etiquetas else _seleccionar_etiquetas(ax, x, y, etiquetas, max_etiquetas)
+        while len(textos) < len(elegidos):
+            textos.append(ax.text(0, 0, '', fontsize=8, ha='right', va='bottom'))
+        for texto, j in zip(textos, elegidos):
+            texto.set_position((x[j], y[j]))
+            texto.set_text(etiquetas[j])
+            texto.set_visible(True)
+        for texto in textos[len(elegidos):]:
+            texto.set_visible(False)
+
+        titulo_ax.set_text(titulo + " - " + año)
+        ax.set_xlabel(etiqueta_x + " - " + año, fontsize=12)
+        ax.set_ylabel(etiqueta_y + " - " + año, fontsize=12)
+        if i == 0:
+            # Los límites son fijos: el ajuste de márgenes del primer cuadro vale para todos
+            fig.tight_layout()
+
+        if rutas is None:
+            fig.canvas.draw()
+            resultados.append(np.asarray(fig.canvas.buffer_rgba()).copy())
+        elif en_proceso:
+            _guardar_figura(rutas[i])
+            resultados.append(rutas[i])
+        else:
+            fig.savefig(rutas[i])
+            resultados.append(rutas[i])
+    plt.close(fig)
+    return resultados
+
+
+def _componer_tira(imagenes, columnas):
+    """Une cuadros RGBA del mismo tamaño en una cuadrícula de 'columnas' columnas (fondo blanco)."""
+    alto, ancho = imagenes[0].shape[:2]
+    filas = -(-len(imagenes) // columnas)
+    tira = np.full((filas * alto, columnas * ancho, 4), 255, dtype=np.uint8)
+    for k, imagen in enumerate(imagenes):
+        f, c = divmod(k, columnas)
+        tira[f * alto:(f + 1) * alto, c * ancho:(c + 1) * ancho] = imagen
+    return tira
+
+
+@instrumentar
+@con_cache('col_categoria', 'col_subcategoria', 'col_x', 'col_y', contexto=_contexto_cache)
+def crear_grafico_dispersion_todos_los_años(data, col_categoria, col_subcategoria, col_x, col_y, etiqueta_x, etiqueta_y, titulo,
+                                            cubo=None, años=None, salida='png', n_procesos=1, columnas_tira=5,
+                                            max_etiquetas=MAX_ETIQUETAS_DISPERSION):
+    """
+    Entradas:
+        - data, col_categoria, col_subcategoria, col_x, col_y, etiqueta_x, etiqueta_y,
+          titulo, cubo: Como en crear_grafico_dispersion_por_año.
+        - años: Lista de años a dibujar (por defecto todos los que tienen datos).
+        - salida: 'png' (un archivo por año) o 'tira' (un solo PNG con todos los años en
+          una cuadrícula, para compararlos de un vistazo).
+        - n_procesos: Procesos entre los que se reparten los años (1 = en este proceso).
+          Cada proceso dibuja sus años sobre una sola figura.
+        - columnas_tira: Columnas de la cuadrícula en salida='tira'.
+        - max_etiquetas: Máximo de etiquetas por año (sin solaparse).
+
+    Salida:
+        - Con salida='png', un archivo 'Grafico_de_dispersion_<col_y>_<año>.png' por año
+          (los mismos nombres que crear_grafico_dispersion_por_año); con 'tira',
+          'Grafico_de_dispersion_<col_y>_<primer año>-<último año>_tira.png'. Todo en la
+          ruta '../reporte/figuras/'.
+        - La agrupación se hace una sola vez y todos los años comparten los límites de
+          los ejes, así que las posiciones son comparables entre cuadros.
+        - Los cuadros no se muestran en pantalla (la tira sí, si MOSTRAR_FIGURAS).
+    """
+    import matplotlib.pyplot as plt
 
-    plt.show()
+    if salida not in ('png', 'tira'):
+        raise ValueError(f"salida debe ser 'png' o 'tira', no {salida!r}")
 
+    with etapa('agregacion'):
+        cuadros = _cuadros_dispersion_por_año(data, col_categoria, col_subcategoria, col_x, col_y, años, cubo)
+        limites = _limites_compartidos(cuadros)
+    if not cuadros:
+        return
 
-def crear_grafico_dispersion(data, col_grup, col_x, col_y, etiqueta_x, etiqueta_y, titulo):
+    ruta_figura = RUTA_FIGURAS
+    os.makedirs(ruta_figura, exist_ok=True)
+    nombre_archivo = "Grafico_de_dispersion_" + limpiar_nombre(col_y)
+    rutas = None
+    if salida == 'png':
+        rutas = [os.path.join(ruta_figura, nombre_archivo + "_" + c[0] + ".png") for c in cuadros]
+
+    textos = (etiqueta_x, etiqueta_y, titulo, max_etiquetas)
+    n_procesos = max(1, min(n_procesos, len(cuadros)))
+    if n_procesos > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Bloques de años consecutivos: cada proceso reutiliza su figura en todos sus cuadros
+        limites_bloques = np.linspace(0, len(cuadros), n_procesos + 1).astype(int)
+        bloques = [(a, b) for a, b in zip(limites_bloques[:-1], limites_bloques[1:]) if b > a]
+        with etapa('cuadros_paralelo'):
+            with ProcessPoolExecutor(max_workers=n_procesos, initializer=_inicializar_proceso_pagina) as pool:
+                futuros = [pool.submit(_renderizar_cuadros_dispersion, cuadros[a:b], limites, *textos,
+                                       rutas[a:b] if rutas else None) for a, b in bloques]
+                resultados = [r for futuro in futuros for r in futuro.result()]
+        if rutas:
+            for ruta in resultados:
+                registrar_guardado(ruta)
+    else:
+        with etapa('cuadros'):
+            resultados = _renderizar_cuadros_dispersion(cuadros, limites, *textos, rutas, en_proceso=True)
+
+    if salida == 'tira':
+        with etapa('dibujo'):
+            tira = _componer_tira(resultados, max(1, min(columnas_tira, len(resultados))))
+            alto, ancho = tira.shape[:2]
+            dpi = plt.rcParams['figure.dpi']
+            fig = plt.figure(figsize=(ancho / dpi, alto / dpi), dpi=dpi)
+            fig.figimage(tira, resize=False)
+        ruta_completa = os.path.join(ruta_figura, f"{nombre_archivo}_{cuadros[0][0]}-{cuadros[-1][0]}_tira.png")
+        _guardar_figura(ruta_completa, dpi=dpi)
+        _mostrar_figura()
+
+
+def _datos_grafico_dispersion(data, col_grup, col_x, col_y, cubo=None):
+    """Sumas de col_x (ordenadas) y col_y (alineadas con col_x) por col_grup."""
+    if cubo is not None and cubo.cubre([col_grup], [col_x, col_y]):
+        sumas = cubo.suma([col_grup], [col_x, col_y])
+        x = sumas[col_x].sort_values()
+        return x, sumas[col_y].loc[x.index]
+
+    x = data.groupby(col_grup, observed=True)[col_x].sum().sort_values() # Sumar el consumo total de energía por país y ordenar
+
+    y = data.groupby(col_grup, observed=True)[col_y].sum().loc[x.index] # Sumar las emisiones de carbono por país y ordenar según el índice de x
+
+    return x, y
+
+
+@instrumentar
+@con_cache('col_grup', 'col_x', 'col_y', contexto=_contexto_cache)
+def crear_grafico_dispersion(data, col_grup, col_x, col_y, etiqueta_x, etiqueta_y, titulo, cubo=None,
+                             modo='auto', max_etiquetas=MAX_ETIQUETAS_DISPERSION):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
@@ -426,6 +978,10 @@ def crear_grafico_dispersion(data, col_grup, col_x, col_y, etiqueta_x, etiqueta_
         - etiqueta_x: Etiqueta del eje x.
         - etiqueta_y: Etiqueta del eje y.
         - titulo: Título del gráfico (ej: 'Relación entre el Consumo Total de Energía y las Emisiones de Carbono por País').
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
+        - modo: 'auto', 'individual', 'coleccion' o 'densidad' (ver _dibujar_dispersion);
+          con miles de grupos 'coleccion' y 'densidad' mantienen el tiempo casi constante.
+        - max_etiquetas: Máximo de etiquetas (sin solaparse) en los modos 'coleccion' y 'densidad'.
 
     Salida:
         - Un gráfico de dispersión que muestra la relación entre las dos variables.
@@ -433,46 +989,96 @@ def crear_grafico_dispersion(data, col_grup, col_x, col_y, etiqueta_x, etiqueta_
           con un nombre de archivo generado a partir del nombre de la columna del eje y.
         - El gráfico también se muestra en pantalla.
     """
+    import matplotlib.pyplot as plt
 
-    x = data.groupby(col_grup)[col_x].sum().sort_values() # Sumar el consumo total de energía por país y ordenar
-
-    y = data.groupby(col_grup)[col_y].sum().loc[x.index] # Sumar las emisiones de carbono por país y ordenar según el índice de x
-
-    paises = x.index # Obtener los nombres de los países ordenados
+    with etapa('agregacion'):
+        x, y = _datos_grafico_dispersion(data, col_grup, col_x, col_y, cubo)
 
-    # Generar una lista de 10 colores únicos
-    num_paises = len(paises)
-    colores = plt.cm.tab10(np.linspace(0, 1, num_paises)) # Usamos un mapa de colores para obtener colores distintos
+    with etapa('dibujo'):
+        plt.figure()
 
-    plt.figure()
+        # Un punto por país (x ya viene ordenado y y alineado con su índice)
+        _dibujar_dispersion(x, y, x.index, 0.7, modo, max_etiquetas)
 
-    for i, pais in enumerate(paises):
-        plt.scatter(x[pais], y[pais], color=colores[i], label=pais, alpha=0.7, edgecolors = 'black') # Graficar cada país con su respectivo color
-        plt.text(x[pais], y[pais], pais, fontsize=8, ha='right', va='bottom') # Añadir etiquetas a los puntos
-
-    plt.title(titulo, fontsize=16)
-    plt.xlabel(etiqueta_x, fontsize=12)
-    plt.ylabel(etiqueta_y, fontsize=12)
-    plt.xticks(rotation=90)
-    plt.grid(True, alpha=0.7, color='gray', linestyle='-', linewidth=0.5)
-    plt.tight_layout()
+        plt.title(titulo, fontsize=16)
+        plt.xlabel(etiqueta_x, fontsize=12)
+        plt.ylabel(etiqueta_y, fontsize=12)
+        plt.xticks(rotation=90)
+        plt.grid(True, alpha=0.7, color='gray', linestyle='-', linewidth=0.5)
+    with etapa('tight_layout'):
+        plt.tight_layout()
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
     
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_dispersion_" + col_y.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
+    nombre_archivo = "Grafico_de_dispersion_" + limpiar_nombre(col_y)
     ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
     
-    plt.savefig(ruta_completa)
+    _guardar_figura(ruta_completa)
 
-    plt.show()
+    _mostrar_figura()
 
 # ==============================================================================
 # Gráfico de pastel
 # ==============================================================================
-def crear_grafico_pastel(data, filtro, col_categoria, col_subcategoria, titulo, filas, columnas):
+def _datos_grafico_pastel(data, filtro, col_categoria, col_subcategoria, cubo=None):
+    """
+    Media de las dos columnas por cada valor de filtro, con una sola agrupación.
+    Los grupos quedan en el orden de aparición en data (como unique()) con o sin cubo,
+    así que las páginas de crear_grafico_pastel son las mismas en ambos casos.
+    """
+    if cubo is not None and cubo.cubre([filtro], [col_categoria, col_subcategoria]):
+        medias = cubo.media([filtro], [col_categoria, col_subcategoria])
+        return medias.reindex(pd.Index(data[filtro].dropna().unique(), name=filtro))
+    return data.groupby(filtro, sort=False, observed=True)[[col_categoria, col_subcategoria]].mean()
+
+
+def _dibujar_pagina_pastel(medias, col_categoria, col_subcategoria, titulo, filas, columnas):
+    """Dibuja una página de la cuadrícula de pasteles (un grupo por subgráfico) y devuelve la figura."""
+    import matplotlib.pyplot as plt
+
+    num = len(medias)
+
+    # Crear una figura y los subgráficos (6 x 3 pulgadas por subgráfico: 12 x 15 con 5 x 2)
+    fig, axs = plt.subplots(nrows=filas, ncols=columnas, figsize=(6 * columnas, 3 * filas), squeeze=False)
+    axs = axs.flatten() # Aplanar la matriz de ejes para facilitar el acceso a cada subgráfico
+
+    for i, caracteristica in enumerate(medias.index):
+        # Promedio de la categoria y subcategoría (precalculado para todos los grupos)
+        valores = [medias[col_categoria].iloc[i], medias[col_subcategoria].iloc[i]]
+
+        # Crear el gráfico de pastel
+        axs[i].pie(valores, autopct='%1.1f%%', startangle=90, colors=['#009688','#23bac4'])
+        axs[i].set_title(f"{titulo} {caracteristica}")
+        axs[i].axis('equal')
+    for j in range(num, filas * columnas):
+        fig.delaxes(axs[j])
+    fig.legend(labels=[col_categoria, col_subcategoria], loc='center right', bbox_to_anchor=(1.1, 1.0))
+    return fig
+
+
+def _inicializar_proceso_pagina():
+    import matplotlib
+    matplotlib.use('Agg', force=True)
+
+
+def _renderizar_pagina_pastel(ruta, medias, col_categoria, col_subcategoria, titulo, filas, columnas):
+    """Renderiza y guarda una página en un proceso trabajador; devuelve la ruta escrita."""
+    import matplotlib.pyplot as plt
+
+    fig = _dibujar_pagina_pastel(medias, col_categoria, col_subcategoria, titulo, filas, columnas)
+    fig.tight_layout()
+    fig.savefig(ruta)
+    plt.close(fig)
+    return ruta
+
+
+@instrumentar
+@con_cache('filtro', 'col_categoria', 'col_subcategoria', contexto=_contexto_cache)
+def crear_grafico_pastel(data, filtro, col_categoria, col_subcategoria, titulo, filas, columnas, cubo=None,
+                         formato='png', n_procesos=1):
     """
     Entradas:
         - data: Es la información que se va a graficar (dataframe).
@@ -480,55 +1086,74 @@ def crear_grafico_pastel(data, filtro, col_categoria, col_subcategoria, titulo,
         - col_categoria: Nombre de la columna que se va a graficar (grupo, ej: 'Industrial Energy Use (%)').
         - col_subcategoria: Nombre de la columna que se va a graficar (grupo, ej: 'Household Energy Use (%)').
         - titulo: Título del gráfico (ej: 'Distribución de Tipos de Energía por País').
+        - filas, columnas: Tamaño de la cuadrícula de cada página.
+        - cubo: CuboAgregado precalculado (opcional); si se indica, no se agrupa data.
+        - formato: 'png' (un archivo por página) o 'pdf' (un solo PDF de varias páginas).
+        - n_procesos: Procesos para renderizar las páginas PNG en paralelo (1 = en este
+          proceso). En paralelo las páginas solo se guardan, no se muestran.
 
     Salida:
-        - Un gráfico de pastel que muestra la relación entre las dos variables.
-        - El gráfico se guarda como un archivo PNG en la ruta '../reporte/figuras/'
-          con un nombre de archivo generado a partir del nombre de la columna del eje y.
-        - El gráfico también se muestra en pantalla.
+        - Un gráfico de pastel por grupo, repartidos en tantas páginas de filas x columnas
+          como hagan falta (ningún grupo queda fuera).
+        - Con una sola página el archivo se llama 'Grafico_de_pastel_<col_categoria>.png';
+          con varias se agrega '_pagina_<n>'. En formato 'pdf' se escribe un solo
+          'Grafico_de_pastel_<col_categoria>.pdf'. Todo en la ruta '../reporte/figuras/'.
+        - Las páginas también se muestran en pantalla.
     """
-    list_data = data[filtro].unique()
-    num = len(list_data)
+    import matplotlib.pyplot as plt
 
-    # Número de filas y columnas para la cuadrícula
-    fil = filas
-    col = columnas
+    if formato not in ('png', 'pdf'):
+        raise ValueError(f"formato debe ser 'png' o 'pdf', no {formato!r}")
 
-    # Crear una figura y los subgráficos
-    fig, axs = plt.subplots(nrows = fil, ncols = col, figsize=(12, 15))
-    axs = axs.flatten() # Aplanar la matriz de ejes para facilitar el acceso a cada subgráfico
-
-    for i, caracteristica in enumerate(list_data):
-        if i < fil * col:
-            # Filtrar los datos para la característica actual
-            data_filtrada = data[data[filtro] == caracteristica]
-
-            # Promedio de la categoria y subcategoría
-            data_category = data_filtrada[col_categoria].mean()
-            data_subcategory = data_filtrada[col_subcategoria].mean()
-
-            valores = [data_category, data_subcategory]
+    with etapa('agregacion'):
+        medias = _datos_grafico_pastel(data, filtro, col_categoria, col_subcategoria, cubo)
 
-            # Crear el gráfico de pastel
-            axs[i].pie(valores, autopct='%1.1f%%', startangle=90, colors=['#009688','#23bac4'])
-            axs[i].set_title(f"{titulo} {caracteristica}")
-            axs[i].axis('equal')
-    etiquetas = [col_categoria, col_subcategoria]
-    if num < fil * col:
-        for j in range(num, filas * columnas):
-            fig.delaxes(axs[j])
+    por_pagina = filas * columnas
+    paginas = [medias.iloc[i:i + por_pagina] for i in range(0, max(len(medias), 1), por_pagina)]
 
     # Crear directorio si no existe
-    ruta_figura = os.path.join('..', 'reporte', 'figuras')
+    ruta_figura = RUTA_FIGURAS
     os.makedirs(ruta_figura, exist_ok=True)
 
     # Nombre del archivo limpio (sin caracteres especiales)
-    nombre_archivo = "Grafico_de_pastel_" + col_categoria.replace(" ", "_").replace("(", "").replace(")", "").replace("/", "_")
-    ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".png")
-
-
-    fig.legend(labels=etiquetas, loc='center right', bbox_to_anchor=(1.1, 1.0))
-    plt.tight_layout()
-    plt.savefig(ruta_completa)
-
-    plt.show()
\ No newline at end of file
+    nombre_archivo = "Grafico_de_pastel_" + limpiar_nombre(col_categoria)
+
+    if formato == 'pdf':
+        from matplotlib.backends.backend_pdf import PdfPages
+
+        ruta_completa = os.path.join(ruta_figura, nombre_archivo + ".pdf")
+        with PdfPages(ruta_completa) as pdf:
+            for pagina in paginas:
+                with etapa('dibujo'):
+                    fig = _dibujar_pagina_pastel(pagina, col_categoria, col_subcategoria, titulo, filas, columnas)
+                with etapa('tight_layout'):
+                    fig.tight_layout()
+                with etapa('guardado'):
+                    pdf.savefig(fig)
+                _mostrar_figura()
+        registrar_guardado(ruta_completa)
+        return
+
+    ancho = len(str(len(paginas)))
+    rutas = [os.path.join(ruta_figura, nombre_archivo + ("" if len(paginas) == 1 else f"_pagina_{i + 1:0{ancho}d}") + ".png")
+             for i in range(len(paginas))]
+
+    if n_procesos > 1 and len(paginas) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with etapa('paginas_paralelo'):
+            with ProcessPoolExecutor(max_workers=min(n_procesos, len(paginas)), initializer=_inicializar_proceso_pagina) as pool:
+                futuros = [pool.submit(_renderizar_pagina_pastel, ruta, pagina, col_categoria, col_subcategoria, titulo, filas, columnas)
+                           for ruta, pagina in zip(rutas, paginas)]
+                for futuro in futuros:
+                    registrar_guardado(futuro.result())
+        return
+
+    for ruta_completa, pagina in zip(rutas, paginas):
+        with etapa('dibujo'):
+            _dibujar_pagina_pastel(pagina, col_categoria, col_subcategoria, titulo, filas, columnas)
+        with etapa('tight_layout'):
+            plt.tight_layout()
+        _guardar_figura(ruta_completa)
+
+        _mostrar_figura()
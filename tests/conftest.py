@@ -0,0 +1,21 @@
+import os
+import sys
+
+import pytest
+
+# Permite importar el paquete src al ejecutar pytest desde cualquier carpeta
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.datos_sinteticos import generar_datos_sinteticos
+
+
+@pytest.fixture(scope='session')
+def datos():
+    """Datos sintéticos con el esquema del dataset (Country categórica, como al cargar el CSV)."""
+    return generar_datos_sinteticos(n_paises=8, n_años=6, filas_por_grupo=5, semilla=1, categorico=True)
+
+
+@pytest.fixture(scope='session')
+def datos_filtrados(datos):
+    """Subconjunto de dos países: las otras seis categorías de Country quedan sin filas."""
+    return datos[datos['Country'].isin(['País_2', 'País_5'])]
@@ -0,0 +1,42 @@
+import pandas as pd
+
+from src.actualizacion_incremental import AgregadosIncrementales
+
+
+def _escribir(ruta, datos, encabezado):
+    datos.to_csv(ruta, index=False, header=encabezado, mode='w' if encabezado else 'a')
+
+
+def test_agregar_filas_igual_a_recalcular_todo(tmp_path, datos):
+    ruta = str(tmp_path / 'energia.csv')
+    ruta_estado = str(tmp_path / 'energia.incremental.pkl')
+    corte = len(datos) * 2 // 3
+
+    _escribir(ruta, datos.iloc[:corte], True)
+    estado = AgregadosIncrementales.cargar(ruta, ruta_estado)
+    assert estado.actualizar(tam_bloque_bytes=2048).filas_nuevas == corte
+    estado.guardar(ruta_estado)
+
+    _escribir(ruta, datos.iloc[corte:], False)
+    estado = AgregadosIncrementales.cargar(ruta, ruta_estado)
+    resultado = estado.actualizar(tam_bloque_bytes=2048)
+    assert resultado.filas_nuevas == len(datos) - corte
+    assert not resultado.reconstruido
+
+    completo = AgregadosIncrementales(str(ruta))
+    completo.actualizar()
+    incremental, recalculado = estado.cubo().tabla, completo.cubo().tabla
+    pd.testing.assert_index_equal(incremental.index, recalculado.index)
+    pd.testing.assert_frame_equal(incremental, recalculado, rtol=1e-12)
+
+
+def test_archivo_reescrito_se_recalcula(tmp_path, datos):
+    ruta = str(tmp_path / 'energia.csv')
+    _escribir(ruta, datos, True)
+    estado = AgregadosIncrementales(ruta)
+    estado.actualizar()
+
+    _escribir(ruta, datos.iloc[:50], True)
+    resultado = estado.actualizar()
+    assert resultado.reconstruido
+    assert estado.agregados.filas == 50
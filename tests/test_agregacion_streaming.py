@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.agregacion_streaming import AgregadosStreaming, agregar_csv_streaming
+from src.carga_datos import metricas
+from src.datos_sinteticos import generar_datos_sinteticos
+
+PAIS, AÑO = 'Country', 'Year'
+
+
+@pytest.fixture(scope='module')
+def datos_con_nulos():
+    """30 filas por (Country, Year), con nulos en una métrica; menos que la capacidad de 32."""
+    datos = generar_datos_sinteticos(n_paises=7, n_años=5, filas_por_grupo=30, semilla=3, categorico=True)
+    datos.loc[datos.index[::7], metricas[0]] = np.nan
+    return datos
+
+
+def _comparar(obtenido, esperado):
+    """Compara dos tablas por (Country[, Year]) sin importar el orden ni el tipo del índice."""
+    def normalizar(tabla):
+        tabla = tabla.reset_index()
+        tabla[PAIS] = tabla[PAIS].astype(str)
+        if AÑO in tabla:
+            tabla[AÑO] = tabla[AÑO].astype(int)
+        claves = [c for c in (PAIS, AÑO) if c in tabla]
+        return tabla.sort_values(claves).reset_index(drop=True)[claves + metricas]
+    pd.testing.assert_frame_equal(normalizar(obtenido), normalizar(esperado), check_dtype=False, rtol=1e-12)
+
+
+def _por_bloques(datos, tam_bloque, capacidad_sketch=32):
+    agregados = AgregadosStreaming(capacidad_sketch=capacidad_sketch)
+    for inicio in range(0, len(datos), tam_bloque):
+        agregados.actualizar(datos.iloc[inicio:inicio + tam_bloque])
+    return agregados
+
+
+def test_agregados_iguales_a_pandas(datos_con_nulos):
+    agregados = _por_bloques(datos_con_nulos, 37)
+    grupos = datos_con_nulos.groupby([PAIS, AÑO], observed=True)[metricas]
+    _comparar(agregados.conteo, grupos.count())
+    _comparar(agregados.suma, grupos.sum())
+    _comparar(agregados.minimo, grupos.min())
+    _comparar(agregados.maximo, grupos.max())
+    _comparar(agregados.medias(), grupos.mean())
+    _comparar(agregados.medias((PAIS,)), datos_con_nulos.groupby(PAIS, observed=True)[metricas].mean())
+
+
+def test_cuantiles_exactos_hasta_la_capacidad(datos_con_nulos):
+    agregados = _por_bloques(datos_con_nulos, 37)
+    _comparar(agregados.cuantiles(0.5, por=(PAIS, AÑO)),
+              datos_con_nulos.groupby([PAIS, AÑO], observed=True)[metricas].median())
+    _comparar(agregados.cuantiles(0.3, por=(PAIS,)),
+              datos_con_nulos.groupby(PAIS, observed=True)[metricas].quantile(0.3))
+
+
+def test_cuantiles_aproximados_sobre_la_capacidad(datos_con_nulos):
+    agregados = _por_bloques(datos_con_nulos, 37, capacidad_sketch=8)
+    esperado = datos_con_nulos.groupby(PAIS, observed=True)[metricas].median()
+    obtenido = agregados.cuantiles(0.5, por=(PAIS,)).loc[esperado.index.astype(str)]
+    rango = datos_con_nulos[metricas].max() - datos_con_nulos[metricas].min()
+    assert ((obtenido.to_numpy() - esperado.to_numpy()) / rango.to_numpy()).max() < 0.05
+
+
+def test_fusionar_equivale_a_un_solo_recorrido(datos_con_nulos):
+    primera = _por_bloques(datos_con_nulos.iloc[:400], 50)
+    segunda = _por_bloques(datos_con_nulos.iloc[400:], 50)
+    completo = _por_bloques(datos_con_nulos, 50)
+    primera.fusionar(segunda)
+    assert primera.filas == completo.filas
+    _comparar(primera.suma, completo.suma)
+    _comparar(primera.maximo, completo.maximo)
+    _comparar(primera.cuantiles(0.5, por=(PAIS, AÑO)), completo.cuantiles(0.5, por=(PAIS, AÑO)))
+
+
+def test_csv_por_bloques_igual_a_pandas(tmp_path, datos_con_nulos):
+    ruta = tmp_path / 'energia.csv'
+    datos_con_nulos.to_csv(ruta, index=False)
+    agregados = agregar_csv_streaming(str(ruta), memoria_max_mb=8, capacidad_sketch=32)
+    datos = pd.read_csv(ruta)
+    _comparar(agregados.medias(), datos.groupby([PAIS, AÑO])[metricas].mean())
+    _comparar(agregados.cuantiles(0.5, por=(PAIS,)), datos.groupby(PAIS)[metricas].median())
+
+
+def test_presupuesto_insuficiente_para_los_sketches(tmp_path, datos_con_nulos):
+    ruta = tmp_path / 'energia.csv'
+    datos_con_nulos.to_csv(ruta, index=False)
+    with pytest.raises(ValueError, match='insuficiente'):
+        agregar_csv_streaming(str(ruta), memoria_max_mb=1, capacidad_sketch=4096)
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+from src.cache_figuras import clave_figura
+
+
+def _compilar(fuente):
+    espacio = {}
+    exec(fuente, espacio)
+    return espacio['crear']
+
+
+CREAR = '''
+def crear(data, titulo):
+    formato = lambda x: f"{x:.1f}"
+    return 'Grafico_de_{}'.format(titulo), formato
+'''
+
+
+def _clave(funcion, **argumentos):
+    return clave_figura(funcion, None, [], argumentos)
+
+
+def test_dataframe_como_argumento_entra_por_contenido():
+    funcion = _compilar(CREAR)
+    matriz = pd.DataFrame(np.arange(2000.0).reshape(1000, 2), columns=['a', 'b'])
+    cambiada = matriz.copy()
+    cambiada.iloc[500, 0] = -1.0  # fila que el repr del dataframe omite
+    assert repr(matriz) == repr(cambiada)
+    assert _clave(funcion, matriz=matriz) == _clave(funcion, matriz=matriz.copy())
+    assert _clave(funcion, matriz=matriz) != _clave(funcion, matriz=cambiada)
+
+
+def test_arreglo_como_argumento_entra_por_contenido():
+    funcion = _compilar(CREAR)
+    arreglo = np.zeros(5000)
+    cambiado = arreglo.copy()
+    cambiado[2500] = 1.0
+    assert _clave(funcion, matriz=arreglo) == _clave(funcion, matriz=arreglo.copy())
+    assert _clave(funcion, matriz=arreglo) != _clave(funcion, matriz=cambiado)
+    assert _clave(funcion, años=[arreglo]) != _clave(funcion, años=[cambiado])
+
+
+def test_constantes_de_la_funcion_forman_parte_de_la_clave():
+    original = _compilar(CREAR)
+    assert _clave(original, titulo='x') == _clave(_compilar(CREAR), titulo='x')
+    assert _clave(original, titulo='x') != _clave(_compilar(CREAR.replace('Grafico_de_', 'Figura_de_')), titulo='x')
+    # Constante de una función anidada (el lambda)
+    assert _clave(original, titulo='x') != _clave(_compilar(CREAR.replace('.1f', '.2f')), titulo='x')
+
+
+def test_cambiar_un_modulo_del_paquete_cambia_la_clave(tmp_path, monkeypatch):
+    paquete = tmp_path / 'paquete_figuras'
+    paquete.mkdir()
+    (paquete / '__init__.py').write_text('')
+    (paquete / 'figuras.py').write_text(CREAR)
+    (paquete / 'auxiliares.py').write_text('ANCHO = 1\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    from paquete_figuras.figuras import crear
+
+    antes = _clave(crear, titulo='x')
+    assert _clave(crear, titulo='x') == antes
+    (paquete / 'auxiliares.py').write_text('ANCHO = 22\n')
+    assert _clave(crear, titulo='x') != antes
+
+
+def test_contexto_con_la_carpeta_absoluta(tmp_path, monkeypatch):
+    from src import visualizaciones as vis
+
+    monkeypatch.setattr(vis, 'RUTA_FIGURAS', 'figuras')
+    contextos = []
+    for carpeta in ('a', 'b'):
+        (tmp_path / carpeta).mkdir()
+        monkeypatch.chdir(tmp_path / carpeta)
+        contextos.append(vis._contexto_cache())
+    assert contextos[0] != contextos[1]
+    assert contextos[0].startswith(str(tmp_path / 'a' / 'figuras'))
@@ -0,0 +1,51 @@
+import os
+
+import pandas as pd
+
+from src.carga_datos import cargar_datos, _rutas_snapshot
+from src.datos_sinteticos import generar_datos_sinteticos
+
+
+def test_snapshot_reproduce_el_csv(tmp_path):
+    ruta = tmp_path / 'energia.csv'
+    generar_datos_sinteticos(n_paises=3, n_años=4, filas_por_grupo=2).to_csv(ruta, index=False)
+    frio = cargar_datos(str(ruta), str(tmp_path / 'snap'))
+    caliente = cargar_datos(str(ruta), str(tmp_path / 'snap'))
+    assert os.path.exists(_rutas_snapshot(str(ruta), str(tmp_path / 'snap'))[0])
+    pd.testing.assert_frame_equal(frio, caliente)
+    pd.testing.assert_frame_equal(frio, cargar_datos(str(ruta), usar_snapshot=False))
+
+
+def test_csv_con_el_mismo_nombre_no_comparten_snapshot(tmp_path):
+    dir_snapshot = str(tmp_path / 'snap')
+    rutas = []
+    for i, carpeta in enumerate(('a', 'b')):
+        os.makedirs(tmp_path / carpeta)
+        ruta = str(tmp_path / carpeta / 'energia.csv')
+        generar_datos_sinteticos(n_paises=2 + i, n_años=3, filas_por_grupo=2, semilla=i).to_csv(ruta, index=False)
+        rutas.append(ruta)
+
+    assert _rutas_snapshot(rutas[0], dir_snapshot) != _rutas_snapshot(rutas[1], dir_snapshot)
+    primera = cargar_datos(rutas[0], dir_snapshot)
+    segunda = cargar_datos(rutas[1], dir_snapshot)
+    pd.testing.assert_frame_equal(cargar_datos(rutas[0], dir_snapshot), primera)
+    pd.testing.assert_frame_equal(cargar_datos(rutas[1], dir_snapshot), segunda)
+    assert len(primera) != len(segunda)
+
+
+def test_touch_actualiza_los_metadatos_del_snapshot(tmp_path, monkeypatch):
+    from src import carga_datos
+
+    ruta = str(tmp_path / 'energia.csv')
+    dir_snapshot = str(tmp_path / 'snap')
+    generar_datos_sinteticos(n_paises=3, n_años=4, filas_por_grupo=2).to_csv(ruta, index=False)
+    original = cargar_datos(ruta, dir_snapshot)
+    os.utime(ruta, ns=(os.stat(ruta).st_atime_ns, os.stat(ruta).st_mtime_ns + 10**9))
+
+    hashes = []
+    calcular = carga_datos.checksum_archivo
+    monkeypatch.setattr(carga_datos, 'checksum_archivo', lambda r: hashes.append(r) or calcular(r))
+    for _ in range(3):
+        pd.testing.assert_frame_equal(cargar_datos(ruta, dir_snapshot), original)
+    # Solo la primera carga después del touch recalcula el hash
+    assert len(hashes) == 1
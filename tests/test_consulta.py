@@ -0,0 +1,55 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import visualizaciones as vis
+from src.consulta import IndiceConsulta
+
+X, Y = 'Total Energy Consumption (TWh)', 'Carbon Emissions (Million Tons)'
+
+
+@pytest.fixture(scope='module')
+def desordenados(datos):
+    # Años con huecos: cada país pierde algunos años
+    datos = datos[(datos['Year'] + datos['Country'].cat.codes) % 3 != 0]
+    return datos.sample(frac=1, random_state=0)
+
+
+def test_cortes_iguales_a_mascaras(desordenados):
+    indice = IndiceConsulta(desordenados)
+    ordenados = desordenados.sort_values(['Country', 'Year'], kind='stable').reset_index(drop=True)
+    años = sorted(desordenados['Year'].unique())
+    for desde, hasta in [(años[0], None), (años[2], años[4]), (años[0] - 5, años[1]), (años[-1] + 1, None)]:
+        limite = desde if hasta is None else hasta
+        esperado = ordenados[ordenados['Year'].between(desde, limite)]
+        pd.testing.assert_frame_equal(indice.tiempo(desde, hasta), esperado)
+    for pais in ['País_0', 'País_3']:
+        esperado = ordenados[(ordenados['Country'] == pais) & (ordenados['Year'] >= años[1])]
+        pd.testing.assert_frame_equal(indice.grupo(pais, desde=años[1]), esperado)
+    assert indice.limites('No existe') == (0, 0)
+
+
+def test_dataframe_vacio(datos):
+    vacio = datos.iloc[:0]
+    indice = IndiceConsulta(vacio)
+    assert len(indice) == 0 and len(indice.grupos) == 0
+    np.testing.assert_array_equal(indice.inicios, [0])
+    assert len(indice.tiempo(2000, 2024)) == 0 and len(indice.grupo('País_0')) == 0
+    assert list(indice.iterar()) == []
+
+    assert len(vis._datos_graf_lineas(vacio, 'Country', 'Year', X)) == 0
+    assert vis._cuadros_dispersion_por_año(vacio, 'Country', 'Year', X, Y) == []
+    assert len(vis._datos_grafico_dispersion_por_año(vacio, 'Country', 'Year', '2020', X, Y)) == 0
+
+
+def test_graficos_con_dataframe_vacio(tmp_path, monkeypatch, datos):
+    import matplotlib
+    matplotlib.use('Agg')
+    monkeypatch.setattr(vis, 'RUTA_FIGURAS', str(tmp_path) + os.sep)
+    monkeypatch.setattr(vis, 'MOSTRAR_FIGURAS', False)
+    vacio = datos.iloc[:0]
+    vis.crear_graf_lineas(vacio, 'Country', 'Year', X, 'Año', 'TWh', 'Líneas')
+    vis.crear_grafico_dispersion_por_año(vacio, 'Country', 'Year', '2020', X, Y, 'Energía', 'Emisiones', 'Dispersión')
+    vis.crear_grafico_dispersion_todos_los_años(vacio, 'Country', 'Year', X, Y, 'Energía', 'Emisiones', 'Dispersión')
@@ -0,0 +1,20 @@
+import numpy as np
+
+from src.carga_datos import metricas
+from src.correlacion import CoMomentos, calcular_comomentos
+
+
+def test_fusion_por_bloques_igual_a_dataframe_corr(datos):
+    acumulado = CoMomentos(metricas)
+    for inicio in range(0, len(datos), 70):
+        acumulado.fusionar(CoMomentos(metricas).actualizar(datos.iloc[inicio:inicio + 70]))
+    np.testing.assert_allclose(acumulado.matriz().to_numpy(), datos[metricas].corr().to_numpy(), rtol=1e-10)
+
+
+def test_matrices_por_año_iguales_a_dataframe_corr(datos):
+    por_año = calcular_comomentos(datos, metricas, clave='Year', n_procesos=2)
+    matrices = por_año.matrices()
+    assert list(matrices) == sorted(datos['Year'].unique())
+    for año, matriz in matrices.items():
+        esperado = datos.loc[datos['Year'] == año, metricas].corr()
+        np.testing.assert_allclose(matriz.to_numpy(), esperado.to_numpy(), rtol=1e-10, atol=1e-12)
@@ -0,0 +1,24 @@
+import numpy as np
+
+from src.densidad import HistogramaIncremental
+
+COLUMNA = 'Renewable Energy Share (%)'
+
+
+def test_histograma_por_bloques_igual_a_np_histogram(datos):
+    valores = datos[COLUMNA].to_numpy(dtype=np.float64)
+    histograma = HistogramaIncremental.desde_valores(valores, bins=17, tam_bloque=23)
+    conteos, bordes = np.histogram(valores, bins=17)
+    np.testing.assert_array_equal(histograma.conteos, conteos)
+    np.testing.assert_array_equal(histograma.bordes, bordes)
+
+
+def test_fusion_de_partes_igual_a_np_histogram(datos):
+    valores = datos[COLUMNA].to_numpy(dtype=np.float64)
+    minimo, maximo = float(valores.min()), float(valores.max())
+    mitad = len(valores) // 2
+    primera = HistogramaIncremental.desde_rango(minimo, maximo, bins=10).agregar(valores[:mitad])
+    segunda = HistogramaIncremental.desde_rango(minimo, maximo, bins=10).agregar(np.r_[valores[mitad:], np.nan])
+    primera.fusionar(segunda)
+    np.testing.assert_array_equal(primera.conteos, np.histogram(valores, bins=10, range=(minimo, maximo))[0])
+    assert primera.total == len(valores)
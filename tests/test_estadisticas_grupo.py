@@ -0,0 +1,24 @@
+import numpy as np
+import pandas as pd
+
+from src.carga_datos import metricas
+from src.estadisticas_grupo import calcular_estadisticas_grupo
+
+ESTADISTICAS = ('count', 'sum', 'mean', 'min', 'max', 'median')
+
+
+def test_paralelo_identico_al_serial(datos):
+    serial = calcular_estadisticas_grupo(datos, metricas, estadisticas=ESTADISTICAS, cuantiles=(0.25, 0.9))
+    paralelo = calcular_estadisticas_grupo(datos, metricas, estadisticas=ESTADISTICAS, cuantiles=(0.25, 0.9), n_procesos=2)
+    pd.testing.assert_index_equal(paralelo.grupos, serial.grupos)
+    assert paralelo.valores.keys() == serial.valores.keys()
+    for nombre, valores in serial.valores.items():
+        np.testing.assert_array_equal(paralelo.valores[nombre], valores)
+
+
+def test_igual_a_pandas_en_un_subconjunto_filtrado(datos_filtrados):
+    resultado = calcular_estadisticas_grupo(datos_filtrados, metricas, estadisticas=ESTADISTICAS)
+    grupos = datos_filtrados.groupby('Country', observed=True)[metricas]
+    assert list(resultado.grupos.astype(str)) == ['País_2', 'País_5']
+    for nombre in ESTADISTICAS:
+        np.testing.assert_allclose(resultado.valores[nombre], grupos.agg(nombre).to_numpy(dtype=float), rtol=1e-12)
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from src.carga_datos import leer_csv_tipado
+from src.ingesta import ingerir_archivos
+
+
+def test_varios_archivos_igual_a_un_solo_archivo(tmp_path, datos):
+    datos.to_csv(tmp_path / 'completo.csv', index=False)
+    carpeta = tmp_path / 'partes'
+    carpeta.mkdir()
+    # Cada parte tiene solo algunos países: las categorías se unen al concatenar
+    for i, año in enumerate(sorted(datos['Year'].unique())[::2]):
+        parte = datos[datos['Year'].isin([año, año + 1]) & (datos['Country'] != f'País_{i}')]
+        parte.to_csv(carpeta / f'energia_{i}.csv', index=False)
+    esperado = pd.concat([leer_csv_tipado(str(ruta)) for ruta in sorted(carpeta.glob('*.csv'))], ignore_index=True)
+    esperado['Country'] = esperado['Country'].astype(str).astype('category')
+
+    for usar_procesos in (False, True):
+        data, informe = ingerir_archivos(str(carpeta), n_trabajadores=2, usar_procesos=usar_procesos)
+        assert [r['filas'] for r in informe] == [len(pd.read_csv(r['ruta'])) for r in informe]
+        pd.testing.assert_frame_equal(data, esperado)
+
+    completo = leer_csv_tipado(str(tmp_path / 'completo.csv'))
+    data, _ = ingerir_archivos([str(tmp_path / 'completo.csv')])
+    pd.testing.assert_frame_equal(data, completo)
@@ -0,0 +1,23 @@
+import numpy as np
+
+from src import procesamiento_datos as pro
+from src.estadisticas_grupo import calcular_estadisticas_grupo
+
+
+def test_reportes_en_paralelo_iguales_al_serial(datos, capsys):
+    for reporte in (pro.mediana_categoria, pro.top_mediana_categoria):
+        reporte(datos, pro.categorias)
+        serial = capsys.readouterr().out
+        reporte(datos, pro.categorias, n_procesos=3)
+        assert capsys.readouterr().out == serial
+
+
+def test_cuantiles_en_paralelo_con_nulos_iguales_a_pandas(datos):
+    con_nulos = datos.copy()
+    con_nulos.loc[con_nulos.index[::5], pro.categorias[0]] = np.nan
+    resultado = calcular_estadisticas_grupo(con_nulos, pro.categorias, estadisticas=('median',),
+                                            cuantiles=(0.1, 0.75), n_procesos=2)
+    grupos = con_nulos.groupby('Country', observed=True)[pro.categorias]
+    np.testing.assert_allclose(resultado.valores['median'], grupos.median().to_numpy(), rtol=1e-12)
+    for q in (0.1, 0.75):
+        np.testing.assert_allclose(resultado.valores[f'q{q}'], grupos.quantile(q).to_numpy(), rtol=1e-12)
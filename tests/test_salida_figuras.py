@@ -0,0 +1,101 @@
+import os
+import threading
+import time
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pytest
+from PIL import Image
+
+from src.salida_figuras import EscritorFiguras
+
+
+def _figura(ancho):
+    fig = plt.figure(figsize=(ancho, 2), dpi=50)
+    fig.gca().plot([0, 1], [1, 0])
+    return fig
+
+
+@pytest.fixture
+def escritor():
+    escritor = EscritorFiguras(n_hilos=2, nivel_compresion=1)
+    yield escritor
+    escritor.cerrar()
+
+
+def test_ida_y_vuelta_de_formatos(tmp_path, escritor):
+    fig = _figura(3)
+    png = escritor.guardar(fig, str(tmp_path / 'a.png'))
+    png_dpi = escritor.guardar(fig, str(tmp_path / 'b.png'), dpi=100)
+    escritor.formato = 'jpg'
+    jpg = escritor.guardar(fig, str(tmp_path / 'b.png'), dpi=100)
+    escritor.formato = 'svg'
+    svg = escritor.guardar(fig, str(tmp_path / 'c.png'))
+    plt.close(fig)
+    escritor.esperar()
+
+    assert jpg.endswith('b.jpg') and svg.endswith('c.svg')
+    with Image.open(png) as imagen:
+        assert imagen.format == 'PNG' and imagen.size == (150, 100)
+    with Image.open(png_dpi) as imagen:
+        assert imagen.size == (300, 200)
+    with Image.open(jpg) as imagen:
+        assert imagen.format == 'JPEG' and imagen.size == (300, 200)
+    assert open(svg, encoding='utf-8').read().lstrip().startswith('<?xml')
+    assert sorted(os.listdir(tmp_path)) == ['a.png', 'b.jpg', 'b.png', 'c.svg']
+
+
+def test_misma_ruta_gana_la_ultima_y_no_se_pierden_errores(tmp_path, escritor, monkeypatch):
+    ruta = str(tmp_path / 'a.png')
+    for ancho in (2, 3, 4):
+        fig = _figura(ancho)
+        escritor.guardar(fig, ruta)
+        plt.close(fig)
+    escritor.esperar()
+    with Image.open(ruta) as imagen:
+        assert imagen.size == (200, 100)
+    assert os.listdir(tmp_path) == ['a.png']
+
+    # Si falla la primera de dos escrituras de la misma ruta, esperar relanza su error
+    llamadas = []
+    original = escritor._escribir
+
+    def escribir(contenido, destino):
+        llamadas.append(destino)
+        if len(llamadas) == 1:
+            raise OSError('disco lleno')
+        original(contenido, destino)
+
+    monkeypatch.setattr(escritor, '_escribir', escribir)
+    fig = _figura(2)
+    escritor.guardar(fig, ruta)
+    escritor.guardar(fig, ruta)
+    plt.close(fig)
+    with pytest.raises(OSError, match='disco lleno'):
+        escritor.esperar()
+    assert len(llamadas) == 2 and not escritor._pendientes
+
+
+def test_maximo_de_figuras_en_vuelo(tmp_path, monkeypatch):
+    escritor = EscritorFiguras(n_hilos=3, max_pendientes=2)
+    en_vuelo, maximo, candado = [0], [0], threading.Lock()
+    original = escritor._codificar
+
+    def codificar(*argumentos):
+        with candado:
+            en_vuelo[0] += 1
+            maximo[0] = max(maximo[0], en_vuelo[0])
+        time.sleep(0.02)
+        original(*argumentos)
+        with candado:
+            en_vuelo[0] -= 1
+
+    monkeypatch.setattr(escritor, '_codificar', codificar)
+    fig = _figura(2)
+    for i in range(8):
+        escritor.guardar(fig, str(tmp_path / f'{i}.png'))
+    plt.close(fig)
+    escritor.cerrar()
+    assert maximo[0] == 2
+    assert len(os.listdir(tmp_path)) == 8
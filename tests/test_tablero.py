@@ -0,0 +1,45 @@
+import json
+
+import numpy as np
+
+from src.cubo_agregado import CuboAgregado
+from src.tablero import CONSUMO, GRUPO_OTROS, datos_tablero, exportar_tablero
+
+
+def _tabla(lista, n_paises):
+    return np.array([np.nan if v is None else v for v in lista], dtype=float).reshape(n_paises, -1)
+
+
+def test_sumas_conteos_y_grupo_otros(datos):
+    metricas = [CONSUMO, 'Renewable Energy Share (%)']
+    tablero = datos_tablero(datos, metricas, max_paises=4, max_puntos=3)
+
+    sumas = datos.groupby(['Country', 'Year'], observed=True)[metricas].sum()
+    conteos = datos.groupby(['Country', 'Year'], observed=True)[metricas].count()
+    por_pais = sumas[CONSUMO].groupby(level=0, observed=True).sum()
+    conservados = list(por_pais.sort_values(ascending=False).index[:3].astype(str))
+    assert tablero['paises'][:-1] == sorted(conservados)
+    assert tablero['paises'][-1] == GRUPO_OTROS and tablero['paises_originales'] == 8
+
+    # 6 años en tramos de 2: las sumas y los conteos de cada tramo se suman
+    años = sorted(datos['Year'].unique())
+    assert tablero['ancho_años'] == 2 and tablero['años'] == [int(a) for a in años[::2]]
+    tramo = ((sumas.index.get_level_values(1) - años[0]) // 2).to_numpy()
+    pais = sumas.index.get_level_values(0).astype(str)
+    grupo = np.where(pais.isin(conservados), pais, GRUPO_OTROS)
+    for j, m in enumerate(metricas):
+        esperado_s = sumas[m].groupby([grupo, tramo]).sum().unstack().loc[tablero['paises']].to_numpy()
+        esperado_c = conteos[m].groupby([grupo, tramo]).sum().unstack().loc[tablero['paises']].to_numpy()
+        np.testing.assert_allclose(_tabla(tablero['sumas'][j], 4), esperado_s, rtol=1e-5)
+        np.testing.assert_array_equal(_tabla(tablero['conteos'][j], 4), esperado_c)
+        assert sum(tablero['histogramas'][j]) == datos[m].notna().sum()
+
+
+def test_cubo_y_exportacion(tmp_path, datos):
+    directo = datos_tablero(datos, max_paises=5)
+    assert datos_tablero(datos, max_paises=5, cubo=CuboAgregado.construir(datos)) == directo
+
+    ruta, tamano = exportar_tablero(datos, str(tmp_path / 'tablero.html'), max_paises=5)
+    contenido = open(ruta, encoding='utf-8').read()
+    assert len(contenido.encode('utf-8')) == tamano
+    assert json.dumps(directo['paises'], ensure_ascii=False, separators=(',', ':')) in contenido
@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import visualizaciones as vis
+from src.cubo_agregado import CuboAgregado
+
+PAIS, AÑO = 'Country', 'Year'
+CONSUMO = 'Total Energy Consumption (TWh)'
+EMISIONES = 'Carbon Emissions (Million Tons)'
+RENOVABLE = 'Renewable Energy Share (%)'
+FOSIL = 'Fossil Fuel Dependency (%)'
+INDUSTRIAL = 'Industrial Energy Use (%)'
+DOMESTICO = 'Household Energy Use (%)'
+
+
+def _comparable(tabla, columnas):
+    """Columnas indicadas, con las categorías como texto y el índice reiniciado."""
+    tabla = tabla.reset_index(drop=True)[columnas].copy()
+    for col in columnas:
+        if isinstance(tabla[col].dtype, pd.CategoricalDtype):
+            tabla[col] = tabla[col].astype(str)
+    return tabla
+
+
+@pytest.fixture(scope='module')
+def cubo(datos_filtrados):
+    return CuboAgregado.construir(datos_filtrados)
+
+
+def _paises(datos_filtrados):
+    return sorted(datos_filtrados[PAIS].unique().astype(str))
+
+
+def test_lineas_solo_paises_presentes_y_mismo_resultado_con_cubo(datos_filtrados, cubo):
+    directo = vis._datos_graf_lineas(datos_filtrados, PAIS, AÑO, RENOVABLE)
+    con_cubo = vis._datos_graf_lineas(datos_filtrados, PAIS, AÑO, RENOVABLE, cubo=cubo)
+    assert sorted(directo[PAIS].astype(str).unique()) == _paises(datos_filtrados)
+    assert not directo[RENOVABLE].isna().any()
+    pd.testing.assert_frame_equal(_comparable(directo, [PAIS, AÑO, RENOVABLE]),
+                                  _comparable(con_cubo, [PAIS, AÑO, RENOVABLE]), check_dtype=False)
+
+
+def test_barras_solo_paises_presentes_y_mismo_resultado_con_cubo(datos_filtrados, cubo):
+    directo = vis._datos_grafico_barras_agrupadas(datos_filtrados, PAIS, RENOVABLE, FOSIL)
+    con_cubo = vis._datos_grafico_barras_agrupadas(datos_filtrados, PAIS, RENOVABLE, FOSIL, cubo=cubo)
+    columnas = [PAIS, RENOVABLE, FOSIL]
+    assert sorted(directo[PAIS].astype(str)) == _paises(datos_filtrados)
+    pd.testing.assert_frame_equal(_comparable(directo, columnas), _comparable(con_cubo, columnas), check_dtype=False)
+
+
+def test_dispersion_sin_puntos_fantasma(datos_filtrados, cubo):
+    x, y = vis._datos_grafico_dispersion(datos_filtrados, PAIS, CONSUMO, EMISIONES)
+    x_cubo, y_cubo = vis._datos_grafico_dispersion(datos_filtrados, PAIS, CONSUMO, EMISIONES, cubo=cubo)
+    assert sorted(x.index.astype(str)) == _paises(datos_filtrados)
+    assert (x > 0).all() and (y > 0).all()
+    assert list(x.index.astype(str)) == list(x_cubo.index.astype(str))
+    np.testing.assert_allclose(x.to_numpy(), x_cubo.to_numpy())
+    np.testing.assert_allclose(y.to_numpy(), y_cubo.to_numpy())
+
+
+def test_dispersion_por_año_sin_puntos_fantasma(datos_filtrados, cubo):
+    año = int(datos_filtrados[AÑO].min())
+    directo = vis._datos_grafico_dispersion_por_año(datos_filtrados, PAIS, AÑO, año, CONSUMO, EMISIONES)
+    con_cubo = vis._datos_grafico_dispersion_por_año(datos_filtrados, PAIS, AÑO, año, CONSUMO, EMISIONES, cubo=cubo)
+    columnas = [PAIS, AÑO, CONSUMO, EMISIONES]
+    assert sorted(directo[PAIS].astype(str)) == _paises(datos_filtrados)
+    assert (directo[CONSUMO] > 0).all()
+    pd.testing.assert_frame_equal(_comparable(directo, columnas), _comparable(con_cubo, columnas), check_dtype=False)
+
+
+def test_correlacion_mismo_resultado_con_cubo(datos_filtrados, cubo):
+    cols = [CONSUMO, EMISIONES, RENOVABLE]
+    directo = vis._datos_grafico_correlacion(datos_filtrados, cols, PAIS)
+    con_cubo = vis._datos_grafico_correlacion(datos_filtrados, cols, PAIS, cubo=cubo)
+    np.testing.assert_allclose(directo.to_numpy(), con_cubo.to_numpy())
+
+
+def test_pastel_solo_paises_presentes(datos_filtrados, cubo):
+    directo = vis._datos_grafico_pastel(datos_filtrados, PAIS, INDUSTRIAL, DOMESTICO)
+    con_cubo = vis._datos_grafico_pastel(datos_filtrados, PAIS, INDUSTRIAL, DOMESTICO, cubo=cubo)
+    assert sorted(directo.index.astype(str)) == _paises(datos_filtrados)
+    # Mismo orden (el de aparición) con y sin cubo: las páginas de pasteles no cambian
+    assert list(directo.index.astype(str)) == list(datos_filtrados[PAIS].astype(str).unique())
+    assert list(con_cubo.index.astype(str)) == list(directo.index.astype(str))
+    np.testing.assert_allclose(directo.to_numpy(), con_cubo.to_numpy())
+
+
+def test_cuadros_todos_los_años_iguales_al_grafico_de_un_año(datos_filtrados, cubo):
+    cuadros = vis._cuadros_dispersion_por_año(datos_filtrados, PAIS, AÑO, CONSUMO, EMISIONES)
+    assert [c[0] for c in cuadros] == [str(a) for a in sorted(datos_filtrados[AÑO].unique())]
+    for año, x, y, etiquetas in cuadros:
+        un_año = vis._datos_grafico_dispersion_por_año(datos_filtrados, PAIS, AÑO, año, CONSUMO, EMISIONES)
+        assert sorted(etiquetas) == _paises(datos_filtrados)
+        assert list(etiquetas) == list(un_año[PAIS].astype(str))
+        np.testing.assert_array_equal(x, un_año[CONSUMO].to_numpy(dtype=float))
+        np.testing.assert_array_equal(y, un_año[EMISIONES].to_numpy(dtype=float))
+    con_cubo = vis._cuadros_dispersion_por_año(datos_filtrados, PAIS, AÑO, CONSUMO, EMISIONES, cubo=cubo)
+    assert [list(c[3]) for c in con_cubo] == [list(c[3]) for c in cuadros]